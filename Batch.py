@@ -0,0 +1,313 @@
+import os
+import sys
+import glob
+import json
+import multiprocessing
+
+from Parser import ASTParser
+from Query import ASTQueryParser, ASTQuery
+from Cache import ASTCache
+from Stats import ASTStats
+from Memo import ASTMemo
+import Binary
+import Columnar
+import Shards
+import Compression
+
+
+
+def collect( patterns, extension = '.py' ):
+	"""
+	Expands a list of files, directories and glob
+	patterns into a sorted list of source files.
+	Directories are walked recursively.
+	"""
+	found = set()
+
+	for pattern in patterns:
+		matches = glob.glob( pattern ) if glob.has_magic( pattern ) else [ pattern ]
+
+		for match in matches:
+			if os.path.isdir( match ):
+				for root, dirs, files in os.walk( match ):
+					dirs.sort()
+					for name in files:
+						if name.endswith( extension ):
+							found.add( os.path.join( root, name ) )
+			else:
+				found.add( match )
+
+	return sorted( found )
+
+
+
+EXTENSIONS = { 'json': '.json', 'binary': '.dast', 'columns': '.cols', 'shards': '.shards' }
+
+
+cache = None
+format = 'json'
+profile = 'full'
+outline = False
+stats = None
+check = False
+memo = None
+ranges = False
+query = None
+packing = None
+
+
+def initialize( directory, limit, encoding = 'json', output = 'full', projection = False, counting = False, checking = False, memoizing = None, ranging = False, querying = None, level = None, compressing = None ):
+	"""
+	Pool initializer, gives each worker its own
+	handle on the shared on-disk cache, and sets
+	the output format, profile and projection. With
+	counting, each worker counts its serialization
+	into an ASTStats of its own. With checking, files
+	are only checked (see ASTParser.check). memoizing,
+	if given, is the directory and limit of an ASTMemo
+	for each worker, all sharing the directory. With
+	ranging, positions carry source ranges. querying,
+	if given, is a query only the matches of which are
+	serialized (see Query.py). level is the compression
+	level of the cache, if any. compressing, if given, is
+	the method and level each result is compressed with.
+	"""
+	global cache, format, profile, outline, stats, check, memo, ranges, query, packing
+	cache = ASTCache( directory, limit, level ) if directory is not None else None
+	format = encoding
+	profile = output
+	outline = projection
+	stats = ASTStats() if counting else None
+	check = checking
+	memo = ASTMemo( *memoizing ) if memoizing is not None else None
+	ranges = ranging
+	query = ASTQuery( querying ) if querying is not None else None
+	packing = compressing
+
+
+def parse_file( filepath ):
+	"""
+	Pool worker. Any failure is reported as an
+	error envelope so that one bad file cannot
+	take down the whole run. The counters for the
+	file, if counting, are handed back with it, and
+	so are the memo counts, if memoizing. Results are
+	compressed here, if compressing, so that the work is
+	spread over the pool, and handed back with the size
+	they had before.
+	"""
+	parser = ( ASTParser if query is None else ASTQueryParser )( filepath, cache = cache, profile = profile, outline = outline, stats = stats, memo = memo, ranges = ranges )
+	counters = memoized = None
+
+	try:
+		if check:
+			result = parser.check()
+		elif query is not None:
+			result = parser.query( query )
+		elif format == 'binary':
+			result = Binary.encode( parser.result(), parser.encoding )
+		elif format == 'columns':
+			result = parser.columns()
+		elif format == 'shards':
+			result = parser.shards()
+		else:
+			result = parser.parse()
+
+		if stats is not None:
+			counters = stats.reset()
+
+		if memo is not None:
+			memoized = memo.reset()
+
+		result, size = pack( result )
+		return filepath, parser.success, parser.cached, result, counters, memoized, size
+
+	except Exception as e:
+		error = {
+			"success": False,
+			"message": "%s: %s" % ( e.__class__.__name__, e ),
+			"errno": -1,
+			"filepath": filepath
+		}
+
+		if format == 'binary':
+			result = Binary.encode( error )
+		elif format == 'columns':
+			result = Columnar.encode( error, [] )
+		elif format == 'shards':
+			result = Shards.encode( error, [] )
+		else:
+			result = json.dumps( error )
+
+		if stats is not None:
+			counters = stats.reset()
+
+		if memo is not None:
+			memoized = memo.reset()
+
+		result, size = pack( result )
+		return filepath, False, parser.cached, result, counters, memoized, size
+
+
+def pack( result ):
+	"""
+	Returns a result, compressed if compressing, and
+	its size before.
+	"""
+	if packing is None:
+		return result, len( result )
+
+	return Compression.compress( result, *packing ), len( result )
+
+
+
+class ASTBatch:
+	"""
+	This module fans ASTParser work for a set of
+	files out over a process pool. Results are either
+	written one per file under an output directory,
+	or streamed as NDJSON, one envelope per line.
+	Binary, columnar and sharded results can only be written
+	to files. If an ASTStats is supplied, the counters
+	of every worker are merged into it. With check,
+	files are only checked, and each result is just
+	the envelope, without the ast. If an ASTMemo is
+	supplied, each worker memoizes into one of its own,
+	sharing its directory, and the counts are merged
+	into it. With ranges, positions carry source ranges
+	(see Ranges.py). With a query, each result holds only
+	the nodes it matches (see Query.py). With compression,
+	gzip, every file written is compressed at the given
+	level (see Compression.py), and size and written
+	count the bytes of the results before and after.
+	"""
+
+
+	def __init__( self, patterns, jobs = None, output = None, cache = None, format = 'json', profile = 'full', outline = False, stats = None, check = False, memo = None, ranges = False, query = None, compression = None, level = Compression.LEVEL ):
+		if compression not in ( None, ) + Compression.METHODS:
+			raise ValueError( "unknown compression %r" % compression )
+
+		self.patterns = patterns
+		self.jobs = jobs or multiprocessing.cpu_count()
+		self.output = output
+		self.cache = cache
+		self.format = format
+		self.profile = profile
+		self.outline = outline
+		self.stats = stats
+		self.check = check
+		self.memo = memo
+		self.ranges = ranges
+		self.query = query
+		self.compression = compression
+		self.level = level
+		self.parsed = 0
+		self.failed = 0
+		self.size = 0
+		self.written = 0
+
+
+	def run( self, stream = sys.stdout, files = None ):
+		"""
+		Parses the files the patterns expand to, or the
+		given files as they are, without expanding them.
+		"""
+		if files is None:
+			files = collect( self.patterns )
+
+		if not files:
+			return
+
+		memoizing = ( self.memo.directory, self.memo.limit ) if self.memo is not None else None
+
+		# a stream is compressed as a whole, by whoever hands it in
+		compressing = ( self.compression, self.level ) if self.compression is not None and self.output is not None else None
+
+		if self.cache is not None:
+			settings = ( self.cache.directory, self.cache.limit, self.format, self.profile, self.outline, self.stats is not None, self.check, memoizing, self.ranges, self.query, self.cache.level, compressing )
+		else:
+			settings = ( None, None, self.format, self.profile, self.outline, self.stats is not None, self.check, memoizing, self.ranges, self.query, None, compressing )
+
+		# no more workers than files, and none for a single file
+		jobs = min( self.jobs, len( files ) )
+
+		if jobs == 1:
+			initialize( *settings )
+			self.consume( ( parse_file( filepath ) for filepath in files ), stream )
+			return
+
+		chunksize = max( 1, min( 64, len( files ) // ( jobs * 4 ) ) )
+		pool = multiprocessing.Pool( jobs, initialize, settings )
+
+		try:
+			self.consume( pool.imap_unordered( parse_file, files, chunksize ), stream )
+			pool.close()
+
+		except:
+			pool.terminate()
+			raise
+
+		finally:
+			pool.join()
+
+
+	def consume( self, results, stream ):
+		for filepath, success, cached, result, counters, memoized, size in results:
+			if counters is not None:
+				self.stats.merge( counters )
+
+			if memoized is not None:
+				self.memo.merge( memoized )
+
+			if success:
+				self.parsed += 1
+			else:
+				self.failed += 1
+
+			if cached is not None:
+				if cached:
+					self.cache.hits += 1
+				else:
+					self.cache.misses += 1
+
+			self.size += size
+			self.written += len( result )
+
+			if self.output is None:
+				stream.write( result + '\n' )
+			else:
+				self.write( filepath, result )
+
+
+	def write( self, filepath, result ):
+		target = self.target( filepath )
+		directory = os.path.dirname( target )
+
+		if not os.path.isdir( directory ):
+			try:
+				os.makedirs( directory )
+			except OSError:
+				if not os.path.isdir( directory ):
+					raise
+
+		f = open( target, 'wb' )
+		f.write( result )
+		f.close()
+
+
+	def target( self, filepath ):
+		"""
+		Returns the file the result for filepath is
+		written to, under the output directory.
+		"""
+		extension = EXTENSIONS[ self.format ] + ( Compression.EXTENSIONS[ self.compression ] if self.compression is not None else '' )
+		return os.path.join( self.output, self.destination( filepath ) + extension )
+
+
+	def destination( self, filepath ):
+		relative = os.path.relpath( filepath )
+
+		if relative.startswith( os.pardir ):
+			relative = os.path.abspath( filepath ).lstrip( os.sep )
+
+		return relative
@@ -0,0 +1,398 @@
+import gc
+import sys
+import json
+import array
+import struct
+import collections
+
+
+MAGIC = b'DAST'
+VERSION = 2
+
+# magic, version, then the byte lengths of the string, number and
+# shape tables, and the number of codes
+HEADER = struct.Struct( '<4sBxxxIIII' )
+
+CONSTANT, INTEGER, NUMBER, STRING, LIST, OBJECT, NODE, POSITION = range( 8 )
+
+BITS = 3
+MASK = ( 1 << BITS ) - 1
+# codes are signed, so that the array gives ints rather than longs
+LIMIT = 1 << ( 31 - BITS )
+
+CONSTANTS = ( None, False, True )
+
+# a signed array typecode of 4 bytes
+CODE = 'i' if array.array( 'i' ).itemsize == 4 else 'l'
+
+# builders by their source, shared by every decode, the most recently
+# used up to BUILT of them, so that a long running process that decodes
+# ever new shapes does not keep them all
+BUILDERS = collections.OrderedDict()
+BUILT = 4096
+
+
+
+class Code:
+	"""
+	A code queued on the encoder stack, to be written
+	once the values before it have been.
+	"""
+
+	__slots__ = ( 'code', )
+
+	def __init__( self, code ):
+		self.code = code
+
+
+
+class ASTBinaryEncoder:
+	"""
+	The ASTBinaryEncoder writes the json-shaped output
+	of the ASTSerializer in a compact binary form.
+
+	Every string, including every key, is stored once in
+	a string table, and every float, negative or large
+	integer once in a number table. Every distinct key
+	sequence of a dict is stored once as a shape; dicts
+	that carry string "expr" and "type" fields are nodes,
+	whose shape also holds those two values, and whether
+	their position is a { "line": n }, which is then
+	stored as the bare line.
+
+	The value itself is a flat array of 32 bit codes, a
+	tag in the low 3 bits and an argument above: a table
+	index, a small integer, a constant, or the length of a
+	list. Values come in postorder, so that the decoder
+	builds them on a stack: the items of a list in order,
+	then the list; the fields of a dict last to first, then
+	its shape. The tables are json arrays, which decode at
+	the speed of json.loads.
+
+	layout:
+		magic, version, table lengths, code count
+		strings: json array
+		numbers: json array
+		shapes: json array of [ tag, key indices, expr index, type index, folded ]
+		codes: little-endian int32 *
+	"""
+
+
+	def __init__( self, encoding = 'utf-8' ):
+		self.encoding = encoding
+		self.strings = {}
+		self.numbers = {}
+		self.shapes = {}
+
+
+	def encode( self, value ):
+		enabled = gc.isenabled()
+		gc.disable()
+
+		try:
+			codes = self.codes( value )
+
+		finally:
+			if enabled:
+				gc.enable()
+
+		if sys.byteorder != 'little':
+			codes.byteswap()
+
+		strings = json.dumps( sorted( self.strings, key = self.strings.get ) )
+		numbers = json.dumps( [ number for kind, text, number in sorted( self.numbers, key = self.numbers.get ) ] )
+		shapes = json.dumps( [ list( shape ) for shape in sorted( self.shapes, key = self.shapes.get ) ] )
+
+		return b''.join([
+			HEADER.pack( MAGIC, VERSION, len( strings ), len( numbers ), len( shapes ), len( codes ) ),
+			strings,
+			numbers,
+			shapes,
+			codes.tostring()
+		])
+
+
+	def string( self, s ):
+		if isinstance( s, str ):
+			s = s.decode( self.encoding )
+
+		index = self.strings.get( s )
+
+		if index is None:
+			index = self.strings[ s ] = len( self.strings )
+
+		return index
+
+
+	def number( self, n ):
+		# floats by their repr, so that -0.0 is not 0.0
+		key = ( float, repr( n ), n ) if isinstance( n, float ) else ( int, None, int( n ) )
+		index = self.numbers.get( key )
+
+		if index is None:
+			index = self.numbers[ key ] = len( self.numbers )
+
+		return index
+
+
+	def shape( self, tag, keys, expr = None, kind = None, folded = False ):
+		shape = ( tag, tuple( self.string( key ) for key in keys ), expr, kind, folded )
+		index = self.shapes.get( shape )
+
+		if index is None:
+			index = self.shapes[ shape ] = len( self.shapes )
+
+		return index
+
+
+	def codes( self, value ):
+		"""
+		Returns the codes of a value, walking it with an
+		explicit stack, so that it can be of any depth.
+		"""
+		codes = array.array( CODE )
+		emit = codes.append
+		stack = [ value ]
+		pop = stack.pop
+		push = stack.append
+
+		while stack:
+			value = pop()
+			kind = value.__class__
+
+			if kind is Code:
+				emit( value.code )
+
+			elif kind is dict:
+				self.dict( value, push, emit )
+
+			elif kind is list or kind is tuple:
+				push( Code( len( value ) << BITS | LIST ) )
+
+				for i in xrange( len( value ) - 1, -1, -1 ):
+					push( value[ i ] )
+
+			elif value is None:
+				emit( CONSTANT )
+
+			elif value is False:
+				emit( 1 << BITS | CONSTANT )
+
+			elif value is True:
+				emit( 2 << BITS | CONSTANT )
+
+			elif kind is int and 0 <= value < LIMIT:
+				emit( value << BITS | INTEGER )
+
+			elif isinstance( value, basestring ):
+				emit( self.string( value ) << BITS | STRING )
+
+			elif isinstance( value, (int, long, float) ):
+				emit( self.number( value ) << BITS | NUMBER )
+
+			elif isinstance( value, dict ):
+				self.dict( value, push, emit )
+
+			elif isinstance( value, (list, tuple) ):
+				push( list( value ) )
+
+			else:
+				raise TypeError( repr( value ) + " is not JSON serializable" )
+
+		return codes
+
+
+	def dict( self, value, push, emit ):
+		"""
+		Queues the fields of a dict, last to first, and
+		after them its shape.
+		"""
+		keys = value.keys()
+
+		if len( keys ) == 1 and keys[ 0 ] == 'line' and line( value[ 'line' ] ):
+			emit( value[ 'line' ] << BITS | POSITION )
+			return
+
+		expr = value.get( 'expr' )
+		kind = value.get( 'type' )
+
+		if not isinstance( expr, basestring ) or not isinstance( kind, basestring ):
+			push( Code( self.shape( OBJECT, keys ) << BITS | OBJECT ) )
+
+			for key in keys:
+				push( value[ key ] )
+
+			return
+
+		position = value.get( 'position' )
+		folded = position.__class__ is dict and len( position ) == 1 and line( position.get( 'line' ) )
+		push( Code( self.shape( NODE, keys, self.string( expr ), self.string( kind ), folded ) << BITS | NODE ) )
+
+		for key in keys:
+			if key == 'expr' or key == 'type':
+				continue
+
+			if folded and key == 'position':
+				push( Code( position[ 'line' ] << BITS | INTEGER ) )
+			else:
+				push( value[ key ] )
+
+
+
+def line( value ):
+	return value.__class__ is int and 0 <= value < LIMIT
+
+
+
+class ASTBinaryDecoder:
+	"""
+	The ASTBinaryDecoder reads the output of the
+	ASTBinaryEncoder back into the same dicts, lists
+	and scalars that json.loads would give for the
+	json encoding of the same value.
+
+	Every shape is built by a function generated for it,
+	whose dict display pops the values of its fields off
+	the stack, in the order json.loads would insert them;
+	the codes are read into an array in one go, so the
+	loop over them only pushes values and calls those.
+	"""
+
+
+	def decode( self, data ):
+		data = bytes( data )
+
+		if len( data ) < HEADER.size:
+			raise ValueError( "not a binary AST" )
+
+		magic, version, strings, numbers, shapes, count = HEADER.unpack_from( data, 0 )
+
+		if magic != MAGIC:
+			raise ValueError( "not a binary AST" )
+
+		if version != VERSION:
+			raise ValueError( "unsupported binary AST version %d" % version )
+
+		offset = HEADER.size
+		end = offset + strings + numbers + shapes + 4 * count
+
+		if end != len( data ):
+			raise ValueError( "binary AST is %d bytes, expected %d" % ( len( data ), end ) )
+
+		self.strings = json.loads( data[ offset : offset + strings ] )
+		offset += strings
+
+		self.numbers = json.loads( data[ offset : offset + numbers ] )
+		offset += numbers
+
+		self.builders = [ self.builder( *shape ) for shape in json.loads( data[ offset : offset + shapes ] ) ]
+		offset += shapes
+
+		codes = array.array( CODE )
+		codes.fromstring( data[ offset : end ] )
+
+		if sys.byteorder != 'little':
+			codes.byteswap()
+
+		# the value has no cycles, and collecting while it is built only slows it down
+		enabled = gc.isenabled()
+		gc.disable()
+
+		try:
+			return self.build( codes )
+
+		except (IndexError):
+			raise ValueError( "malformed binary AST" )
+
+		finally:
+			if enabled:
+				gc.enable()
+
+
+	def builder( self, tag, keys, expr, kind, folded ):
+		"""
+		Returns the function that builds a dict of a shape,
+		generated from its source, which decodes reuse.
+		"""
+		items = []
+
+		for key in keys:
+			name = self.strings[ key ]
+
+			if tag == NODE and name == 'expr':
+				items.append( '%r: %r' % ( name, self.strings[ expr ] ) )
+			elif tag == NODE and name == 'type':
+				items.append( '%r: %r' % ( name, self.strings[ kind ] ) )
+			elif folded and name == 'position':
+				items.append( "%r: { u'line': pop() }" % name )
+			else:
+				items.append( '%r: pop()' % name )
+
+		source = 'lambda pop: { %s }' % ', '.join( items )
+		builder = BUILDERS.pop( source, None )
+
+		if builder is None:
+			builder = eval( compile( source, '<Binary shape>', 'eval' ) )
+
+			if len( BUILDERS ) >= BUILT:
+				BUILDERS.popitem( last = False )
+
+		BUILDERS[ source ] = builder
+		return builder
+
+
+	def build( self, codes ):
+		strings = self.strings
+		numbers = self.numbers
+		builders = self.builders
+		stack = []
+		push = stack.append
+		pop = stack.pop
+
+		for code in codes:
+			tag = code & MASK
+
+			if tag == STRING:
+				push( strings[ code >> BITS ] )
+
+			elif tag == NODE or tag == OBJECT:
+				push( builders[ code >> BITS ]( pop ) )
+
+			elif tag == POSITION:
+				push( { u'line': code >> BITS } )
+
+			elif tag == INTEGER:
+				push( code >> BITS )
+
+			elif tag == LIST:
+				n = code >> BITS
+
+				if n:
+					items = stack[ -n: ]
+					del stack[ -n: ]
+					push( items )
+				else:
+					push( [] )
+
+			elif tag == CONSTANT:
+				push( CONSTANTS[ code >> BITS ] )
+
+			else:
+				push( numbers[ code >> BITS ] )
+
+		if len( stack ) != 1:
+			raise ValueError( "malformed binary AST" )
+
+		return stack[ 0 ]
+
+
+
+def encode( value, encoding = 'utf-8' ):
+	"""
+	encoding is that of the byte strings in value.
+	"""
+	return ASTBinaryEncoder( encoding ).encode( value )
+
+
+def decode( data ):
+	return ASTBinaryDecoder().decode( data )
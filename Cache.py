@@ -0,0 +1,170 @@
+import os
+import sys
+import zlib
+import errno
+import hashlib
+import platform
+import tempfile
+
+import Serializer
+import Compression
+
+
+GRAMMAR = "%s-%d.%d" % ( platform.python_implementation(), sys.version_info[ 0 ], sys.version_info[ 1 ] )
+
+
+
+class ASTCache:
+	"""
+	This module is a persistent, content-addressed store
+	of serialized ASTs. Entries are keyed by a hash of
+	the source bytes, the interpreter grammar and the
+	serializer version. The store is bounded in size,
+	evicting least recently used entries, where use is
+	tracked through file modification times. Processes
+	share a store, so each one only counts what it writes
+	until it has written a sixteenth of the limit, and then
+	takes the size of the store from disk again, so that
+	together they cannot run far past the limit. With a
+	level, entries are stored gzip compressed at that
+	level, and the limit bounds their compressed size;
+	entries are told apart by their header on the way
+	out, so a store can hold both.
+	"""
+
+
+	def __init__( self, directory, limit = 256 * 1024 * 1024, level = None ):
+		self.directory = directory
+		self.limit = limit
+		self.level = level
+		self.size = None
+		self.written = 0
+		self.hits = 0
+		self.misses = 0
+
+
+	def key( self, source, variant = '' ):
+		"""
+		variant tells apart different outputs for the
+		same source, such as the output profiles.
+		"""
+		digest = hashlib.sha1()
+		digest.update( GRAMMAR.encode( 'ascii' ) )
+		digest.update( b'\0' )
+		digest.update( Serializer.VERSION.encode( 'ascii' ) )
+		digest.update( b'\0' )
+		digest.update( variant.encode( 'ascii' ) )
+		digest.update( b'\0' )
+		digest.update( source )
+		return digest.hexdigest()
+
+
+	def path( self, key ):
+		return os.path.join( self.directory, key[ :2 ], key + '.json' )
+
+
+	def get( self, key ):
+		path = self.path( key )
+
+		try:
+			f = open( path, 'rb' )
+			value = f.read()
+			f.close()
+
+			if Compression.compressed( value ):
+				value = Compression.decompress( value )
+
+		except (OSError, IOError, zlib.error):
+			self.misses += 1
+			return None
+
+		try:
+			os.utime( path, None )
+		except OSError:
+			pass
+
+		self.hits += 1
+		return value
+
+
+	def put( self, key, value ):
+		path = self.path( key )
+		directory = os.path.dirname( path )
+
+		try:
+			os.makedirs( directory )
+		except OSError as e:
+			if e.errno != errno.EEXIST:
+				return
+
+		if self.level is not None:
+			value = Compression.compress( value, 'gzip', self.level )
+
+		try:
+			handle, temporary = tempfile.mkstemp( dir = directory, suffix = '.tmp' )
+			f = os.fdopen( handle, 'wb' )
+			f.write( value )
+			f.close()
+			os.rename( temporary, path )
+
+		except (OSError, IOError):
+			return
+
+		# what other processes wrote is only seen on disk
+		if self.size is None or self.written >= self.limit // 16:
+			self.size = self.usage()
+			self.written = 0
+		else:
+			self.size += len( value )
+			self.written += len( value )
+
+		if self.size > self.limit:
+			self.evict()
+
+
+	def entries( self ):
+		for root, dirs, files in os.walk( self.directory ):
+			for name in files:
+				if not name.endswith( '.json' ):
+					continue
+
+				path = os.path.join( root, name )
+
+				try:
+					stat = os.stat( path )
+				except OSError:
+					continue
+
+				yield stat.st_mtime, stat.st_size, path
+
+
+	def usage( self ):
+		return sum( size for mtime, size, path in self.entries() )
+
+
+	def evict( self ):
+		"""
+		Removes the least recently used entries until the
+		store is back below three quarters of its limit, so
+		that eviction does not run again on every insert.
+		"""
+		entries = sorted( self.entries() )
+		self.size = sum( size for mtime, size, path in entries )
+		target = self.limit * 3 // 4
+
+		for mtime, size, path in entries:
+			if self.size <= target:
+				break
+
+			try:
+				os.remove( path )
+			except OSError:
+				continue
+
+			self.size -= size
+
+
+	def report( self ):
+		total = self.hits + self.misses
+		rate = 100.0 * self.hits / total if total else 0.0
+		return "cache: %d hits, %d misses (%.1f%%)" % ( self.hits, self.misses, rate )
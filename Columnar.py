@@ -0,0 +1,253 @@
+import ast
+import sys
+import json
+import mmap
+import array
+import struct
+
+
+MAGIC = b'DCOL'
+VERSION = 1
+ALIGNMENT = 8
+
+PREFIX = struct.Struct( '<4sBxxxI' )
+
+# The field of each node class whose value goes to the string table.
+VALUES = {
+	'Name': 'id',
+	'Attribute': 'attr',
+	'FunctionDef': 'name',
+	'ClassDef': 'name',
+	'alias': 'name',
+	'keyword': 'arg',
+	'arg': 'arg',
+	'ImportFrom': 'module',
+	'Global': 'names',
+	'Nonlocal': 'names',
+	'Str': 's',
+	'Bytes': 's',
+	'Num': 'n',
+	'NameConstant': 'value',
+}
+
+# ( name, typecode ) of every column, in file order.
+COLUMNS = (
+	( 'type', 'H' ),		# index into the types table
+	( 'field', 'H' ),		# index into the fields table, the field of the parent holding the node
+	( 'parent', 'i' ),		# index of the parent node, -1 for the root
+	( 'first', 'i' ),		# index of the first child
+	( 'children', 'i' ),	# number of children, which follow first contiguously
+	( 'line', 'i' ),		# lineno, 0 where the node has none
+	( 'column', 'i' ),		# col_offset, -1 where the node has none
+	( 'value', 'i' ),		# index into the strings table, -1 for none
+)
+
+
+
+class ASTColumns:
+	"""
+	The ASTColumns lays a python AST out as a flat node
+	table: one entry per node, in breadth first order, so
+	that the children of every node are contiguous, stored
+	as parallel array columns. Names and literals go to a
+	string table, node and field names to their own tables.
+	Expression contexts (Load, Store, ...) are left out.
+
+	encode() writes the table as one file: a fixed prefix,
+	a json header, then every column as raw little endian
+	machine integers, aligned to 8 bytes. The header holds
+	the tables and, for each column, its typecode, item size,
+	offset and length, so a column can be memory mapped or
+	handed to numpy.frombuffer directly. load() reads one back.
+	"""
+
+
+	def __init__( self, encoding = 'utf-8' ):
+		self.encoding = encoding
+		self.types = []
+		self.fields = []
+		self.strings = []
+		self.codes = {}
+		self.columns = dict( ( name, array.array( typecode ) ) for name, typecode in COLUMNS )
+
+
+	def intern( self, table, value ):
+		key = ( id( table ), value )
+		index = self.codes.get( key )
+
+		if index is None:
+			index = self.codes[ key ] = len( table )
+			table.append( value )
+
+		return index
+
+
+	def string( self, value ):
+		if value is None:
+			return -1
+
+		if isinstance( value, list ):
+			value = ','.join( value )
+
+		elif isinstance( value, str ):
+			value = value.decode( self.encoding, 'replace' )
+
+		elif not isinstance( value, unicode ):
+			value = repr( value )
+
+		return self.intern( self.strings, value )
+
+
+	def build( self, tree ):
+		columns = self.columns
+		kinds, fields, parents = columns[ 'type' ], columns[ 'field' ], columns[ 'parent' ]
+		firsts, counts = columns[ 'first' ], columns[ 'children' ]
+		lines, offsets, values = columns[ 'line' ], columns[ 'column' ], columns[ 'value' ]
+		context = ast.expr_context
+
+		nodes = [ tree ]
+		parents.append( -1 )
+		fields.append( self.intern( self.fields, '' ) )
+		i = 0
+
+		while i < len( nodes ):
+			node = nodes[ i ]
+			name = node.__class__.__name__
+			first = len( nodes )
+
+			for field, value in ast.iter_fields( node ):
+				if isinstance( value, ast.AST ):
+					value = [ value ]
+				elif not isinstance( value, list ):
+					continue
+
+				for child in value:
+					if isinstance( child, ast.AST ) and not isinstance( child, context ):
+						nodes.append( child )
+						parents.append( i )
+						fields.append( self.intern( self.fields, field ) )
+
+			kinds.append( self.intern( self.types, name ) )
+			firsts.append( first )
+			counts.append( len( nodes ) - first )
+			lines.append( getattr( node, 'lineno', 0 ) )
+			offsets.append( getattr( node, 'col_offset', -1 ) )
+			values.append( self.string( getattr( node, VALUES[ name ], None ) ) if name in VALUES else -1 )
+			i += 1
+
+		return self
+
+
+	def encode( self, header ):
+		"""
+		header carries everything but the tables and the
+		columns, such as the filepath; it is written as is.
+		"""
+		header = dict( header )
+		header.update({
+			"count": len( self.columns[ 'type' ] ),
+			"types": self.types,
+			"fields": self.fields,
+			"strings": self.strings,
+			"byteorder": "little",
+			"columns": []
+		})
+
+		offset = 0
+		for name, typecode in COLUMNS:
+			column = self.columns[ name ]
+			length = len( column ) * column.itemsize
+			header[ "columns" ].append({
+				"name": name,
+				"typecode": typecode,
+				"itemsize": column.itemsize,
+				"offset": offset,
+				"length": length
+			})
+			offset += pad( length )
+
+		return encode( header, [ self.columns[ name ] for name, typecode in COLUMNS ] )
+
+
+
+def pad( n ):
+	return ( n + ALIGNMENT - 1 ) // ALIGNMENT * ALIGNMENT
+
+
+def encode( header, columns ):
+	"""
+	Writes the file. Column offsets in the header are
+	relative to the start of the column data, which is
+	the first aligned offset after the header.
+	"""
+	text = json.dumps( header ).encode( 'utf-8' )
+
+	out = bytearray( PREFIX.pack( MAGIC, VERSION, len( text ) ) )
+	out.extend( text )
+	out.extend( b'\0' * ( pad( len( out ) ) - len( out ) ) )
+
+	for column in columns:
+		if sys.byteorder != 'little':
+			column = array.array( column.typecode, column )
+			column.byteswap()
+
+		data = column.tostring()
+		out.extend( data )
+		out.extend( b'\0' * ( pad( len( data ) ) - len( data ) ) )
+
+	return bytes( out )
+
+
+def header( data ):
+	"""
+	Returns the header of a columnar file and the
+	offset its column data starts at.
+	"""
+	magic, version, length = PREFIX.unpack_from( data, 0 )
+
+	if magic != MAGIC:
+		raise ValueError( "not a columnar AST" )
+
+	if version != VERSION:
+		raise ValueError( "unsupported columnar AST version %d" % version )
+
+	meta = json.loads( bytes( data[ PREFIX.size : PREFIX.size + length ] ).decode( 'utf-8' ) )
+	return meta, pad( PREFIX.size + length )
+
+
+def load( filepath ):
+	"""
+	Reads a columnar file, through a memory map, into its
+	header and a dict of its columns as arrays. A file for
+	a source that failed to parse has a header only.
+	"""
+	f = open( filepath, 'rb' )
+
+	try:
+		data = mmap.mmap( f.fileno(), 0, access = mmap.ACCESS_READ )
+
+	finally:
+		f.close()
+
+	try:
+		meta, data_start = header( data )
+		columns = {}
+
+		for column in meta.get( "columns", [] ):
+			start = data_start + column[ "offset" ]
+			values = array.array( str( column[ "typecode" ] ) )
+
+			if values.itemsize != column[ "itemsize" ]:
+				raise ValueError( "column %s has items of %d bytes, expected %d" % ( column[ "name" ], column[ "itemsize" ], values.itemsize ) )
+
+			values.fromstring( data[ start : start + column[ "length" ] ] )
+
+			if sys.byteorder != 'little':
+				values.byteswap()
+
+			columns[ column[ "name" ] ] = values
+
+		return meta, columns
+
+	finally:
+		data.close()
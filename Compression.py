@@ -0,0 +1,112 @@
+import zlib
+import struct
+
+
+# Output that is stored is gzip, whose trailer records the decompressed
+# size. A bare zlib stream records none, so it is only written for http,
+# as deflate, where the response carries the size in a header.
+METHODS = ( 'gzip', )
+FORMATS = ( 'gzip', 'zlib' )
+EXTENSIONS = { 'gzip': '.gz' }
+LEVEL = 6
+
+# Every gzip member starts with these; json and the binary formats never do.
+GZIP = b'\x1f\x8b'
+
+
+
+def compressor( method = 'gzip', level = LEVEL ):
+	"""
+	Returns a zlib compressobj writing the format of
+	method: gzip, whose trailer records the decompressed
+	size, or a bare zlib stream.
+	"""
+	if method not in FORMATS:
+		raise ValueError( "unknown compression %r" % method )
+
+	return zlib.compressobj( level, zlib.DEFLATED, zlib.MAX_WBITS | 16 if method == 'gzip' else zlib.MAX_WBITS )
+
+
+def compress( data, method = 'gzip', level = LEVEL ):
+	squeezer = compressor( method, level )
+	return squeezer.compress( data ) + squeezer.flush()
+
+
+def decompress( data ):
+	"""
+	Decompresses gzip, of one member or several written
+	one after another, or zlib, told apart by their header.
+	"""
+	if data[ :2 ] != GZIP:
+		return zlib.decompress( data )
+
+	parts = []
+
+	while data[ :2 ] == GZIP:
+		inflater = zlib.decompressobj( zlib.MAX_WBITS | 16 )
+		parts.append( inflater.decompress( data ) )
+		data = inflater.unused_data
+
+	return b''.join( parts )
+
+
+def size( data ):
+	"""
+	Returns the decompressed size a gzip member records
+	in its trailer (modulo 4 GB, as gzip keeps it).
+	"""
+	if data[ :2 ] != GZIP or len( data ) < 18:
+		raise ValueError( "not gzip data" )
+
+	return struct.unpack( '<I', data[ -4: ] )[ 0 ]
+
+
+def compressed( data ):
+	return data[ :2 ] == GZIP
+
+
+
+class ASTCompressor:
+	"""
+	This module is a file-like object that compresses
+	everything written to it into another, as it is
+	written, so that output of any size is compressed
+	in constant memory. size and written count the bytes
+	that went in and came out; close() finishes the
+	stream but leaves the underlying file open.
+	"""
+
+
+	def __init__( self, out, method = 'gzip', level = LEVEL ):
+		self.out = out
+		self.compressor = compressor( method, level )
+		self.size = 0
+		self.written = 0
+
+
+	def write( self, data ):
+		self.size += len( data )
+		chunk = self.compressor.compress( data )
+
+		if chunk:
+			self.out.write( chunk )
+			self.written += len( chunk )
+
+
+	def flush( self ):
+		self.out.flush()
+
+
+	def close( self ):
+		if self.compressor is None:
+			return
+
+		chunk = self.compressor.flush()
+		self.out.write( chunk )
+		self.written += len( chunk )
+		self.compressor = None
+		self.out.flush()
+
+
+	def report( self ):
+		return "compressed %d bytes to %d (%.1fx)" % ( self.size, self.written, float( self.size ) / self.written if self.written else 0.0 )
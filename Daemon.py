@@ -0,0 +1,315 @@
+import os
+import sys
+import json
+import time
+import select
+import multiprocessing
+
+from Parser import ASTParser
+
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+
+
+def work( connection, filepath, text, profile, outline, cache ):
+	"""
+	Runs in a process of its own, forked for one version
+	of one document, and sends back its envelope.
+	"""
+	parser = ASTParser( filepath, cache = cache, source = text, profile = profile, outline = outline )
+
+	try:
+		result = parser.parse()
+
+	except Exception as e:
+		result = json.dumps({
+			"success": False,
+			"message": "%s: %s" % ( e.__class__.__name__, e ),
+			"errno": -1,
+			"filepath": filepath
+		})
+
+	connection.send_bytes( result )
+	connection.close()
+
+
+
+class Document:
+
+	__slots__ = ( 'path', 'text', 'version', 'due', 'job', 'result', 'parsed', 'waiting' )
+
+	def __init__( self, path, text, version ):
+		self.path = path
+		self.text = text
+		self.version = version
+		self.due = None			# when to parse the current text, if it has not been
+		self.job = None			# ( process, connection, version ) of the parse in flight
+		self.result = None		# envelope of the last parse
+		self.parsed = None		# version the result is for
+		self.waiting = []		# ids of parse requests waiting for the current version
+
+
+
+class ASTDaemon:
+	"""
+	This module keeps documents open for an editor and
+	parses them as they change, speaking JSON-RPC 2.0 over
+	stdio, one message per line. Requests:
+
+		open	{ "path", "text", "version" }	parses the document
+		change	{ "path", "text", "version" }	replaces its text
+		close	{ "path" }
+		parse	{ "path" }						answers with the envelope
+												for the current text
+		shutdown								answers, then exits
+
+	Every parse that completes is also sent as a "parsed"
+	notification, { "path", "version", "result" }. The result
+	is the same envelope ASTParser.parse returns.
+
+	Changes to a document are coalesced: it is parsed delay
+	seconds after the last one, and a change that arrives
+	while it is being parsed kills that parse, which could
+	only produce an outdated result. Each parse runs in a
+	process forked for it, at most jobs at a time, so a slow
+	parse of one version never holds up the next.
+	"""
+
+
+	def __init__( self, jobs = None, delay = 0.05, cache = None, profile = 'full', outline = False ):
+		self.jobs = jobs or multiprocessing.cpu_count()
+		self.delay = delay
+		self.cache = cache
+		self.profile = profile
+		self.outline = outline
+		self.documents = {}
+		self.running = False
+
+
+	def run( self, instream = sys.stdin, outstream = sys.stdout ):
+		self.out = outstream
+		self.running = True
+		fd = instream.fileno()
+		buffered = b''
+
+		try:
+			while self.running:
+				jobs = dict( ( document.job[ 1 ].fileno(), document ) for document in self.documents.itervalues() if document.job is not None )
+				due = [ document.due for document in self.documents.itervalues() if document.due is not None ]
+				timeout = max( 0.0, min( due ) - time.time() ) if due else None
+
+				readable, _, _ = select.select( [ fd ] + jobs.keys(), [], [], timeout )
+
+				for ready in readable:
+					if ready in jobs:
+						self.finish( jobs[ ready ] )
+
+				if fd in readable:
+					data = os.read( fd, 1 << 16 )
+
+					if not data:
+						break
+
+					lines = ( buffered + data ).split( b'\n' )
+					buffered = lines.pop()
+
+					for line in lines:
+						if line.strip():
+							self.handle( line )
+
+				self.schedule()
+
+		finally:
+			for document in self.documents.itervalues():
+				self.cancel( document )
+
+
+	def handle( self, line ):
+		try:
+			message = json.loads( line )
+
+		except ValueError as e:
+			return self.error( None, PARSE_ERROR, str( e ) )
+
+		if not isinstance( message, dict ) or not isinstance( message.get( "method" ), basestring ):
+			return self.error( message.get( "id" ) if isinstance( message, dict ) else None, INVALID_REQUEST, "not a request" )
+
+		identifier = message.get( "id" )
+		params = message.get( "params" ) or {}
+		method = getattr( self, 'on_' + message[ "method" ], None )
+
+		if method is None:
+			return self.error( identifier, METHOD_NOT_FOUND, "unknown method %s" % message[ "method" ] )
+
+		try:
+			method( identifier, params )
+
+		except (KeyError, TypeError) as e:
+			self.error( identifier, INVALID_PARAMS, "invalid params: %s" % e )
+
+
+	def on_open( self, identifier, params ):
+		path = params[ "path" ]
+		waiting = []
+
+		# parse requests on the old text are answered with the new one, as after a change
+		if path in self.documents:
+			self.cancel( self.documents[ path ] )
+			waiting = self.documents[ path ].waiting
+
+		document = self.documents[ path ] = Document( path, params[ "text" ], params.get( "version", 0 ) )
+		document.waiting = waiting
+		document.due = time.time()
+		self.respond( identifier, 'null' )
+
+
+	def on_change( self, identifier, params ):
+		document = self.document( identifier, params )
+
+		if document is None:
+			return
+
+		document.text = params[ "text" ]
+		document.version = params.get( "version", document.version + 1 )
+		document.due = time.time() + self.delay
+		self.cancel( document )
+		self.respond( identifier, 'null' )
+
+
+	def on_close( self, identifier, params ):
+		document = self.document( identifier, params )
+
+		if document is None:
+			return
+
+		self.cancel( document )
+		del self.documents[ document.path ]
+
+		for waiting in document.waiting:
+			self.error( waiting, INVALID_PARAMS, "document closed: %s" % document.path )
+
+		self.respond( identifier, 'null' )
+
+
+	def on_parse( self, identifier, params ):
+		document = self.document( identifier, params )
+
+		if document is None:
+			return
+
+		if document.parsed == document.version and document.result is not None:
+			self.respond( identifier, document.result )
+		else:
+			document.waiting.append( identifier )
+
+			# an explicit request does not wait out the delay
+			if document.job is None:
+				document.due = time.time()
+
+
+	def on_shutdown( self, identifier, params ):
+		self.running = False
+
+		for document in self.documents.itervalues():
+			for waiting in document.waiting:
+				self.error( waiting, INVALID_REQUEST, "shutting down" )
+
+			document.waiting = []
+
+		self.respond( identifier, 'null' )
+
+
+	def document( self, identifier, params ):
+		document = self.documents.get( params[ "path" ] )
+
+		if document is None:
+			self.error( identifier, INVALID_PARAMS, "document not open: %s" % params[ "path" ] )
+
+		return document
+
+
+	def schedule( self ):
+		"""
+		Starts the parses that are due, oldest first,
+		as long as fewer than jobs are running.
+		"""
+		now = time.time()
+		running = sum( 1 for document in self.documents.itervalues() if document.job is not None )
+		due = sorted( ( document.due, path ) for path, document in self.documents.iteritems() if document.due is not None and document.due <= now and document.job is None )
+
+		for _, path in due[ : max( 0, self.jobs - running ) ]:
+			document = self.documents[ path ]
+			receiver, sender = multiprocessing.Pipe( False )
+			process = multiprocessing.Process( target = work, args = ( sender, path, document.text, self.profile, self.outline, self.cache ) )
+			process.daemon = True
+			process.start()
+			sender.close()
+
+			document.job = ( process, receiver, document.version )
+			document.due = None
+
+
+	def finish( self, document ):
+		process, connection, version = document.job
+		document.job = None
+
+		try:
+			result = connection.recv_bytes()
+
+		except EOFError:
+			result = json.dumps({
+				"success": False,
+				"message": "the parse exited with code %s" % process.exitcode,
+				"errno": -1,
+				"filepath": document.path
+			})
+
+		connection.close()
+		process.join()
+
+		if version != document.version:
+			return
+
+		document.result = result
+		document.parsed = version
+		self.notify( 'parsed', '{"path": %s, "version": %s, "result": %s}' % ( json.dumps( document.path ), json.dumps( version ), result ) )
+
+		for waiting in document.waiting:
+			self.respond( waiting, result )
+
+		document.waiting = []
+
+
+	def cancel( self, document ):
+		if document.job is None:
+			return
+
+		process, connection, version = document.job
+		document.job = None
+		process.terminate()
+		process.join()
+		connection.close()
+
+
+	def respond( self, identifier, result ):
+		"""
+		result is json text, spliced in as it is.
+		"""
+		if identifier is not None:
+			self.send( '{"jsonrpc": "2.0", "id": %s, "result": %s}' % ( json.dumps( identifier ), result ) )
+
+
+	def error( self, identifier, code, message ):
+		self.send( json.dumps({ "jsonrpc": "2.0", "id": identifier, "error": { "code": code, "message": message } }) )
+
+
+	def notify( self, method, params ):
+		self.send( '{"jsonrpc": "2.0", "method": %s, "params": %s}' % ( json.dumps( method ), params ) )
+
+
+	def send( self, message ):
+		self.out.write( message + '\n' )
+		self.out.flush()
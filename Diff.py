@@ -0,0 +1,316 @@
+import json
+import difflib
+
+from Parser import ASTParser
+from Incremental import shift, offset
+import Iterative
+
+
+# A patch is a list of operations, applied in order, each addressed by
+# the path from the root of the tree to the value it changes, as a list
+# of dict keys and list indices:
+#
+#	{ "op": "replace", "path": p, "value": v }	the value at p becomes v
+#	{ "op": "insert", "path": p, "value": v }	v goes in at list index, or
+#												dict key, p[ -1 ]
+#	{ "op": "remove", "path": p }				the list item, or dict key,
+#												at p goes away
+#	{ "op": "shift", "path": p, "delta": d }	every line in the subtree
+#												at p moves by d (see
+#												Incremental.shift)
+#
+# Paths refer to the tree as the operations before have left it.
+
+MARKER = object()
+
+
+
+def line( position ):
+	"""
+	Returns the line of a full or lean position, or
+	of a range, or None for anything else.
+	"""
+	if isinstance( position, dict ):
+		position = position.get( "line" )
+
+	elif isinstance( position, list ) and position:
+		position = position[ 0 ]
+
+	if isinstance( position, (int, long) ) and not isinstance( position, bool ):
+		return position
+
+	return None
+
+
+def fingerprints( root ):
+	"""
+	Returns a hash for every dict and list in a tree,
+	keyed by id, that ignores positions, so that a
+	subtree that only moved gets the same hash.
+	"""
+	hashes = {}
+	pending = [ ( root, False ) ]
+
+	while pending:
+		value, done = pending.pop()
+
+		if not isinstance( value, (dict, list, tuple) ):
+			continue
+
+		if not done:
+			pending.append( ( value, True ) )
+			pending.extend( ( item, False ) for item in ( value.itervalues() if isinstance( value, dict ) else value ) )
+			continue
+
+		if isinstance( value, dict ):
+			hashes[ id( value ) ] = hash( frozenset(
+				( key, fingerprint( item, hashes ) ) for key, item in value.iteritems() if key != "position"
+			) )
+		else:
+			hashes[ id( value ) ] = hash( tuple( fingerprint( item, hashes ) for item in value ) )
+
+	return hashes
+
+
+def fingerprint( value, hashes ):
+	if isinstance( value, (dict, list, tuple) ):
+		return hashes[ id( value ) ]
+
+	return hash( ( kind( value ), value ) )
+
+
+def kind( value ):
+	"""
+	Tells 1, 1.0 and True apart, which compare equal,
+	but not str and unicode, nor tuples and lists, so that
+	a tree loaded back from json matches the one it was
+	encoded from.
+	"""
+	if isinstance( value, basestring ):
+		return basestring
+
+	if isinstance( value, tuple ):
+		return list
+
+	return value.__class__
+
+
+def same( a, b ):
+	"""
+	Compares two scalars; containers never compare
+	the same here, and are walked instead, since comparing
+	them recursively fails on the deepest trees.
+	"""
+	if isinstance( a, (dict, list, tuple) ) or isinstance( b, (dict, list, tuple) ):
+		return False
+
+	return a == b and kind( a ) is kind( b )
+
+
+def moved( old, new ):
+	"""
+	Tells whether two subtrees are the same but for
+	their lines, which all moved by the same amount, and
+	returns that amount, or None if they are not. Ranges
+	must have moved as a whole, columns unchanged.
+	"""
+	delta = MARKER
+	pending = [ ( old, new ) ]
+
+	while pending:
+		a, b = pending.pop()
+
+		if isinstance( a, dict ):
+			if not isinstance( b, dict ) or len( a ) != len( b ):
+				return None
+
+			for key, item in a.iteritems():
+				if key not in b:
+					return None
+
+				if key == "position":
+					first, second = line( item ), line( b[ key ] )
+
+					if first is None or second is None:
+						if item != b[ key ]:
+							return None
+
+						continue
+
+					if delta is MARKER:
+						delta = second - first
+
+					if offset( item, delta ) != b[ key ]:
+						return None
+
+				else:
+					pending.append( ( item, b[ key ] ) )
+
+		elif isinstance( a, (list, tuple) ):
+			if not isinstance( b, (list, tuple) ) or len( a ) != len( b ):
+				return None
+
+			pending.extend( zip( a, b ) )
+
+		elif not same( a, b ):
+			return None
+
+	return 0 if delta is MARKER else delta
+
+
+def node( value ):
+	return isinstance( value, dict ) and "type" in value
+
+
+
+def diff( old, new ):
+	"""
+	Returns a patch that turns the serialized tree old
+	into new. Nodes of the same type are compared field by
+	field, and lists are aligned, so that only the subtrees
+	that changed are replaced, inserted or removed, and
+	subtrees that just moved to other lines are shifted.
+	"""
+	hashes = fingerprints( old )
+	hashes.update( fingerprints( new ) )
+
+	patch = []
+	pending = [ ( old, new, [] ) ]
+
+	while pending:
+		task = pending.pop()
+
+		if isinstance( task, dict ):
+			patch.append( task )
+			continue
+
+		a, b, path = task
+		tasks = []
+
+		if isinstance( a, dict ) and isinstance( b, dict ) and ( not node( a ) or a.get( "type" ) == b.get( "type" ) ):
+			if fingerprint( a, hashes ) == fingerprint( b, hashes ):
+				delta = moved( a, b )
+
+				if delta == 0:
+					continue
+
+				if delta is not None:
+					patch.append({ "op": "shift", "path": path, "delta": delta })
+					continue
+
+			for key, item in a.iteritems():
+				if key not in b:
+					tasks.append({ "op": "remove", "path": path + [ key ] })
+				elif not same( item, b[ key ] ):
+					tasks.append( ( item, b[ key ], path + [ key ] ) )
+
+			for key, item in b.iteritems():
+				if key not in a:
+					tasks.append({ "op": "insert", "path": path + [ key ], "value": item })
+
+		elif isinstance( a, (list, tuple) ) and isinstance( b, (list, tuple) ):
+			first = [ fingerprint( item, hashes ) for item in a ]
+			second = [ fingerprint( item, hashes ) for item in b ]
+			matcher = difflib.SequenceMatcher( None, first, second, autojunk = False )
+
+			# the list holds the new items up to j1, then the old ones from i1
+			for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+				if tag == 'equal':
+					tasks.extend( ( a[ i ], b[ j1 + i - i1 ], path + [ j1 + i - i1 ] ) for i in range( i1, i2 ) if a[ i ] is not b[ j1 + i - i1 ] )
+					continue
+
+				common = min( i2 - i1, j2 - j1 ) if tag == 'replace' else 0
+
+				for k in range( common ):
+					tasks.append( ( a[ i1 + k ], b[ j1 + k ], path + [ j1 + k ] ) )
+
+				for k in range( i2 - i1 - common ):
+					tasks.append({ "op": "remove", "path": path + [ j1 + common ] })
+
+				for k in range( common, j2 - j1 ):
+					tasks.append({ "op": "insert", "path": path + [ j1 + k ], "value": b[ j1 + k ] })
+
+		elif not same( a, b ):
+			patch.append({ "op": "replace", "path": path, "value": b })
+
+		pending.extend( reversed( tasks ) )
+
+	return patch
+
+
+def apply( tree, patch ):
+	"""
+	Applies a patch to a serialized tree, as json
+	decodes it, in place, and returns the tree, which
+	is a new value if the patch replaces its root. The
+	result is equal to the tree the patch was made for,
+	though its dicts may list their keys in another order.
+	"""
+	for operation in patch:
+		path = operation[ "path" ]
+		op = operation[ "op" ]
+
+		if not path:
+			if op == "replace":
+				tree = operation[ "value" ]
+			elif op == "shift":
+				shift( tree, operation[ "delta" ] )
+			else:
+				raise ValueError( "cannot %s the root" % op )
+
+			continue
+
+		parent = tree
+
+		for key in path[ :-1 ]:
+			parent = parent[ key ]
+
+		key = path[ -1 ]
+
+		if op == "replace":
+			parent[ key ] = operation[ "value" ]
+		elif op == "insert" and isinstance( parent, list ):
+			parent.insert( key, operation[ "value" ] )
+		elif op == "insert":
+			parent[ key ] = operation[ "value" ]
+		elif op == "remove":
+			del parent[ key ]
+		elif op == "shift":
+			shift( parent[ key ], operation[ "delta" ] )
+		else:
+			raise ValueError( "unknown patch operation %r" % op )
+
+	return tree
+
+
+
+class ASTDiffParser( ASTParser ):
+	"""
+	This module parses a new version of a source, and
+	returns the patch from the ast of an earlier version
+	to its own, in place of the ast, so that clients who
+	hold the earlier tree only receive what changed.
+	"""
+
+
+	def diff( self, previous ):
+		"""
+		Returns the envelope parse() would, with the patch
+		from previous, an ast as parse() returned it with
+		the same options, in place of the ast.
+		"""
+		result = self.result()
+
+		if not self.success:
+			return json.dumps( result )
+
+		patch = diff( previous, result[ "ast" ] )
+		head, tail = self.envelope()
+
+		try:
+			serialized = json.dumps( patch, encoding = self.encoding )
+
+		except (RuntimeError):
+			serialized = Iterative.dumps( patch, self.encoding )
+
+		return head[ : -len( '"ast": ' ) ] + '"patch": ' + serialized + tail
@@ -0,0 +1,219 @@
+import ast
+import json
+import __future__
+
+from Parser import ASTParser
+import Source
+
+
+
+def offset( position, delta ):
+	"""
+	Returns a position moved by delta lines: its line,
+	and for a range, its end line too. Columns stay, and
+	anything that is not a position is returned as it is.
+	"""
+	if isinstance( position, dict ):
+		moved = dict( position )
+
+		for key in ( "line", "endLine" ):
+			if isinstance( moved.get( key ), (int, long) ) and not isinstance( moved[ key ], bool ):
+				moved[ key ] += delta
+
+		return moved
+
+	if isinstance( position, list ):
+		return [ item + delta if i in ( 0, 2 ) and isinstance( item, (int, long) ) else item for i, item in enumerate( position ) ]
+
+	if isinstance( position, (int, long) ) and not isinstance( position, bool ):
+		return position + delta
+
+	return position
+
+
+def shift( value, delta ):
+	"""
+	Moves every position in a serialized subtree by
+	delta lines, in place. Lean positions, and the ranges
+	of --ranges, are moved as well (see offset).
+	"""
+	pending = [ value ]
+
+	while pending:
+		value = pending.pop()
+
+		if isinstance( value, dict ):
+			if "position" in value:
+				value[ "position" ] = offset( value[ "position" ], delta )
+
+			pending.extend( value.itervalues() )
+
+		elif isinstance( value, (list, tuple) ):
+			pending.extend( value )
+
+
+
+def future( statements ):
+	"""
+	Returns the compiler flags of the __future__
+	imports among serialized statements.
+	"""
+	flags = 0
+
+	for statement in statements:
+		if statement.get( "type" ) == 'ImportFrom' and statement.get( "module" ) == '__future__':
+			for alias in statement.get( "names" ) or []:
+				flags |= getattr( getattr( __future__, alias[ "name" ], None ), 'compiler_flag', 0 )
+
+	return flags
+
+
+
+def declaration( lines ):
+	"""
+	Returns what declares the encoding of a source, its
+	byte order mark and the line of its coding cookie, as
+	text to go in front of a part of it compiled on its own,
+	so that the part decodes as the whole source does.
+	"""
+	bom = Source.BOM if lines and lines[ 0 ].startswith( Source.BOM ) else b''
+
+	for i, text in enumerate( lines[ :2 ] ):
+		text = text[ len( bom ): ] if i == 0 else text
+
+		if Source.COOKIE.match( text ):
+			return bom + text
+
+		if i == 0 and not Source.BLANK.match( text ):
+			break
+
+	return bom
+
+
+
+def line( statement ):
+	position = statement[ "position" ]
+	return position[ "line" ] if isinstance( position, dict ) else position
+
+
+
+class ASTIncrementalParser( ASTParser ):
+	"""
+	This module updates a previous parse result after
+	an edit, reparsing and reserializing only the top
+	level statements of the module that the edit touched.
+
+	The edit is described by the range of lines, first
+	to last inclusive, that were replaced in the previous
+	text, and by delta, the number of lines the edit
+	added minus the number it removed. The new text is
+	read from the file, or taken from source.
+
+	Each top level statement is taken to run from its
+	first line up to the line before the next statement.
+	The affected statements are cut out of the new text,
+	parsed on their own, and spliced into the previous
+	tree; the lines of the statements after them are
+	moved by delta. Whenever that is not safe, because
+	the edit reaches the first statement (and so maybe
+	the module docstring) or its __future__ imports, or
+	because the cut out text does not parse on its own,
+	or because the output has ranges, the whole file is
+	parsed again instead. The cut out text is compiled
+	with the __future__ imports of the module, and its
+	encoding declaration in front. After
+	reparse, incremental tells which of the two happened.
+	"""
+
+
+	def reparse( self, previous, first, last, delta ):
+		"""
+		Takes the previous result, as returned by parse()
+		or as a decoded envelope, and returns the updated
+		envelope as a dict. A decoded previous envelope is
+		updated in place.
+		"""
+		self.success = False
+		self.incremental = False
+
+		if isinstance( previous, basestring ):
+			previous = json.loads( previous )
+
+		error = self.read()
+
+		if error is not None:
+			return error
+
+		# ranges come from the tokens of the whole file
+		if not previous.get( "success" ) or self.ranges:
+			return self.evaluate()
+
+		body = previous[ "ast" ][ "body" ]
+		starts = [ line( statement ) for statement in body ]
+
+		if not body or first > last or first <= starts[ 0 ] or last < starts[ 0 ]:
+			return self.evaluate()
+
+		lo = self.locate_statement( starts, first )
+		hi = self.locate_statement( starts, last )
+
+		# the __future__ imports change how the rest of the module parses
+		if lo == 0 or future( body[ lo : hi + 1 ] ):
+			return self.evaluate()
+
+		lines = self.quote[ : ].splitlines( True )
+		start = starts[ lo ]
+
+		if hi + 1 < len( starts ):
+			end = starts[ hi + 1 ] - 1 + delta
+
+			if end < start - 1 or end > len( lines ):
+				return self.evaluate()
+
+		else:
+			end = len( lines )
+
+		header = declaration( lines )
+
+		try:
+			tree = compile( header + ''.join( lines[ start - 1 : end ] ), self.filepath, 'exec', ast.PyCF_ONLY_AST | future( body[ :lo ] ), True )
+
+		except (SyntaxError):
+			return self.evaluate()
+
+		if any( isinstance( statement, ast.ImportFrom ) and statement.module == '__future__' for statement in tree.body ):
+			return self.evaluate()
+
+		tree = self.project( tree )
+
+		ast.increment_lineno( tree, start - 1 - header.count( b'\n' ) )
+		statements = [ self.serialize( statement ) for statement in tree.body ]
+
+		if delta:
+			for statement in body[ hi + 1: ]:
+				shift( statement, delta )
+
+		body[ lo : hi + 1 ] = statements
+		previous[ "filepath" ] = self.filepath
+
+		self.incremental = True
+		self.success = True
+		return previous
+
+
+	def locate_statement( self, starts, line ):
+		"""
+		Returns the index of the statement whose span
+		holds the given line of the previous text.
+		"""
+		lo, hi = 0, len( starts ) - 1
+
+		while lo < hi:
+			middle = ( lo + hi + 1 ) // 2
+
+			if starts[ middle ] <= line:
+				lo = middle
+			else:
+				hi = middle - 1
+
+		return lo
@@ -0,0 +1,426 @@
+import ast
+import sys
+import json
+
+from Table import DISPATCH, FIELDS, OPERATORS, RAW, NODE, NODES, ATTR, VISIT, MAP, HAS_VISIT, HAS_MAP, ZIP, GUARD, LINE, ZERO, FALSE, DOCSTRING
+
+
+
+class Zipped:
+	"""
+	Stands in for the value of a Dict literal until both
+	its keys and its values have been serialized.
+	"""
+
+	__slots__ = ( 'keys', 'values' )
+
+	def __init__( self, keys, values ):
+		self.keys = keys
+		self.values = values
+
+
+
+def generate( name, spec ):
+	"""
+	Writes the source of the shell function for one node
+	class. A shell is the dict the ASTTableSerializer would
+	return, built with the same dict display, but with every
+	child left as None. Each child is pushed on the stack as
+	a ( container, key, node ) task that fills its slot later.
+	Filling an existing key does not change the layout of
+	a dict, so the result iterates in the same order.
+	"""
+	expr, kind, fields, position, docstring = spec
+	lines = [ 'def shell_%s( node, push ):' % name ]
+	entries = [ '"expr": %r' % expr, '"type": %r' % kind ]
+	after = []
+
+	for i, ( key, how, field ) in enumerate( fields ):
+		value = 'v%d' % i
+
+		if how == RAW:
+			lines.append( '\t%s = getattr( node, %r, None )' % ( value, field ) )
+
+		elif how == ATTR:
+			lines.append( '\t%s = node.%s' % ( value, field ) )
+
+		elif how == NODE:
+			lines.append( '\tc%d = getattr( node, %r, None )' % ( i, field ) )
+			lines.append( '\t%s = None' % value )
+			lines.append( '\tif c%d is not None:' % i )
+			lines.append( '\t\tleaf = leaves.get( c%d.__class__ )' % i )
+			lines.append( '\t\tif leaf is not None: %s = leaf( c%d ); c%d = None' % ( value, i, i ) )
+			after.append( '\tif c%d is not None: push( ( result, %r, c%d ) )' % ( i, key, i ) )
+
+		elif how == VISIT:
+			lines.append( '\tc%d = node.%s' % ( i, field ) )
+			lines.append( '\tleaf = leaves.get( c%d.__class__ )' % i )
+			lines.append( '\tif leaf is not None: %s = leaf( c%d ); c%d = MISSING' % ( value, i, i ) )
+			lines.append( '\telse: %s = None' % value )
+			after.append( '\tif c%d is not MISSING: push( ( result, %r, c%d ) )' % ( i, key, i ) )
+
+		elif how == HAS_VISIT:
+			lines.append( '\tc%d = node.%s if hasattr( node, %r ) else None' % ( i, field, field ) )
+			lines.append( '\t%s = None' % value )
+			after.append( '\tif hasattr( node, %r ): push( ( result, %r, c%d ) )' % ( field, key, i ) )
+
+		elif how in ( NODES, MAP, HAS_MAP ):
+			if how == NODES:
+				lines.append( '\tc%d = getattr( node, %r, None )' % ( i, field ) )
+				lines.append( '\t%s = [ None ] * len( c%d ) if c%d is not None else None' % ( value, i, i ) )
+			elif how == MAP:
+				lines.append( '\tc%d = node.%s' % ( i, field ) )
+				lines.append( '\t%s = [ None ] * len( c%d )' % ( value, i ) )
+			else:
+				lines.append( '\tc%d = node.%s if hasattr( node, %r ) else None' % ( i, field, field ) )
+				lines.append( '\t%s = [ None ] * len( c%d ) if c%d is not None else None' % ( value, i, i ) )
+
+			after.append( '\tif %s is not None:' % value )
+			after.append( '\t\tfor j, x in enumerate( c%d ):' % i )
+			after.append( '\t\t\tleaf = leaves.get( x.__class__ )' )
+			after.append( '\t\t\tif leaf is None: push( ( %s, j, x ) )' % value )
+			after.append( '\t\t\telse: %s[ j ] = leaf( x )' % value )
+
+		elif how == ZIP:
+			pair = []
+
+			for j, part in enumerate( field ):
+				item = 'c%d_%d' % ( i, j )
+				slots = '%s_%d' % ( value, j )
+				lines.append( '\t%s = getattr( node, %r, None )' % ( item, part ) )
+				lines.append( '\t%s = [ None ] * len( %s ) if %s is not None else None' % ( slots, item, item ) )
+				after.append( '\tif %s is not None:' % slots )
+				after.append( '\t\tfor j, x in enumerate( %s ): push( ( %s, j, x ) )' % ( item, slots ) )
+				pair.append( slots )
+
+			lines.append( '\t%s = None' % value )
+			after.insert( 0, '\tpush( ( result, %r, Zipped( %s ) ) )' % ( key, ', '.join( pair ) ) )
+
+		else:
+			raise ValueError( "unknown field kind %r for %s.%s" % ( how, name, key ) )
+
+		entries.append( '%r: %s' % ( key, value ) )
+
+	if position == GUARD:
+		entries.append( '"position": { "line": getattr( node, "lineno", None ) }' )
+	elif position == LINE:
+		entries.append( '"position": { "line": node.lineno }' )
+	elif position == ZERO:
+		entries.append( '"position": { "line": 0 }' )
+
+	if docstring == FALSE:
+		entries.append( '"docstring": False' )
+	elif docstring == DOCSTRING:
+		entries.append( '"docstring": get_docstring( node )' )
+
+	lines.append( '\tresult = { %s }' % ', '.join( entries ) )
+	lines.extend( after )
+	lines.append( '\treturn result' )
+	return '\n'.join( lines ) + '\n'
+
+
+# Children of these classes have no children of their own, so they are
+# serialized in place, through the ASTTableSerializer, instead of going
+# through the stack.
+
+LEAVES = dict(
+	( cls, serializer ) for cls, serializer in DISPATCH.iteritems()
+	if cls.__name__ in OPERATORS or all( how in ( RAW, ATTR ) for key, how, field in FIELDS[ cls.__name__ ][ 2 ] )
+)
+
+MISSING = object()
+
+
+def build():
+	"""
+	Compiles the shell functions for every node class in
+	the table, keyed by node class. Operators and Zipped
+	placeholders resolve to their value directly, and the
+	visitors left out of the table have shells written by
+	hand below. Any other class goes through generic().
+	"""
+	shells = {}
+	namespace = { 'get_docstring': ast.get_docstring, 'Zipped': Zipped, 'leaves': LEAVES, 'MISSING': MISSING }
+
+	for name, spec in FIELDS.iteritems():
+		cls = getattr( ast, name, None )
+
+		if cls is None:
+			continue
+
+		exec( compile( generate( name, spec ), "<Iterative %s>" % name, "exec" ), namespace )
+		shells[ cls ] = namespace[ 'shell_' + name ]
+
+	for name, symbol in OPERATORS.iteritems():
+		cls = getattr( ast, name, None )
+
+		if cls is not None:
+			shells[ cls ] = lambda node, push, symbol = symbol: symbol
+
+	shells[ Zipped ] = lambda node, push: zip( node.keys, node.values )
+	shells[ Rebuilt ] = rebuild
+	shells[ ast.Raise ] = shell_Raise
+	shells[ ast.Slice ] = shell_Slice
+
+	if hasattr( ast, 'withitem' ):
+		shells[ ast.withitem ] = shell_withitem
+
+	return shells
+
+
+# The visitors that are not in the table, written out as shells. Each
+# one reads its fields exactly as its visit_ method does, so the same
+# fields are serialized, and the same ones fail.
+
+def shell_Raise( node, push ):
+	# compares as visit_Raise does, so that it takes the same branch
+	if ( sys.version >= 3 ):
+		result = {
+			"expr": "Statement",
+			"type": "Raise",
+			"exc": None,
+			"cause": None,
+			"position": { 'line': node.lineno },
+			"docstring": False
+		}
+
+		for key, field in ( ( "exc", "exc" ), ( "cause", "body" ) ):
+			if getattr( node, field, None ) is not None:
+				push( ( result, key, getattr( node, field ) ) )
+
+		return result
+
+	result = {
+		"expr": "Statement",
+		"type": "Raise",
+		"excType": None,
+		"inst": None,
+		"tback": None,
+		"position": { 'line': node.lineno },
+		"docstring": False
+	}
+
+	push( ( result, "excType", node.type ) )
+	push( ( result, "inst", node.inst ) )
+	push( ( result, "tback", node.tback ) )
+	return result
+
+
+def shell_Slice( node, push ):
+	lower = node.lower
+	upper = hasattr( 'upper', node )
+	step = hasattr( 'step', node )
+	result = {
+		"expr": "Subscript",
+		"type": "Slice",
+		"lower": None,
+		"upper": None,
+		"step": None,
+		"position": { 'line': node.lineno },
+		"docstring": False
+	}
+
+	push( ( result, "lower", lower ) )
+
+	if upper:
+		push( ( result, "upper", node.upper ) )
+
+	if step:
+		push( ( result, "step", node.step ) )
+
+	return result
+
+
+def shell_withitem( node, push ):
+	result = {
+		"expr": "ControlFlow",
+		"type": "WithItem",
+		"context_expr": None,
+		"optional_vars": node.type if node.optional_vars is not None else None,
+		"position": { 'line': node.lineno },
+		"docstring": False
+	}
+
+	push( ( result, "context_expr", node.context_expr ) )
+
+	if result[ "optional_vars" ] is not None:
+		push( ( result, "optional_vars", result[ "optional_vars" ] ) )
+
+	return result
+
+
+
+class Rebuilt:
+	"""
+	Stands in for a node without a visitor until its
+	children have been serialized, as Zipped does for
+	the values of a Dict literal.
+	"""
+
+	__slots__ = ( 'node', 'fields' )
+
+	def __init__( self, node, fields ):
+		self.node = node
+		self.fields = fields
+
+
+def generic( container, key, node, push ):
+	"""
+	Serializes a node without a visitor the way the
+	ASTSerializer's generic_visit does: every child node is
+	serialized in place, in the node itself, which is then
+	the result. The children go on the stack above the
+	Rebuilt placeholder, which puts them back in the node
+	once they are all done.
+	"""
+	fields = []
+	children = []
+
+	for field, old in ast.iter_fields( node ):
+		if isinstance( old, list ):
+			slots = list( old )
+			children.extend( ( slots, j, x ) for j, x in enumerate( old ) if isinstance( x, ast.AST ) )
+			fields.append( ( field, old, slots ) )
+
+		elif isinstance( old, ast.AST ):
+			slots = [ None ]
+			children.append( ( slots, 0, old ) )
+			fields.append( ( field, old, slots ) )
+
+	push( ( container, key, Rebuilt( node, fields ) ) )
+	map( push, children )
+
+
+def rebuild( rebuilt, push ):
+	node = rebuilt.node
+
+	for field, old, slots in rebuilt.fields:
+		if isinstance( old, list ):
+			values = []
+
+			for value, new in zip( old, slots ):
+				if not isinstance( value, ast.AST ):
+					values.append( new )
+				elif new is None:
+					continue
+				elif not isinstance( new, ast.AST ):
+					values.extend( new )
+				else:
+					values.append( new )
+
+			old[ : ] = values
+
+		elif slots[ 0 ] is None:
+			delattr( node, field )
+
+		else:
+			setattr( node, field, slots[ 0 ] )
+
+	return node
+
+
+SHELLS = build()
+
+
+
+class ASTIterativeSerializer:
+	"""
+	The ASTIterativeSerializer produces the same output
+	as the ASTSerializer with an explicit stack of pending
+	children instead of recursion, so arbitrarily deep trees,
+	such as long chains of binary operators, serialize without
+	touching the recursion limit.
+	"""
+
+	def visit( self, node ):
+		root = [ None ]
+		stack = [ ( root, 0, node ) ]
+		pop = stack.pop
+		push = stack.append
+		shells = SHELLS
+
+		while stack:
+			container, key, node = pop()
+			shell = shells.get( node.__class__ )
+
+			if shell is None:
+				generic( container, key, node, push )
+			else:
+				container[ key ] = shell( node, push )
+
+		return root[ 0 ]
+
+
+
+def dumps( value, encoding = 'utf-8' ):
+	"""
+	Encodes a value exactly as json.dumps would with its
+	default settings, but with an explicit stack, so that it
+	does not fail on deeply nested values. It is slower than
+	json.dumps, which should be tried first.
+	"""
+	scalar = json.JSONEncoder( encoding = encoding ).encode
+	chunks = []
+	write = chunks.append
+	stack = [ value ]
+	pop = stack.pop
+	push = stack.append
+
+	while stack:
+		value = pop()
+
+		if value.__class__ is Token:
+			write( value.text )
+
+		elif isinstance( value, dict ):
+			if not value:
+				write( '{}' )
+				continue
+
+			write( '{' )
+			push( CLOSE_OBJECT )
+			items = value.items()
+
+			for i in xrange( len( items ) - 1, -1, -1 ):
+				key, item = items[ i ]
+				push( item )
+				push( Token( ( ', ' if i else '' ) + scalar( key ) + ': ' ) )
+
+		elif isinstance( value, (list, tuple) ):
+			if not value:
+				write( '[]' )
+				continue
+
+			write( '[' )
+			push( CLOSE_ARRAY )
+
+			for i in xrange( len( value ) - 1, -1, -1 ):
+				push( value[ i ] )
+
+				if i:
+					push( SEPARATOR )
+
+		elif value is None or isinstance( value, (basestring, bool, int, long, float) ):
+			write( scalar( value ) )
+
+		else:
+			raise TypeError( repr( value ) + " is not JSON serializable" )
+
+	return ''.join( chunks )
+
+
+
+class Token:
+	"""
+	Literal json text queued on the dumps stack.
+	"""
+
+	__slots__ = ( 'text', )
+
+	def __init__( self, text ):
+		self.text = text
+
+
+SEPARATOR = Token( ', ' )
+CLOSE_OBJECT = Token( '}' )
+CLOSE_ARRAY = Token( ']' )
@@ -0,0 +1,103 @@
+from Serializer import ASTSerializer
+from Table import FIELDS, DOCSTRING, NONE, build
+
+
+# The lean profile differs from the full one in two ways only:
+#
+#	"position": { "line": n }	becomes		"position": n
+#	"docstring": False			is left out
+#	"docstring": None			is left out (definitions without a docstring)
+#
+# So, to map a lean node back to the full profile, wrap its position, if
+# it has one, in { "line": ... }, and if it has no docstring, give it
+#
+#	None		if its type is in DOCUMENTED ( FunctionDef, ClassDef, Module )
+#	nothing		if its type is in UNDOCUMENTED ( Number )
+#	False		otherwise
+#
+# which is what expand() does. Nodes are the dicts with "expr" and "type".
+
+DOCUMENTED = frozenset( spec[ 1 ] for spec in FIELDS.itervalues() if spec[ 4 ] == DOCSTRING )
+UNDOCUMENTED = frozenset( spec[ 1 ] for spec in FIELDS.itervalues() if spec[ 4 ] is NONE )
+
+
+
+def nodes( value ):
+	"""
+	Yields every node in a serialized tree.
+	"""
+	pending = [ value ]
+
+	while pending:
+		value = pending.pop()
+
+		if isinstance( value, dict ):
+			if "expr" in value and "type" in value:
+				yield value
+
+			pending.extend( value.itervalues() )
+
+		elif isinstance( value, (list, tuple) ):
+			pending.extend( value )
+
+
+def reduce( value ):
+	"""
+	Rewrites a full profile tree as a lean one, in place.
+	"""
+	for node in nodes( value ):
+		position = node.get( "position" )
+
+		if isinstance( position, dict ) and len( position ) == 1 and "line" in position:
+			node[ "position" ] = position[ "line" ]
+
+		if "docstring" in node:
+			docstring = node[ "docstring" ]
+
+			if docstring is False or ( docstring is None and node[ "type" ] in DOCUMENTED ):
+				del node[ "docstring" ]
+
+	return value
+
+
+def expand( value ):
+	"""
+	Rewrites a lean profile tree as a full one, in place.
+	The result is equal to the full profile output, but
+	its keys may be encoded in a different order.
+	"""
+	for node in nodes( value ):
+		if "position" in node and not isinstance( node[ "position" ], dict ):
+			node[ "position" ] = { "line": node[ "position" ] }
+
+		if "docstring" not in node:
+			kind = node[ "type" ]
+
+			if kind in DOCUMENTED:
+				node[ "docstring" ] = None
+			elif kind not in UNDOCUMENTED:
+				node[ "docstring" ] = False
+
+	return value
+
+
+def fallback( node ):
+	return reduce( ASTSerializer().visit( node ) )
+
+
+DISPATCH = build( lean = True, fallback = fallback )
+
+
+
+class ASTLeanSerializer:
+	"""
+	The ASTLeanSerializer produces the lean profile: the
+	output of the ASTTableSerializer without default valued
+	docstrings and with positions flattened to their line,
+	which saves a dict per node and a good share of the
+	json. See the top of this module for the mapping back
+	to the full profile.
+	"""
+
+	def visit( self, node ):
+		return DISPATCH[ node.__class__ ]( node )
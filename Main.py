@@ -1,20 +1,235 @@
-import sys, getopt, json
+import os, sys, getopt, json
 from Parser import ASTParser
+from Diff import ASTDiffParser
+from Query import ASTQueryParser, ASTQuery
+from Batch import ASTBatch
+from Cache import ASTCache
+from Service import ASTService
+from Pipe import ASTPipe
+from Daemon import ASTDaemon
+from Stats import ASTStats
+from Memo import ASTMemo
+from Symbols import ASTSymbols
+from Watch import ASTWatch
+import Binary
+import Compression
 
 
-def parse( filepath ):
-	print ASTParser( filepath ).parse()
+SHORT = { '-p': '--parse', '-b': '--batch', '-s': '--serve', '-j': '--jobs', '-o': '--output', '-c': '--cache', '-f': '--format' }
+
+CACHING = ( '--cache', '--cache-size' )
+OUTPUT = ( '--format', '--profile', '--outline', '--check', '--memo', '--memo-size', '--ranges', '--query', '--compress', '--level' )
+
+# the options each mode takes besides its own; the mode of a
+# command line is the one of these it names, or --parse
+MODES = {
+	'--parse': CACHING + OUTPUT + ( '--stream', '--diff', '--stats' ),
+	'--batch': CACHING + OUTPUT + ( '--jobs', '--output', '--stats' ),
+	'--watch': CACHING + OUTPUT + ( '--jobs', '--output', '--poll' ),
+	'--pipe': CACHING + ( '--jobs', '--profile', '--outline' ),
+	'--daemon': CACHING + ( '--jobs', '--profile', '--outline' ),
+	'--serve': ( '--jobs', '--level', '--root' ),
+	'--index': ( '--batch', '--jobs', '--symbol', '--importers' ),
+}
+
+
+def parse( filepath, cache, stream = False, format = 'json', profile = 'full', outline = False, counters = None, check = False, previous = None, memo = None, ranges = False, query = None, compression = None, level = Compression.LEVEL ):
+	stats = ASTStats() if counters else None
+	parser = ( ASTQueryParser if query is not None else ASTParser if previous is None else ASTDiffParser )( filepath, cache = cache, profile = profile, outline = outline, stats = stats, memo = memo, ranges = ranges )
+	out = Compression.ASTCompressor( sys.stdout, compression, level ) if compression is not None else sys.stdout
+
+	if check:
+		out.write( parser.check() + "\n" )
+	elif query is not None:
+		out.write( parser.query( query ) + "\n" )
+	elif previous is not None:
+		out.write( parser.diff( earlier( previous, cache, profile, outline, ranges ) ) + "\n" )
+	elif format == 'binary':
+		out.write( Binary.encode( parser.result(), parser.encoding ) )
+	elif format == 'columns':
+		out.write( parser.columns() )
+	elif format == 'shards':
+		out.write( parser.shards() )
+	elif stream:
+		parser.dump( out )
+		out.write( "\n" )
+	else:
+		out.write( parser.parse() + "\n" )
+
+	if compression is not None:
+		out.close()
+		sys.stderr.write( out.report() + "\n" )
+
+	if cache is not None:
+		sys.stderr.write( cache.report() + "\n" )
+
+	if memo is not None:
+		sys.stderr.write( memo.report() + "\n" )
+
+	report( stats, counters )
+	return parser.success
+
+def batch( patterns, jobs, output, cache, format = 'json', profile = 'full', outline = False, counters = None, check = False, memo = None, ranges = False, query = None, compression = None, level = Compression.LEVEL ):
+	stats = ASTStats() if counters else None
+	runner = ASTBatch( patterns, jobs = jobs, output = output, cache = cache, format = format, profile = profile, outline = outline, stats = stats, check = check, memo = memo, ranges = ranges, query = query, compression = compression, level = level )
+	out = Compression.ASTCompressor( sys.stdout, compression, level ) if compression is not None and output is None else sys.stdout
+	runner.run( out )
+	sys.stderr.write( "parsed %d files, %d failed\n" % ( runner.parsed, runner.failed ) )
+
+	if compression is not None and output is None:
+		out.close()
+		sys.stderr.write( out.report() + "\n" )
+	elif compression is not None:
+		sys.stderr.write( "compressed %d bytes to %d (%.1fx)\n" % ( runner.size, runner.written, float( runner.size ) / runner.written if runner.written else 0.0 ) )
+
+	if cache is not None:
+		sys.stderr.write( cache.report() + "\n" )
+
+	if memo is not None:
+		sys.stderr.write( memo.report() + "\n" )
+
+	report( stats, counters )
+	return runner.failed == 0
+
+def watch( root, jobs, output, cache, format = 'json', profile = 'full', outline = False, check = False, memo = None, ranges = False, query = None, compression = None, level = Compression.LEVEL, interval = None ):
+	runner = ASTBatch( [], jobs = jobs, output = output, cache = cache, format = format, profile = profile, outline = outline, check = check, memo = memo, ranges = ranges, query = query, compression = compression, level = level )
+	watcher = ASTWatch( root, runner, interval = interval or 1.0, notify = interval is None )
+	watcher.run( sys.stdout, sys.stderr )
+	sys.stderr.write( "watched %d added, %d modified, %d removed\n" % ( watcher.added, watcher.modified, watcher.removed ) )
+
+def earlier( filepath, cache, profile = 'full', outline = False, ranges = False ):
+	"""
+	Returns the ast to diff against: filepath holds either
+	an envelope a previous parse printed, or a source, which
+	is parsed with the same options.
+	"""
+	try:
+		with open( filepath, 'rb' ) as f:
+			envelope = json.load( f )
+
+		if isinstance( envelope, dict ) and "ast" in envelope:
+			return envelope[ "ast" ]
+
+	except (ValueError, RuntimeError, IOError):
+		pass
+
+	result = ASTParser( filepath, cache = cache, profile = profile, outline = outline, ranges = ranges ).result()
+
+	if "ast" not in result:
+		sys.stderr.write( "%s: %s\n" % ( filepath, result[ "message" ] ) )
+		sys.exit( 1 )
+
+	return result[ "ast" ]
+
+def report( stats, counters ):
+	if stats is not None:
+		sys.stderr.write( ( stats.dump() if counters == 'json' else stats.table() ) + "\n" )
+
+def pipe( jobs, cache, profile = 'full', outline = False ):
+	runner = ASTPipe( jobs = jobs, cache = cache, profile = profile, outline = outline )
+	runner.run( sys.stdin, sys.stdout )
+	sys.stderr.write( "parsed %d sources, %d failed\n" % ( runner.parsed, runner.failed ) )
+
+	if cache is not None:
+		sys.stderr.write( cache.report() + "\n" )
+
+def daemon( jobs, cache, profile = 'full', outline = False ):
+	ASTDaemon( jobs = jobs, cache = cache, profile = profile, outline = outline ).run( sys.stdin, sys.stdout )
+
+def index( directory, patterns, jobs, names, modules ):
+	symbols = ASTSymbols( directory, jobs = jobs )
+
+	if patterns:
+		symbols.update( patterns )
+		sys.stderr.write( symbols.report() + "\n" )
+
+	for name in names:
+		for record in symbols.definitions( name ):
+			print json.dumps( record )
+
+	for module in modules:
+		for record in symbols.importers( module ):
+			print json.dumps( record )
+
+def serve( address, jobs, level = Compression.LEVEL, root = None ):
+	host, _, port = address.rpartition( ':' )
+	ASTService( jobs = jobs, level = level, root = root ).serve( host or '127.0.0.1', int( port ) )
+
+def usage( helpstring, message = None ):
+	if message is not None:
+		sys.stderr.write( "%s\n" % message )
+
+	print helpstring
+	sys.exit( 2 )
+
+def mode( opts, helpstring ):
+	"""
+	Returns the mode of a command line, after checking
+	that it names one at most, and that every other
+	option it has is one the mode takes.
+	"""
+	given = set( SHORT.get( opt, opt ) for opt, arg in opts )
+	named = [ name for name in MODES if name in given ]
+
+	# -b names the files of --index, rather than a mode of its own
+	modes = sorted( name for name in named if not any( name in MODES[ other ] for other in named ) )
+
+	if len( modes ) > 1:
+		usage( helpstring, "%s cannot be combined" % ' and '.join( modes ) )
+
+	name = modes[ 0 ] if modes else '--parse'
+	unsupported = sorted( given - set( MODES[ name ] ) - set( [ name ] ) )
+
+	if unsupported:
+		usage( helpstring, "%s: not supported with %s" % ( ', '.join( unsupported ), name ) )
+
+	return name
 
 def main( argv ):
-	helpstring = argv[ 0 ] + " {-p|--parse} <input filepath>"
+	helpstring = argv[ 0 ] + " {-p|--parse} <input filepath> [--stream | --diff <previous filepath or result>]\n" + \
+		argv[ 0 ] + " {-b|--batch} <file|directory|glob> [-b ...] [{-j|--jobs} <n>] [{-o|--output} <directory>]\n" + \
+		argv[ 0 ] + " {-s|--serve} [<host>:]<port> [{-j|--jobs} <n>] [--root <directory>]\n" + \
+		argv[ 0 ] + " --pipe [{-j|--jobs} <n>] < records.ndjson\n" + \
+		argv[ 0 ] + " --daemon [{-j|--jobs} <n>]\n" + \
+		argv[ 0 ] + " --watch <directory> [--poll <seconds>] [{-j|--jobs} <n>] [{-o|--output} <directory>]\n" + \
+		argv[ 0 ] + " --index <directory> [-b <file|directory|glob> ...] [{-j|--jobs} <n>] [--symbol <name> ...] [--importers <module> ...]\n" + \
+		"options: [{-c|--cache} <directory> [--cache-size <megabytes>]] [{-f|--format} json|binary|columns|shards] [--profile full|lean] [--outline] [--stats table|json] [--check] [--memo <directory> [--memo-size <megabytes>]] [--ranges] [--query <query>] [--compress gzip [--level <0-9>]]"
 	filepath = ''
+	patterns = []
+	jobs = None
+	output = None
+	cachedir = None
+	cachesize = 256
+	stream = False
+	address = None
+	format = 'json'
+	profile = 'full'
+	outline = False
+	ranges = False
+	counters = None
+	piped = False
+	daemonized = False
+	check = False
+	previous = None
+	memodir = None
+	memosize = 256
+	indexdir = None
+	names = []
+	modules = []
+	query = None
+	compression = None
+	level = Compression.LEVEL
+	leveled = False
+	root = None
+	interval = None
+	served = None
 
 	if len( argv ) == 1:
 		print helpstring
-		sys.exit( 2 ) 
+		sys.exit( 2 )
 
 	try:
-		opts, args = getopt.getopt( argv[ 1: ], "hp:", ['parse='])
+		opts, args = getopt.getopt( argv[ 1: ], "hp:b:j:o:c:s:f:", ['parse=', 'batch=', 'serve=', 'jobs=', 'output=', 'cache=', 'cache-size=', 'stream', 'format=', 'profile=', 'outline', 'stats=', 'pipe', 'daemon', 'check', 'diff=', 'memo=', 'memo-size=', 'ranges', 'index=', 'symbol=', 'importers=', 'query=', 'compress=', 'level=', 'watch=', 'poll=', 'root='])
 
 	except getopt.GetoptError:
 		print helpstring
@@ -28,9 +243,175 @@ def main( argv ):
 		elif opt in ('-p', '--parse'):
 			filepath = arg
 
-	parse( filepath )
+		elif opt in ('-b', '--batch'):
+			patterns.append( arg )
+
+		elif opt in ('-s', '--serve'):
+			address = arg
+
+		elif opt in ('-j', '--jobs'):
+			try:
+				jobs = int( arg )
+			except ValueError:
+				print helpstring
+				sys.exit( 2 )
+
+		elif opt in ('-o', '--output'):
+			output = arg
+
+		elif opt in ('-c', '--cache'):
+			cachedir = arg
+
+		elif opt == '--cache-size':
+			try:
+				cachesize = int( arg )
+			except ValueError:
+				print helpstring
+				sys.exit( 2 )
+
+		elif opt == '--stream':
+			stream = True
+
+		elif opt in ('-f', '--format'):
+			format = arg
+
+		elif opt == '--profile':
+			profile = arg
+
+		elif opt == '--outline':
+			outline = True
+
+		elif opt == '--ranges':
+			ranges = True
+
+		elif opt == '--stats':
+			counters = arg
+
+		elif opt == '--pipe':
+			piped = True
+
+		elif opt == '--daemon':
+			daemonized = True
+
+		elif opt == '--check':
+			check = True
+
+		elif opt == '--diff':
+			previous = arg
+
+		elif opt == '--memo':
+			memodir = arg
+
+		elif opt == '--memo-size':
+			try:
+				memosize = int( arg )
+			except ValueError:
+				print helpstring
+				sys.exit( 2 )
+
+		elif opt == '--index':
+			indexdir = arg
+
+		elif opt == '--symbol':
+			names.append( arg )
+
+		elif opt == '--importers':
+			modules.append( arg )
+
+		elif opt == '--query':
+			query = arg
+
+		elif opt == '--compress':
+			compression = arg
+
+		elif opt == '--level':
+			leveled = True
+
+			try:
+				level = int( arg )
+			except ValueError:
+				print helpstring
+				sys.exit( 2 )
+
+		elif opt == '--watch':
+			root = arg
+
+		elif opt == '--root':
+			served = arg
+
+		elif opt == '--poll':
+			try:
+				interval = float( arg )
+			except ValueError:
+				print helpstring
+				sys.exit( 2 )
+
+	selected = mode( opts, helpstring )
+
+	for failed, message in (
+		( profile not in ( 'full', 'lean' ), "--profile is full or lean" ),
+		( format not in ( 'json', 'binary', 'columns', 'shards' ), "--format is json, binary, columns or shards" ),
+		( format != 'json' and selected in ( '--batch', '--watch' ) and output is None, "-f %s with %s needs -o" % ( format, selected ) ),
+		( counters not in ( None, 'table', 'json' ), "--stats is table or json" ),
+		( counters and stream, "--stats cannot be combined with --stream" ),
+		( check and ( format != 'json' or stream ), "--check cannot be combined with -f or --stream" ),
+		( previous is not None and ( format != 'json' or stream or check ), "--diff cannot be combined with -f, --stream or --check" ),
+		( ranges and format == 'columns', "--ranges cannot be combined with -f columns" ),
+		( query is not None and ( format != 'json' or stream or check or previous is not None ), "--query cannot be combined with -f, --stream, --check or --diff" ),
+		( compression not in ( None, ) + Compression.METHODS, "--compress is %s" % ' or '.join( Compression.METHODS ) ),
+		( not 0 <= level <= 9, "--level is 0 to 9" ),
+		( leveled and compression is None and selected != '--serve', "--level needs --compress" ),
+		( selected == '--watch' and compression is not None and output is None, "--compress with --watch needs -o" ),
+		( selected == '--watch' and not os.path.isdir( root ), "%s is not a directory" % root ),
+		( interval is not None and interval <= 0, "--poll is a number of seconds above 0" ),
+		( served is not None and not os.path.isdir( served ), "%s is not a directory" % served ),
+	):
+		if failed:
+			usage( helpstring, message )
+
+	if query is not None:
+		try:
+			ASTQuery( query )
+		except ValueError as e:
+			sys.stderr.write( "%s\n" % e )
+			sys.exit( 2 )
+
+	cache = ASTCache( cachedir, cachesize * 1024 * 1024, level if compression is not None else None ) if cachedir else None
+	memo = ASTMemo( memodir, memosize * 1024 * 1024 ) if memodir else None
+
+	if address is not None:
+		try:
+			serve( address, jobs, level, served )
+		except ValueError:
+			print helpstring
+			sys.exit( 2 )
+
+	elif root is not None:
+		watch( root, jobs, output, cache, format, profile, outline, check, memo, ranges, query, compression, level, interval )
+
+	elif indexdir is not None:
+		index( indexdir, patterns, jobs, names, modules )
+
+	elif daemonized:
+		daemon( jobs, cache, profile, outline )
+
+	elif piped:
+		pipe( jobs, cache, profile, outline )
+
+	elif patterns:
+		success = batch( patterns, jobs, output, cache, format, profile, outline, counters, check, memo, ranges, query, compression, level )
+
+		if check and not success:
+			sys.exit( 1 )
+
+	else:
+		success = parse( filepath, cache, stream, format, profile, outline, counters, check, previous, memo, ranges, query, compression, level )
+
+		if ( check or previous is not None ) and not success:
+			sys.exit( 1 )
+
 	sys.exit()
 
 
 if __name__ == "__main__":
-	main( sys.argv )
\ No newline at end of file
+	main( sys.argv )
@@ -0,0 +1,290 @@
+import os
+import re
+import ast
+import json
+import time
+import hashlib
+import collections
+
+from Cache import ASTCache
+from Table import build
+import Lean
+
+
+# The subtrees memoized: their json, given the options and the encoding,
+# is a function of their source text alone, which is hashed in place of
+# the subtree itself.
+UNITS = ( 'visit_FunctionDef', 'visit_ClassDef', 'visit_AsyncFunctionDef' )
+DEFINITIONS = tuple( getattr( ast, name[ len( 'visit_' ): ] ) for name in UNITS if hasattr( ast, name[ len( 'visit_' ): ] ) )
+
+# The statements with bodies, which definitions can be nested in.
+COMPOUND = DEFINITIONS + tuple( getattr( ast, name ) for name in ( 'If', 'For', 'AsyncFor', 'While', 'With', 'AsyncWith', 'Try', 'TryExcept', 'TryFinally' ) if hasattr( ast, name ) )
+
+# A line in either profile: "position": {"line": 12}, or "position": 12
+POSITION = re.compile( r'("position": (?:\{"line": )?)(\d+)' )
+
+
+
+def futures( tree ):
+	"""
+	Returns the __future__ features a module imports,
+	some of which change how the rest of it parses.
+	"""
+	names = set()
+
+	for statement in tree.body:
+		if isinstance( statement, ast.ImportFrom ) and statement.module == '__future__':
+			names.update( alias.name for alias in statement.names )
+
+	return ','.join( sorted( names ) )
+
+
+def move( text, delta ):
+	"""
+	Moves every line in the json of a subtree by delta.
+	"""
+	if not delta:
+		return text
+
+	return POSITION.sub( lambda match: match.group( 1 ) + str( int( match.group( 2 ) ) + delta ), text )
+
+
+
+class ASTMemo:
+	"""
+	This module memoizes the json of function and class
+	definitions, so that definitions seen before, in this
+	file, another file or, with a directory, an earlier run,
+	are not serialized again. A definition is looked up by a
+	hash of the lines of source it spans (up to the next
+	statement), together with the options, the encoding and
+	the __future__ imports of its module, which is cheaper
+	than hashing its subtree and identifies it as well: the
+	same text, in the same context, gives the same subtree.
+	The json is stored along with the line it started on,
+	and moved to the line the definition is found on.
+
+	Entries are kept in memory, up to memory bytes, evicting
+	the least recently used, and with a directory, also in
+	an ASTCache of limit bytes there, which processes share.
+	Every hit adds the time the definition took to serialize,
+	less the time spent reusing it, to saved, and the time
+	spent hashing definitions is taken off it.
+	"""
+
+
+	def __init__( self, directory = None, limit = 256 * 1024 * 1024, memory = 64 * 1024 * 1024 ):
+		self.directory = directory
+		self.limit = limit
+		self.memory = memory
+		self.store = ASTCache( directory, limit ) if directory is not None else None
+		self.entries = collections.OrderedDict()
+		self.size = 0
+		self.hits = 0
+		self.misses = 0
+		self.saved = 0.0
+		self.dispatches = {}
+		self.spans = {}
+		self.texts = []
+
+		# placeholders for memoized json in the tree handed to json.dumps
+		self.token = '\0memo-%s-' % os.urandom( 8 ).encode( 'hex' )
+		self.placeholder = re.compile( re.escape( json.dumps( self.token )[ :-1 ] ) + r'(\d+)"' )
+
+
+	def encode( self, parser, tree ):
+		"""
+		Returns the json text of a tree, as parser.encode(
+		parser.serialize( tree ) ) would, reusing whatever
+		definitions in it have been memoized.
+		"""
+		quote = parser.quote[ : ]
+		lean = parser.profile == 'lean'
+
+		# a lone carriage return ends a line for the parser, not for offsets
+		if quote.count( b'\r' ) != quote.count( b'\r\n' ):
+			return parser.encode( parser.serialize( tree ) )
+
+		# hashing is paid whether anything is reused or not
+		start = time.time()
+		self.spans = self.locate( tree, quote, '%s\0%s\0%s' % ( parser.variant(), parser.encoding, futures( tree ) ) )
+		self.saved -= time.time() - start
+		self.texts = []
+		self.encoding = parser.encoding
+
+		try:
+			dispatch = self.dispatches.get( lean )
+
+			if dispatch is None:
+				dispatch = self.dispatches[ lean ] = build( lean, Lean.fallback if lean else None, self.wrap )
+
+			serialized = dispatch[ tree.__class__ ]( tree )
+
+		except (RuntimeError):
+			return parser.encode( parser.serialize( tree ) )
+
+		finally:
+			self.spans = {}
+
+		return self.expand( parser.encode( serialized ) )
+
+
+	def locate( self, tree, quote, context ):
+		"""
+		Returns the key and first line of every definition
+		in the tree, by id. A definition spans the lines up
+		to the next statement in the same body, or up to the
+		end of the statement holding it. Definitions nested
+		in functions are left to the function holding them.
+		"""
+		lines = quote.split( b'\n' )
+		spans = {}
+		pending = [ ( tree.body, len( lines ) ) ]
+
+		while pending:
+			body, end = pending.pop()
+
+			for i, statement in enumerate( body ):
+				if not isinstance( statement, COMPOUND ):
+					continue
+
+				first = statement.lineno
+				last = body[ i + 1 ].lineno - 1 if i + 1 < len( body ) else end
+
+				if isinstance( statement, DEFINITIONS ) and first <= last <= len( lines ):
+					spans[ id( statement ) ] = ( self.key( b'\n'.join( lines[ first - 1 : last ] ), context ), first )
+
+					if not isinstance( statement, ast.ClassDef ):
+						continue
+
+				for field in ( 'body', 'orelse', 'finalbody' ):
+					nested = getattr( statement, field, None )
+
+					if isinstance( nested, list ):
+						pending.append( ( nested, last ) )
+
+				for handler in getattr( statement, 'handlers', None ) or ():
+					pending.append( ( handler.body, last ) )
+
+		return spans
+
+
+	def key( self, text, context ):
+		if self.store is not None:
+			return self.store.key( text, context )
+
+		return hashlib.sha1( context + b'\0' + text ).hexdigest()
+
+
+	def wrap( self, name, function ):
+		"""
+		Memoizes the serializer functions of definitions
+		(see Table.build); a definition serializes to a
+		placeholder for its json, put in by expand().
+		"""
+		if name not in UNITS:
+			return function
+
+		clock = time.time
+
+		def memoized( node ):
+			span = self.spans.get( id( node ) )
+
+			if span is None:
+				return function( node )
+
+			key, line = span
+			start = clock()
+			entry = self.get( key )
+
+			if entry is not None:
+				base, cost, text = entry
+				text = move( text, line - base )
+				self.hits += 1
+				self.saved += cost - ( clock() - start )
+				return self.hold( text )
+
+			self.misses += 1
+			start = clock()
+			serialized = function( node )
+
+			try:
+				text = self.expand( json.dumps( serialized, encoding = self.encoding ) )
+
+			except (TypeError, ValueError, UnicodeError, RuntimeError):
+				# fails again, or not, in json.dumps of the whole tree
+				return serialized
+
+			self.put( key, ( line, clock() - start, text ) )
+			return self.hold( text )
+
+		return memoized
+
+
+	def hold( self, text ):
+		self.texts.append( text )
+		return self.token + str( len( self.texts ) - 1 )
+
+
+	def expand( self, text ):
+		if not self.texts:
+			return text
+
+		return self.placeholder.sub( lambda match: self.texts[ int( match.group( 1 ) ) ], text )
+
+
+	def get( self, key ):
+		entry = self.entries.pop( key, None )
+
+		if entry is None and self.store is not None:
+			stored = self.store.get( key )
+
+			if stored is not None:
+				line, cost, text = stored.split( '\n', 2 )
+				entry = ( int( line ), float( cost ), text )
+				self.size += len( text )
+
+		if entry is not None:
+			self.entries[ key ] = entry
+			self.evict()
+
+		return entry
+
+
+	def put( self, key, entry ):
+		line, cost, text = entry
+		self.entries[ key ] = entry
+		self.size += len( text )
+		self.evict()
+
+		if self.store is not None:
+			self.store.put( key, '%d\n%r\n%s' % ( line, cost, text ) )
+
+
+	def evict( self ):
+		while self.size > self.memory and self.entries:
+			key, ( line, cost, text ) = self.entries.popitem( last = False )
+			self.size -= len( text )
+
+
+	def reset( self ):
+		"""
+		Clears the counts, and returns what they were.
+		"""
+		counts = ( self.hits, self.misses, self.saved )
+		self.hits = self.misses = 0
+		self.saved = 0.0
+		return counts
+
+
+	def merge( self, counts ):
+		hits, misses, saved = counts
+		self.hits += hits
+		self.misses += misses
+		self.saved += saved
+
+
+	def report( self ):
+		total = self.hits + self.misses
+		rate = 100.0 * self.hits / total if total else 0.0
+		return "memo: %d hits, %d misses (%.1f%%), %.1f ms saved" % ( self.hits, self.misses, rate, self.saved * 1000 )
@@ -0,0 +1,45 @@
+import ast
+
+
+# The statements kept in the body of a module or a class. Function
+# bodies keep their docstring only.
+OUTLINE = tuple( getattr( ast, name ) for name in ( 'Import', 'ImportFrom', 'ClassDef', 'FunctionDef', 'AsyncFunctionDef' ) if hasattr( ast, name ) )
+
+
+
+def docstring( body ):
+	"""
+	Returns the docstring statement a body starts
+	with, as a list of zero or one statements.
+	"""
+	if body and isinstance( body[ 0 ], ast.Expr ) and isinstance( body[ 0 ].value, ast.Str ):
+		return body[ :1 ]
+
+	return []
+
+
+def copy( node, body ):
+	pruned = node.__class__()
+	pruned.__dict__.update( node.__dict__ )
+	pruned.body = body
+	return pruned
+
+
+def prune( node ):
+	"""
+	Returns the outline of a tree: the module docstring,
+	imports, classes and functions with their names, args,
+	decorators and docstrings, and within classes, the same
+	again. Everything else in module and class bodies, and
+	every statement of a function body but its docstring,
+	is cut away before anything is serialized. Pruned
+	nodes are shallow copies; the tree is not modified.
+	"""
+	if isinstance( node, (ast.Module, ast.ClassDef) ):
+		head = docstring( node.body )
+		return copy( node, head + [ prune( statement ) for statement in node.body[ len( head ): ] if isinstance( statement, OUTLINE ) ] )
+
+	if isinstance( node, OUTLINE ) and hasattr( node, 'body' ):
+		return copy( node, docstring( node.body ) )
+
+	return node
@@ -1,9 +1,18 @@
-
 import os
 import ast
 import json
 
-from Serializer import ASTSerializer
+from Stream import ASTStreamSerializer, Recorder
+from Table import ASTTableSerializer
+from Iterative import ASTIterativeSerializer
+import Iterative
+from Lean import ASTLeanSerializer, reduce
+from Columnar import ASTColumns
+import Columnar
+from Outline import prune, docstring
+import Source
+import Ranges
+import Shards
 
 
 
@@ -12,54 +21,419 @@ class ASTParser:
 	This module reads a file into memory and 
 	parses it as a python AST. Following that,
 	it transforms the AST into a JSON representation.
+
+	If an ASTCache is supplied, the serialized AST
+	is looked up by the content of the file before
+	anything is parsed. If source is supplied, it is
+	parsed in place of the file's contents, and the
+	filepath is only reported. Files are read as bytes
+	(see Source.py), and strings are decoded for the
+	json as the source declares. profile selects the
+	'full' output, or the 'lean' one described in Lean.py.
+	With outline, function bodies and every statement
+	that is not a definition or an import are pruned
+	before serialization (see Outline.py). If an ASTStats
+	is supplied, serialization is counted into it. If
+	an ASTMemo is supplied, the json of definitions seen
+	before is reused (see Memo.py). With ranges, every
+	position also carries the column the node starts at
+	and the line and column it ends at, and the envelope
+	carries the offset of every line (see Ranges.py).
 	"""
 
 
-	def __init__( self, filepath ):
+	def __init__( self, filepath, cache = None, source = None, profile = 'full', outline = False, stats = None, memo = None, ranges = False ):
 		self.filepath = filepath
+		self.source = source
+		self.profile = profile
+		self.outline = outline
+		self.ranges = ranges
+		self.stats = stats
+		self.memo = memo
+		self.encoding = 'utf-8'
+		self.cache = cache
+		self.cached = None
+		self.success = False
 
 
 	def parse( self ):
+		self.success = False
+
+		error = self.read()
+
+		if error is not None:
+			return json.dumps( error )
+
+		if self.cache is not None:
+			key = self.cache.key( self.quote, self.variant() )
+			serialized = self.cache.get( key )
+			self.cached = serialized is not None
+
+			if self.cached:
+				return self.compose( serialized )
+
 		try:
-			f = open( self.filepath, 'r' )
-			self.quote = f.read()
-			f.close()
 
-		except (OSError, IOError) as e:
+			tree = self.tree()
 
-			return json.dumps({
-				"success": False,
-				"message": os.strerror( e.errno ),
-				"errno": e.errno,
-				"filepath": self.filepath
-			});
+		except (SyntaxError) as e:
+
+			return json.dumps( self.syntax_error( e ) )
+
+		if self.memo is not None and self.stats is None and not self.ranges:
+			serialized = self.memo.encode( self, tree )
+		else:
+			serialized = self.encode( self.serialize( tree ) )
+
+		if self.cache is not None:
+			self.cache.put( key, serialized )
+
+		return self.compose( serialized )
+
+
+	def check( self ):
+		"""
+		Returns the envelope parse() would, less the ast:
+		the source is parsed, which finds every syntax error,
+		but nothing is serialized.
+		"""
+		self.success = False
+
+		error = self.read()
+
+		if error is not None:
+			return json.dumps( error )
 
 		try:
+			ast.parse( self.quote )
+
+		except (SyntaxError) as e:
+			return json.dumps( self.syntax_error( e ) )
+
+		self.success = True
+
+		return json.dumps({
+			"success": True,
+			"message": None,
+			"filepath": self.filepath
+		})
+
+
+	def dump( self, out ):
+		"""
+		Writes the same output as parse() to a file-like
+		object, streaming the AST as it is walked rather
+		than building it in memory first. Only the full
+		profile, without ranges, can be streamed; other
+		output is built in memory and then written. With a
+		cache, a copy of the streamed AST is kept to store.
+		"""
+		if self.profile != 'full' or self.ranges:
+			out.write( self.parse() )
+			return
+
+		self.success = False
+
+		error = self.read()
 
-			serialized = self.serialize( ast.parse( self.quote ) )
+		if error is None:
+			if self.cache is not None:
+				key = self.cache.key( self.quote, self.variant() )
+				serialized = self.cache.get( key )
+				self.cached = serialized is not None
 
-			return json.dumps({
+				if self.cached:
+					out.write( self.compose( serialized ) )
+					return
+
+			try:
+				tree = self.tree()
+
+			except (SyntaxError) as e:
+				error = self.syntax_error( e )
+
+		if error is not None:
+			out.write( json.dumps( error ) )
+			return
+
+		head, tail = self.envelope()
+		out.write( head )
+		recorder = Recorder( out ) if self.cache is not None else out
+		ASTStreamSerializer( self.encoding ).dump( tree, recorder )
+		out.write( tail )
+		self.success = True
+
+		if self.cache is not None:
+			self.cache.put( key, recorder.getvalue() )
+
+
+	def result( self ):
+		"""
+		Returns the same envelope as parse(), as a dict
+		rather than json text.
+		"""
+		self.success = False
+
+		error = self.read()
+
+		if error is not None:
+			return error
+
+		if self.cache is None:
+			return self.evaluate()
+
+		key = self.cache.key( self.quote, self.variant() )
+		serialized = self.cache.get( key )
+		self.cached = serialized is not None
+
+		if self.cached:
+			try:
+				tree = json.loads( serialized )
+
+			except (RuntimeError):
+				# too deep for json.loads: serialize it again
+				return self.evaluate()
+
+			self.success = True
+
+			return self.index({
 				"success": True,
 				"message": None,
 				"filepath": self.filepath,
-				"ast": serialized
-			});
+				"ast": tree
+			})
+
+		result = self.evaluate()
+
+		if self.success:
+			self.cache.put( key, self.encode( result[ "ast" ] ) )
+
+		return result
+
+
+	def columns( self ):
+		"""
+		Returns the AST as a columnar node table (see
+		Columnar.py). The rest of the envelope goes in its
+		header; a failure is written as a header only.
+		"""
+		self.success = False
+
+		error = self.read()
+
+		if error is None:
+			try:
+				tree = self.tree()
+
+			except (SyntaxError) as e:
+				error = self.syntax_error( e )
+
+		if error is not None:
+			return Columnar.encode( error, [] )
+
+		self.success = True
+
+		return ASTColumns( self.encoding ).build( tree ).encode({
+			"success": True,
+			"message": None,
+			"filepath": self.filepath
+		})
+
+
+	def shards( self ):
+		"""
+		Returns the AST as a sharded file (see Shards.py):
+		every top level statement is serialized on its own,
+		and a manifest maps their lines to where they are,
+		so readers only decode the statements they need. A
+		failure is written as a header only.
+		"""
+		self.success = False
+
+		error = self.read()
+
+		if error is None:
+			try:
+				tree = self.tree()
+
+			except (SyntaxError) as e:
+				error = self.syntax_error( e )
+
+		if error is not None:
+			return Shards.encode( error, [], self.encoding )
+
+		# the module is serialized with its docstring alone, which it is computed from
+		module = self.serialize( ast.Module( body = docstring( tree.body ) ) )
+		module[ "body" ] = []
+
+		shards = [
+			( first, last, self.encode( self.serialize( statement ) ) )
+			for statement, ( first, last ) in zip( tree.body, Shards.spans( self.quote[ : ], tree.body ) )
+		]
+
+		self.success = True
+
+		return Shards.encode( self.index({
+			"success": True,
+			"message": None,
+			"filepath": self.filepath,
+			"ast": module
+		}), shards, self.encoding )
+
+
+	def evaluate( self ):
+		try:
+
+			serialized = self.serialize( self.tree() )
 
 		except (SyntaxError) as e:
 
-			return json.dumps({
+			return self.syntax_error( e )
+
+		self.success = True
+
+		return self.index({
+			"success": True,
+			"message": None,
+			"filepath": self.filepath,
+			"ast": serialized
+		})
+
+
+	def tree( self ):
+		tree = ast.parse( self.quote )
+
+		if self.ranges:
+			Ranges.locate( tree, Ranges.view( self.quote, self.encoding ) )
+
+		return self.project( tree )
+
+
+	def project( self, tree ):
+		return prune( tree ) if self.outline else tree
+
+
+	def variant( self ):
+		"""
+		Tells apart the outputs this parser's options
+		can produce for the same source, for the cache.
+		"""
+		return self.profile + ( '-outline' if self.outline else '' ) + ( '-ranges' if self.ranges else '' )
+
+
+	def read( self ):
+		if self.source is not None:
+			self.quote = Source.encode( self.source ) if isinstance( self.source, unicode ) else self.source
+			self.encoding = Source.declared( self.quote )
+			return None
+
+		try:
+			self.quote = Source.load( self.filepath )
+			self.encoding = Source.declared( self.quote )
+
+		except (OSError, IOError) as e:
+
+			return {
 				"success": False,
-				"message": str( e ),
-				"errno": -1,
-				"context": e.text,
-				"filepath": self.filepath,
-				"position": {
-					"line": e.lineno,
-					"offset": e.offset
-				}
+				"message": os.strerror( e.errno ),
+				"errno": e.errno,
+				"filepath": self.filepath
+			}
+
+		return None
+
+
+	def syntax_error( self, e ):
+		return {
+			"success": False,
+			"message": str( e ),
+			"errno": -1,
+			"context": e.text,
+			"filepath": self.filepath,
+			"position": {
+				"line": e.lineno,
+				"offset": e.offset
+			}
+
+		}
+
+
+	def envelope( self ):
+		"""
+		Returns the success envelope as the json text
+		before and after its ast value. The envelope is
+		encoded with a null ast which is then split out,
+		so that whatever is placed between the two halves
+		is identical to encoding the whole envelope at once.
+		"""
+		envelope = json.dumps( self.index({
+			"success": True,
+			"message": None,
+			"filepath": self.filepath,
+			"ast": None
+		}) )
+
+		head, tail = envelope.split( '"ast": null', 1 )
+		return head + '"ast": ', tail
+
+
+	def index( self, envelope ):
+		"""
+		Adds the offset of every line of the source to a
+		success envelope, with ranges, and returns it.
+		"""
+		if self.ranges:
+			envelope[ "lines" ] = Ranges.index( self.quote, self.encoding )
+
+		return envelope
+
+
+	def compose( self, serialized ):
+		head, tail = self.envelope()
 
-			});
+		self.success = True
+		return head + serialized + tail
 
 
 	def serialize( self, result ):
-		return ASTSerializer().visit( result )
+		serialized = self.visit( result )
+
+		if self.ranges:
+			Ranges.expand( serialized, lean = self.profile == 'lean' )
+
+		return serialized
+
+
+	def visit( self, result ):
+		"""
+		Uses the recursive serializer, which is the fastest,
+		and only falls back to the iterative one for trees too
+		deep for the recursion limit.
+		"""
+		if self.stats is not None:
+			try:
+				return self.stats.visit( result, lean = self.profile == 'lean' )
+
+			except (RuntimeError):
+				pass
+
+		if self.profile == 'lean':
+			try:
+				return ASTLeanSerializer().visit( result )
+
+			except (RuntimeError):
+				return reduce( ASTIterativeSerializer().visit( result ) )
+
+		try:
+			return ASTTableSerializer().visit( result )
+
+		except (RuntimeError):
+			return ASTIterativeSerializer().visit( result )
+
+
+	def encode( self, serialized ):
+		try:
+			return json.dumps( serialized, encoding = self.encoding )
+
+		except (RuntimeError):
+			return Iterative.dumps( serialized, self.encoding )
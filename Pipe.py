@@ -0,0 +1,159 @@
+import sys
+import json
+import Queue
+import threading
+import multiprocessing
+
+from Parser import ASTParser
+from Cache import ASTCache
+
+
+cache = None
+profile = 'full'
+outline = False
+
+
+def initialize( directory, limit, output = 'full', projection = False, level = None ):
+	"""
+	Pool initializer, as in Batch.py: each worker gets
+	its own handle on the cache, and the output options.
+	"""
+	global cache, profile, outline
+	cache = ASTCache( directory, limit, level ) if directory is not None else None
+	profile = output
+	outline = projection
+
+
+def parse_record( line ):
+	"""
+	Pool worker. Parses one NDJSON record and returns
+	its envelope, with the id of the record spliced in
+	front, and whether it succeeded. A record that is
+	not valid json, or has neither source nor path, gets
+	an error envelope like any other failure.
+	"""
+	identifier = filepath = None
+
+	try:
+		record = json.loads( line )
+		identifier = record.get( "id" )
+		filepath = record.get( "path" )
+		source = record.get( "source" )
+
+		if source is None and filepath is None:
+			raise ValueError( "a record needs a source or a path" )
+
+		parser = ASTParser( filepath or '<stdin>', cache = cache, source = source, profile = profile, outline = outline )
+		result = parser.parse()
+		success, cached = parser.success, parser.cached
+
+	except Exception as e:
+		result = json.dumps({
+			"success": False,
+			"message": "%s: %s" % ( e.__class__.__name__, e ),
+			"errno": -1,
+			"filepath": filepath
+		})
+		success, cached = False, None
+
+	return '{"id": %s, %s' % ( json.dumps( identifier ), result[ 1: ] ), success, cached
+
+
+
+class ASTPipe:
+	"""
+	This module reads NDJSON records from a stream, one
+	{ "id": ..., "path": ..., "source": ... } per line, and
+	writes one envelope per line, in the order the records
+	came in, each carrying the id of its record. path only
+	names the source in the envelope; without a source, the
+	file at path is parsed instead.
+
+	With more than one job, records are handed to a process
+	pool, with at most window of them in flight, so that a
+	single long lived pipe holds a bounded amount of work
+	however long its input.
+	"""
+
+
+	def __init__( self, jobs = 1, window = None, cache = None, profile = 'full', outline = False ):
+		self.jobs = jobs or multiprocessing.cpu_count()
+		self.window = window or self.jobs * 4
+		self.cache = cache
+		self.profile = profile
+		self.outline = outline
+		self.parsed = 0
+		self.failed = 0
+
+
+	def run( self, instream = sys.stdin, outstream = sys.stdout ):
+		if self.cache is not None:
+			settings = ( self.cache.directory, self.cache.limit, self.profile, self.outline, self.cache.level )
+		else:
+			settings = ( None, None, self.profile, self.outline )
+
+		lines = ( line for line in iter( instream.readline, '' ) if line.strip() )
+
+		if self.jobs == 1:
+			initialize( *settings )
+
+			for line in lines:
+				self.emit( parse_record( line ), outstream )
+				outstream.flush()
+
+			return
+
+		pool = multiprocessing.Pool( self.jobs, initialize, settings )
+
+		# reading blocks while the window is full; results are written,
+		# in order, by a thread of their own, so that they go out as soon
+		# as they are ready even while reading waits for more input
+		pending = Queue.Queue( self.window )
+		writer = threading.Thread( target = self.write, args = ( pending, outstream ) )
+		writer.daemon = True
+		writer.start()
+
+		try:
+			for line in lines:
+				pending.put( pool.apply_async( parse_record, ( line, ) ) )
+
+			pending.put( None )
+			writer.join()
+			pool.close()
+
+		except:
+			pool.terminate()
+			raise
+
+		finally:
+			pool.join()
+
+
+	def write( self, pending, outstream ):
+		while True:
+			result = pending.get()
+
+			if result is None:
+				return
+
+			self.emit( result.get(), outstream )
+
+			if pending.empty():
+				outstream.flush()
+
+
+	def emit( self, outcome, outstream ):
+		result, success, cached = outcome
+
+		if success:
+			self.parsed += 1
+		else:
+			self.failed += 1
+
+		if cached is not None:
+			if cached:
+				self.cache.hits += 1
+			else:
+				self.cache.misses += 1
+
+		outstream.write( result + '\n' )
@@ -0,0 +1,440 @@
+import re
+import ast
+import json
+
+from Parser import ASTParser
+from Table import FIELDS, OPERATORS, DOCSTRING, NODE, NODES, VISIT, MAP, HAS_VISIT, HAS_MAP, ZIP
+import Iterative
+import Ranges
+
+
+# A query is one or more selectors, separated by commas. A selector is
+# a chain of steps, each a node type, as the json calls it, or * for
+# any, followed by predicates in brackets. Steps are joined by axes:
+# whitespace for a descendant, > for a child. A predicate is a path of
+# fields, as the json names them, and list indices, from the node,
+# either alone, which holds if it leads to a value that is not null or
+# empty, or compared with a json literal by ==, != or ~= (a regular
+# expression search). A path that goes through a list holds if it holds
+# for any item:
+#
+#	Call[function.attribute == "execute"]
+#	ClassDef > FunctionDef[name ~= "^test"] Call[function.line == "print"]
+#	ImportFrom[module == "os"], Import[names.name == "os"]
+
+TOKEN = re.compile( r'\s*(?:(?P<string>"(?:[^"\\]|\\.)*")|(?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)|(?P<name>[A-Za-z_][A-Za-z0-9_]*)|(?P<op>==|!=|~=|[\[\]>.,*]))' )
+LITERALS = { 'true': True, 'false': False, 'null': None }
+
+DESCENDANT = ' '
+CHILD = '>'
+
+MISSING = object()
+
+# The json type of the node classes whose type is not their name, and
+# the classes of every type.
+TYPES = dict( [ ( name, spec[ 1 ] ) for name, spec in FIELDS.iteritems() ] + [ ( 'withitem', 'WithItem' ) ] )
+CLASSES = {}
+
+for name in dir( ast ):
+	if isinstance( getattr( ast, name ), type ) and issubclass( getattr( ast, name ), ast.AST ) and name not in OPERATORS:
+		CLASSES.setdefault( TYPES.get( name, name ), [] ).append( getattr( ast, name ) )
+
+# The fields the serializer follows to the children of each node class,
+# so that a query only finds nodes the json holds: the node fields of
+# the table, and those the visitors left out of it read (see the shells
+# in Iterative.py). Classes with no visitor have all their fields followed.
+FOLLOWED = { 'Raise': ( 'exc', 'body' ), 'Slice': ( 'lower', ), 'withitem': ( 'context_expr', ) }
+
+for name, spec in FIELDS.iteritems():
+	FOLLOWED[ name ] = tuple(
+		part for key, how, field in spec[ 2 ] if how in ( NODE, NODES, VISIT, MAP, HAS_VISIT, HAS_MAP, ZIP )
+		for part in ( field if how == ZIP else ( field, ) )
+	)
+
+FOLLOWED = dict( ( getattr( ast, name ), fields ) for name, fields in FOLLOWED.iteritems() if hasattr( ast, name ) )
+
+
+
+def tokenize( expression ):
+	"""
+	Returns the tokens of a query as ( kind, text )
+	pairs.
+	"""
+	tokens = []
+	position = 0
+	expression = expression.rstrip()
+
+	while position < len( expression ):
+		match = TOKEN.match( expression, position )
+
+		if match is None:
+			raise ValueError( "bad query at %d: %r" % ( position, expression[ position: ] ) )
+
+		kind = match.lastgroup
+		tokens.append( ( kind, match.group( kind ) ) )
+		position = match.end()
+
+	return tokens
+
+
+def selectors( expression ):
+	"""
+	Returns the selectors of a query, each a list of
+	( axis, type, predicates ) steps, the first with no
+	axis. A predicate is ( path, operator, value ), with
+	no operator and value if it only tests the path.
+	"""
+	tokens = tokenize( expression )
+	found = [ [] ]
+	axis = None
+	i = 0
+
+	def expect( *kinds ):
+		if i >= len( tokens ) or ( tokens[ i ][ 0 ] not in kinds and tokens[ i ][ 1 ] not in kinds ):
+			actual = tokens[ i ][ 1 ] if i < len( tokens ) else 'end of query'
+			raise ValueError( "bad query: expected %s, found %r" % ( ' or '.join( kinds ), actual ) )
+
+		return tokens[ i ]
+
+	while i < len( tokens ):
+		kind, text = tokens[ i ]
+
+		if text == ',':
+			if not found[ -1 ] or axis is not None:
+				raise ValueError( "bad query: empty selector" )
+
+			found.append( [] )
+			i += 1
+			continue
+
+		if text == CHILD:
+			if not found[ -1 ] or axis is not None:
+				raise ValueError( "bad query: > without a step before it" )
+
+			axis = CHILD
+			i += 1
+			continue
+
+		kind, text = expect( 'name', '*' )
+		current = ( axis or ( DESCENDANT if found[ -1 ] else None ), text, [] )
+		axis = None
+		i += 1
+
+		while i < len( tokens ) and tokens[ i ][ 1 ] == '[':
+			i += 1
+			path = []
+
+			while True:
+				kind, text = expect( 'name', 'number' )
+
+				# the tokenizer reads 0.1 in args.0.1 as a number
+				path.extend( text.split( '.' ) if kind == 'number' else [ text ] )
+				i += 1
+
+				if i < len( tokens ) and tokens[ i ][ 1 ] == '.':
+					i += 1
+				else:
+					break
+
+			path = [ int( part ) if part.isdigit() else part for part in path ]
+
+			if i < len( tokens ) and tokens[ i ][ 1 ] in ( '==', '!=', '~=' ):
+				operator = tokens[ i ][ 1 ]
+				i += 1
+				kind, text = expect( 'string', 'number', 'name' )
+
+				if kind == 'name' and text not in LITERALS:
+					raise ValueError( "bad query: %r is not a json literal" % text )
+
+				value = LITERALS[ text ] if kind == 'name' else json.loads( text )
+
+				if operator == '~=':
+					if not isinstance( value, basestring ):
+						raise ValueError( "bad query: ~= takes a string" )
+
+					value = re.compile( value )
+
+				i += 1
+				current[ 2 ].append( ( path, operator, value ) )
+			else:
+				current[ 2 ].append( ( path, None, None ) )
+
+			expect( ']' )
+			i += 1
+
+		found[ -1 ].append( current )
+
+	if not found[ -1 ] or axis is not None:
+		raise ValueError( "bad query: ends without a step" )
+
+	return found
+
+
+def children( node ):
+	"""
+	Returns the child nodes of a node that its json
+	holds, in order, leaving out the fields the serializer
+	does not follow, and contexts and operators.
+	"""
+	fields = FOLLOWED.get( node.__class__ )
+
+	if fields is None:
+		return Ranges.children( node )
+
+	found = []
+
+	for name in fields:
+		value = getattr( node, name, None )
+		kind = value.__class__
+
+		if kind is list:
+			found.extend( [ item for item in value if item.__class__ in Ranges.NODES ] )
+
+		elif kind in Ranges.NODES:
+			found.append( value )
+
+	return found
+
+
+def index( tree, ancestry = True ):
+	"""
+	Walks a tree once, and returns its nodes by class,
+	in document order, the place in document order of
+	every node, by id, and with ancestry, the parent of
+	every node, by id.
+	"""
+	nodes = {}
+	parents = {}
+	order = {}
+	pending = [ tree ]
+
+	while pending:
+		node = pending.pop()
+		group = nodes.get( node.__class__ )
+
+		if group is None:
+			group = nodes[ node.__class__ ] = []
+
+		group.append( node )
+		order[ id( node ) ] = len( order )
+		nested = children( node )
+
+		if ancestry:
+			for child in nested:
+				parents[ id( child ) ] = node
+
+		pending.extend( nested[ ::-1 ] )
+
+	return nodes, parents, order
+
+
+def resolve( node, path, encoding ):
+	"""
+	Returns the values a path leads to from a node,
+	following the fields the json of each node has.
+	"""
+	values = [ node ]
+
+	for part in path:
+		found = []
+
+		for value in values:
+			if isinstance( value, (list, tuple) ):
+				if isinstance( part, int ):
+					found.extend( value[ part : part + 1 ] )
+				else:
+					found.extend( step( item, part ) for item in value )
+			else:
+				found.append( step( value, part ) )
+
+		values = [ value for value in found if value is not MISSING ]
+
+	return [ scalar( value, encoding ) for value in values ]
+
+
+def step( value, part ):
+	"""
+	Returns the field part of a node, as its json names
+	it, or MISSING.
+	"""
+	if isinstance( value, dict ):
+		return value.get( part, MISSING )
+
+	if not isinstance( value, ast.AST ) or isinstance( part, int ):
+		return MISSING
+
+	name = value.__class__.__name__
+	spec = FIELDS.get( name )
+
+	if part == 'type':
+		return TYPES.get( name, name )
+
+	if part == 'position':
+		return { 'line': getattr( value, 'lineno', None ) }
+
+	if spec is None:
+		return getattr( value, part, MISSING )
+
+	if part == 'expr':
+		return spec[ 0 ]
+
+	if part == 'docstring':
+		return ast.get_docstring( value ) if spec[ 4 ] == DOCSTRING else False
+
+	for key, how, field in spec[ 2 ]:
+		if key == part:
+			if isinstance( field, tuple ):
+				return zip( *[ getattr( value, item, None ) or [] for item in field ] )
+
+			return getattr( value, field, None )
+
+	return MISSING
+
+
+def scalar( value, encoding ):
+	"""
+	Returns a value as the json has it where that is a
+	scalar: operators as their symbols, and strings decoded.
+	"""
+	if isinstance( value, ast.AST ) and value.__class__.__name__ in OPERATORS:
+		return OPERATORS[ value.__class__.__name__ ]
+
+	if isinstance( value, str ):
+		try:
+			return value.decode( encoding )
+		except (UnicodeError, LookupError):
+			return value
+
+	return value
+
+
+def holds( node, predicate, encoding ):
+	path, operator, expected = predicate
+	values = resolve( node, path, encoding )
+
+	if operator is None:
+		return any( value is not None and value != [] for value in values )
+
+	if operator == '~=':
+		return any( isinstance( value, basestring ) and expected.search( value ) is not None for value in values )
+
+	equal = any( same( value, expected ) for value in values )
+	return equal if operator == '==' else not equal
+
+
+def same( value, expected ):
+	if isinstance( value, bool ) or isinstance( expected, bool ) or value is None or expected is None:
+		return value is expected
+
+	if isinstance( value, ast.AST ) or isinstance( value, (list, tuple, dict) ):
+		return False
+
+	return value == expected
+
+
+
+class ASTQuery:
+	"""
+	This module evaluates a structural query (see the top
+	of Query.py) on a parsed tree, without serializing it.
+	The tree is walked once to index its nodes by class, and
+	the parent of each; every selector then starts from the
+	nodes of the type of its last step, and checks its
+	earlier steps up through their ancestors.
+	"""
+
+
+	def __init__( self, expression ):
+		self.expression = expression
+		self.selectors = selectors( expression )
+
+
+	def match( self, tree, encoding = 'utf-8' ):
+		"""
+		Returns the nodes that match, in document order.
+		"""
+		nodes, parents, order = index( tree, any( len( selector ) > 1 for selector in self.selectors ) )
+		found = {}
+
+		for selector in self.selectors:
+			memo = {}
+			kind = selector[ -1 ][ 1 ]
+			candidates = [ node for group in nodes.itervalues() for node in group ] if kind == '*' else [ node for cls in CLASSES.get( kind, () ) for node in nodes.get( cls, () ) ]
+
+			for node in candidates:
+				if self.matches( node, selector, len( selector ) - 1, parents, memo, encoding ):
+					found[ id( node ) ] = node
+
+		return sorted( found.itervalues(), key = lambda node: order[ id( node ) ] )
+
+
+	def matches( self, node, selector, i, parents, memo, encoding ):
+		"""
+		Tells whether node matches step i of a selector and,
+		through its ancestors, the steps before it.
+		"""
+		key = ( id( node ), i )
+
+		if key in memo:
+			return memo[ key ]
+
+		axis, kind, predicates = selector[ i ]
+		result = ( kind == '*' or TYPES.get( node.__class__.__name__, node.__class__.__name__ ) == kind ) and all( holds( node, predicate, encoding ) for predicate in predicates )
+
+		if result and i > 0:
+			parent = parents.get( id( node ) )
+
+			if axis == CHILD:
+				result = parent is not None and self.matches( parent, selector, i - 1, parents, memo, encoding )
+			else:
+				result = False
+
+				while parent is not None and not result:
+					result = self.matches( parent, selector, i - 1, parents, memo, encoding )
+					parent = parents.get( id( parent ) )
+
+		memo[ key ] = result
+		return result
+
+
+
+class ASTQueryParser( ASTParser ):
+	"""
+	This module parses a source and returns only the
+	nodes a query matches, serialized, in place of the ast,
+	so that nothing else in the tree is serialized.
+	"""
+
+
+	def query( self, expression ):
+		"""
+		Returns the envelope parse() would, with the list
+		of the nodes that match expression, a query or an
+		ASTQuery, in place of the ast.
+		"""
+		query = expression if isinstance( expression, ASTQuery ) else ASTQuery( expression )
+		self.success = False
+
+		error = self.read()
+
+		if error is None:
+			try:
+				tree = self.tree()
+
+			except (SyntaxError) as e:
+				error = self.syntax_error( e )
+
+		if error is not None:
+			return json.dumps( error )
+
+		matches = [ self.serialize( node ) for node in query.match( tree, self.encoding ) ]
+		head, tail = self.envelope()
+
+		try:
+			serialized = json.dumps( matches, encoding = self.encoding )
+
+		except (RuntimeError):
+			serialized = Iterative.dumps( matches, self.encoding )
+
+		self.success = True
+		return head[ : -len( '"ast": ' ) ] + '"matches": ' + serialized + tail
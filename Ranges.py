@@ -0,0 +1,337 @@
+import io
+import ast
+import token
+import tokenize
+
+import Source
+
+
+# Tokens that are not part of any node.
+SKIPPED = frozenset([ tokenize.COMMENT, tokenize.NL, token.INDENT, token.DEDENT, token.ENDMARKER ])
+
+OPENING = { '(': ')', '[': ']', '{': '}' }
+CLOSING = frozenset( OPENING.itervalues() )
+
+# How the end of each kind of node is found (see locate()): simple
+# statements end with their logical line, compound ones with their last
+# child, calls, subscripts and attributes after their function or value,
+# strings and negative numbers after their last token, and containers
+# and comprehensions at the bracket matching their first.
+SIMPLE, TRAILING, STRING, NUMBER, KEYWORD, BRACKETED, COMPREHENSION = range( 7 )
+
+def rules():
+	"""
+	Returns the rule of every node class that has one.
+	"""
+	found = {}
+
+	for name in dir( ast ):
+		kind = getattr( ast, name )
+
+		if isinstance( kind, type ) and issubclass( kind, ast.stmt ) and kind is not ast.stmt:
+			found[ kind ] = SIMPLE
+
+	groups = (
+		( None, ( 'FunctionDef', 'AsyncFunctionDef', 'ClassDef', 'For', 'AsyncFor', 'While', 'AsyncWith', 'Try', 'TryExcept', 'TryFinally' ) ),
+		( KEYWORD, ( 'If', 'With' ) ),
+		( TRAILING, ( 'Call', 'Subscript', 'Attribute', 'Repr' ) ),
+		( STRING, ( 'Str', ) ),
+		( NUMBER, ( 'Num', ) ),
+		( BRACKETED, ( 'List', 'Tuple', 'Set', 'Dict', 'GeneratorExp' ) ),
+		( COMPREHENSION, ( 'ListComp', 'SetComp', 'DictComp' ) )
+	)
+
+	for rule, names in groups:
+		for name in names:
+			if hasattr( ast, name ):
+				found[ getattr( ast, name ) ] = rule
+
+	return found
+
+
+RULES = rules()
+
+# The node classes that can have a position, or children that do;
+# contexts and operators, which python keeps one instance of, have neither.
+NODES = frozenset( kind for kind in vars( ast ).itervalues() if isinstance( kind, type ) and issubclass( kind, ast.AST ) and ( kind._fields or kind._attributes ) )
+
+
+
+class Position( int ):
+	"""
+	The line a node starts on, set as its lineno, which
+	also carries the column it starts at and the line and
+	column it ends at, so that it goes through every
+	serializer as the line, and expand() finds the rest.
+	Columns are byte offsets into their line, and the end
+	is exclusive, as in the col_offset of the node.
+	"""
+
+	def __new__( cls, line, column, end_line, end_column ):
+		position = int.__new__( cls, line )
+		position.column = column
+		position.end_line = end_line
+		position.end_column = end_column
+		return position
+
+
+
+def view( source, encoding = 'utf-8' ):
+	"""
+	Returns the source as ast.parse sees it: in UTF-8,
+	which its columns count the bytes of, and without a
+	byte order mark.
+	"""
+	text = source[ : ]
+
+	if text.startswith( Source.BOM ):
+		return text[ len( Source.BOM ): ]
+
+	if encoding != 'utf-8':
+		try:
+			return text.decode( encoding ).encode( 'utf-8' )
+
+		except (UnicodeError, LookupError):
+			pass
+
+	return text
+
+
+def index( source, encoding = 'utf-8' ):
+	"""
+	Returns the offset of the start of every line of the
+	source, first line first, so that a node starts at byte
+	index[ line - 1 ] + column of the source. For sources in
+	an encoding other than UTF-8, offsets are into the source
+	as view() returns it.
+	"""
+	text = view( source, encoding )
+	skip = len( Source.BOM ) if encoding == 'utf-8' and source[ :len( Source.BOM ) ] == Source.BOM else 0
+	offsets = [ skip ]
+	offset = skip
+
+	for line in text.split( b'\n' )[ :-1 ]:
+		offset += len( line ) + 1
+		offsets.append( offset )
+
+	return offsets
+
+
+def tokens( text ):
+	"""
+	Returns the tokens of a source that can be part of a
+	node, the index of the token starting at each position,
+	the index of the bracket matching every bracket, and the
+	bracket depth before every token.
+	"""
+	found = [ item for item in tokenize.generate_tokens( io.BytesIO( text ).readline ) if item[ 0 ] not in SKIPPED ]
+	starts = {}
+	matches = {}
+	depths = []
+	opened = []
+
+	for i, ( kind, string, start, end, line ) in enumerate( found ):
+		starts[ start ] = i
+		depths.append( len( opened ) )
+
+		if kind == token.OP:
+			if string in OPENING:
+				opened.append( i )
+			elif string in CLOSING and opened:
+				j = opened.pop()
+				matches[ i ] = j
+				matches[ j ] = i
+
+	depths.append( len( opened ) )
+	return found, starts, matches, depths
+
+
+def children( node ):
+	"""
+	Returns the child nodes of a node that can have
+	a position, leaving out the contexts and operators,
+	which python shares between nodes.
+	"""
+	found = []
+
+	for name in node._fields:
+		value = getattr( node, name, None )
+		kind = value.__class__
+
+		if kind is list:
+			found.extend( [ item for item in value if item.__class__ in NODES ] )
+
+		elif kind in NODES:
+			found.append( value )
+
+	return found
+
+
+def locate( tree, text ):
+	"""
+	Sets the lineno of every node that has one to a
+	Position spanning its tokens, in place. text is the
+	source as view() returns it. Python 2 only records
+	where nodes start, so the end of each node is found
+	from the tokens: an expression ends with its last
+	child, or the bracket, attribute or string after
+	it, a simple statement at the end of its logical line,
+	and a compound statement with its last child. Ranges
+	are then widened to balance their brackets.
+
+	Returns False, leaving the tree as it was, if the
+	source cannot be tokenized.
+	"""
+	try:
+		found, starts, matches, depths = tokens( text )
+
+	except (tokenize.TokenError, IndentationError):
+		return False
+
+	# the multiline string token ending on each line, at most one, for
+	# the multiline strings python 2 places on their last line, at column -1
+	strings = dict( ( item[ 3 ][ 0 ], i ) for i, item in enumerate( found ) if item[ 0 ] == token.STRING and item[ 2 ][ 0 ] < item[ 3 ][ 0 ] )
+
+	spans = {}
+	count = len( found )
+	order = []
+	pending = [ tree ]
+
+	# in reverse pre-order, every node comes after its descendants
+	while pending:
+		node = pending.pop()
+		nested = children( node )
+		order.append( ( node, nested ) )
+		pending.extend( nested )
+
+	for node, nested in reversed( order ):
+		first = last = None
+		line, column = getattr( node, 'lineno', None ), getattr( node, 'col_offset', None )
+
+		if line is not None and column is not None:
+			first = strings.get( line ) if column < 0 else starts.get( ( line, column ) )
+
+			if first is not None and column < 0:
+				while first > 0 and found[ first - 1 ][ 0 ] == token.STRING:
+					first -= 1
+
+		if first is not None:
+			last = first
+
+		# python 2 can start an operation after its parenthesized operand
+		for child in nested:
+			span = spans[ id( child ) ]
+
+			if span is not None:
+				if first is None or span[ 0 ] < first:
+					first = span[ 0 ]
+				if last is None or span[ 1 ] > last:
+					last = span[ 1 ]
+
+		if line is None or column is None or first is None:
+			spans[ id( node ) ] = None if first is None else ( first, last )
+			continue
+
+		rule = RULES.get( node.__class__ )
+
+		if rule == SIMPLE:
+			last = first
+
+			while last + 1 < count and found[ last + 1 ][ 0 ] != token.NEWLINE and found[ last + 1 ][ 1 ] != ';':
+				last = matches.get( last + 1, last + 1 ) if found[ last + 1 ][ 1 ] in OPENING else last + 1
+
+		elif rule == TRAILING:
+			inner = spans.get( id( node.func if isinstance( node, ast.Call ) else node.value ) )
+			j = ( inner[ 1 ] if inner is not None else first ) + 1
+
+			while j < count and found[ j ][ 1 ] == ')' and matches.get( j, first ) < first:
+				j += 1
+
+			if j < count:
+				if isinstance( node, ast.Attribute ):
+					last = max( last, j + 1 )
+				elif isinstance( node, ast.Repr ):
+					last = max( last, j )
+				else:
+					last = max( last, matches.get( j, j ) )
+
+		elif rule == STRING:
+			while last + 1 < count and found[ last + 1 ][ 0 ] == token.STRING:
+				last += 1
+
+		elif rule == NUMBER:
+			if found[ first ][ 1 ] == '-' and first + 1 < count:
+				last = first + 1
+
+		elif rule == KEYWORD:
+			# python 2 starts an elif at its test, and a with at its expression
+			if first > 0 and found[ first - 1 ][ 1 ] in ( 'elif', 'with' ):
+				first -= 1
+
+		elif rule == BRACKETED or rule == COMPREHENSION:
+			# python 2 starts a dict or set comprehension at its element
+			if rule == COMPREHENSION and first > 0 and found[ first - 1 ][ 1 ] in ( '[', '{' ) and matches.get( first - 1, -1 ) > last:
+				first -= 1
+
+			if matches.get( first, -1 ) >= last:
+				last = matches[ first ]
+
+		last = min( last, count - 1 )
+
+		while last + 1 < count and depths[ last + 1 ] > depths[ first ]:
+			last += 1
+
+		while first > 0 and depths[ first ] > depths[ last + 1 ]:
+			first -= 1
+
+		# python 2 starts a parenthesized tuple at its first element; a
+		# trailing comma and the parentheses around it are part of it
+		if rule == BRACKETED and isinstance( node, ast.Tuple ) and node.elts:
+			if last + 1 < count and found[ last + 1 ][ 1 ] == ',':
+				last += 1
+
+			if first > 0 and found[ first - 1 ][ 1 ] == '(' and matches.get( first - 1 ) == last + 1:
+				first -= 1
+				last += 1
+
+		spans[ id( node ) ] = ( first, last )
+		start, end = found[ first ][ 2 ], found[ last ][ 3 ]
+		node.lineno = Position( start[ 0 ], start[ 1 ], end[ 0 ], end[ 1 ] )
+		node.col_offset = start[ 1 ]
+
+	return True
+
+
+def expand( value, lean = False ):
+	"""
+	Rewrites every position in a serialized tree, in
+	place, to carry the column and end of its node:
+	{ "line", "column", "endLine", "endColumn" }, or with
+	lean, [ line, column, end line, end column ] where the
+	range is known. Returns the tree.
+	"""
+	pending = [ value ]
+
+	while pending:
+		value = pending.pop()
+
+		if isinstance( value, dict ):
+			if "position" in value and "type" in value:
+				position = value[ "position" ]
+				line = position.get( "line" ) if isinstance( position, dict ) else position
+
+				if isinstance( line, Position ):
+					if lean:
+						value[ "position" ] = [ int( line ), line.column, line.end_line, line.end_column ]
+					else:
+						value[ "position" ] = { "line": int( line ), "column": line.column, "endLine": line.end_line, "endColumn": line.end_column }
+
+				elif not lean and isinstance( position, dict ):
+					value[ "position" ] = { "line": line, "column": None, "endLine": None, "endColumn": None }
+
+			pending.extend( value.itervalues() )
+
+		elif isinstance( value, (list, tuple) ):
+			pending.extend( value )
+
+	return value
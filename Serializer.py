@@ -3,6 +3,9 @@ import sys
 import ast
 import jsonpickle
 
+# bump whenever the shape of the serialized output changes
+VERSION = "1"
+
 class ASTSerializer( ast.NodeTransformer ):
 	"""
 	The ASTSerializer class is a NodeTransformer
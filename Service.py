@@ -0,0 +1,220 @@
+import os
+import sys
+import json
+import urlparse
+import multiprocessing
+
+from SocketServer import ThreadingMixIn
+from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
+
+from Parser import ASTParser
+import Compression
+
+
+
+def warm():
+	"""
+	Pool initializer. Runs one throwaway parse so that
+	every lazily initialized piece of the pipeline is
+	loaded before the first real request arrives.
+	"""
+	ASTParser( '<warmup>', source = 'def f( x ):\n\t"""doc"""\n\treturn x + 1\n' ).parse()
+
+
+def parse_request( filepath, source, outline = False, compression = None, level = Compression.LEVEL ):
+	"""
+	Pool worker. Returns the envelope, compressed with
+	compression, if given, and its size before, so that
+	compressing a response is done in the pool too.
+	"""
+	parser = ASTParser( filepath, source = source, outline = outline )
+
+	try:
+		result = parser.parse()
+
+	except Exception as e:
+		result = json.dumps({
+			"success": False,
+			"message": "%s: %s" % ( e.__class__.__name__, e ),
+			"errno": -1,
+			"filepath": filepath
+		})
+
+	if compression is None:
+		return result, len( result )
+
+	return Compression.compress( result, compression, level ), len( result )
+
+
+def negotiate( accepted ):
+	"""
+	Returns the compression an Accept-Encoding header asks
+	for, gzip first, then deflate, which is the zlib format
+	over http, and its name there, or None.
+	"""
+	codings = {}
+
+	for item in accepted.split( ',' ):
+		parts = [ part.strip() for part in item.split( ';' ) ]
+		weight = 1.0
+
+		for part in parts[ 1: ]:
+			if part.startswith( 'q=' ):
+				try:
+					weight = float( part[ 2: ] )
+				except ValueError:
+					weight = 0.0
+
+		codings[ parts[ 0 ].lower() ] = weight
+
+	for coding, method in ( ( 'gzip', 'gzip' ), ( 'deflate', 'zlib' ) ):
+		if codings.get( coding, codings.get( '*', 0.0 ) ) > 0.0:
+			return method, coding
+
+	return None, None
+
+
+
+def confine( root, filepath ):
+	"""
+	Returns the real path of filepath, taken from root,
+	or None if it is not under root, as through .. or a
+	symbolic link.
+	"""
+	root = os.path.realpath( root )
+	resolved = os.path.realpath( os.path.join( root, filepath.lstrip( '/' ) ) )
+
+	if resolved != root and not resolved.startswith( os.path.join( root, '' ) ):
+		return None
+
+	return resolved
+
+
+
+class ThreadingWSGIServer( ThreadingMixIn, WSGIServer ):
+	daemon_threads = True
+
+
+
+class QuietHandler( WSGIRequestHandler ):
+
+	def log_message( self, format, *args ):
+		pass
+
+
+
+class ASTService:
+	"""
+	This module serves ASTParser over HTTP. Requests
+	are handed to a pool of pre-warmed worker processes,
+	so a request only pays for its own parse and
+	serialization.
+
+	POST /?path=<name> parses the request body, reporting
+	it under the given name. With a root, GET or POST
+	/?path=<file> with an empty body parses the file at
+	that path under root; files outside it are forbidden,
+	and without a root, no file is read at all. The
+	response is the same envelope ASTParser.parse returns.
+	Adding outline=1 asks for the outline only.
+
+	Responses are compressed at level when the request
+	accepts gzip or deflate, and carry the size of the
+	envelope before in X-Decompressed-Length.
+	"""
+
+
+	def __init__( self, jobs = None, level = Compression.LEVEL, root = None ):
+		self.jobs = jobs or multiprocessing.cpu_count()
+		self.level = level
+		self.root = root
+		self.pool = None
+
+
+	def start( self ):
+		self.pool = multiprocessing.Pool( self.jobs, warm )
+
+
+	def stop( self ):
+		if self.pool is not None:
+			self.pool.terminate()
+			self.pool.join()
+			self.pool = None
+
+
+	def __call__( self, environ, start_response ):
+		method = environ.get( 'REQUEST_METHOD', 'GET' )
+
+		if method not in ( 'GET', 'POST' ):
+			return self.respond( start_response, '405 Method Not Allowed', json.dumps({
+				"success": False,
+				"message": "method not allowed",
+				"errno": -1
+			}), [ ( 'Allow', 'GET, POST' ) ] )
+
+		query = urlparse.parse_qs( environ.get( 'QUERY_STRING', '' ) )
+		filepath = query.get( 'path', [ None ] )[ 0 ]
+		outline = query.get( 'outline', [ '0' ] )[ 0 ] not in ( '', '0', 'false' )
+		source = None
+
+		try:
+			length = int( environ.get( 'CONTENT_LENGTH' ) or 0 )
+		except ValueError:
+			length = 0
+
+		if method == 'POST' and length > 0:
+			source = environ[ 'wsgi.input' ].read( length )
+			filepath = filepath or '<request>'
+
+		if filepath is None:
+			return self.respond( start_response, '400 Bad Request', json.dumps({
+				"success": False,
+				"message": "expected a request body or a path parameter",
+				"errno": -1
+			}) )
+
+		if source is None:
+			resolved = confine( self.root, filepath ) if self.root is not None else None
+
+			if resolved is None:
+				return self.respond( start_response, '403 Forbidden', json.dumps({
+					"success": False,
+					"message": "files outside the served root cannot be read" if self.root is not None else "files are not read without a served root; post the source instead",
+					"errno": -1,
+					"filepath": filepath
+				}) )
+
+			filepath = resolved
+
+		compression, coding = negotiate( environ.get( 'HTTP_ACCEPT_ENCODING', '' ) )
+		result, size = self.pool.apply( parse_request, ( filepath, source, outline, compression, self.level ) )
+		headers = [ ( 'X-Decompressed-Length', str( size ) ), ( 'Vary', 'Accept-Encoding' ) ]
+
+		if compression is not None:
+			headers.append( ( 'Content-Encoding', coding ) )
+
+		return self.respond( start_response, '200 OK', result, headers )
+
+
+	def respond( self, start_response, status, body, headers = None ):
+		start_response( status, [
+			( 'Content-Type', 'application/json' ),
+			( 'Content-Length', str( len( body ) ) )
+		] + ( headers or [] ) )
+
+		return [ body ]
+
+
+	def serve( self, host = '127.0.0.1', port = 8000 ):
+		self.start()
+		server = make_server( host, port, self, server_class = ThreadingWSGIServer, handler_class = QuietHandler )
+
+		try:
+			server.serve_forever()
+
+		except KeyboardInterrupt:
+			pass
+
+		finally:
+			server.server_close()
+			self.stop()
@@ -0,0 +1,194 @@
+import io
+import json
+import mmap
+import token
+import bisect
+import struct
+import tokenize
+
+
+MAGIC = b'DSHD'
+VERSION = 1
+
+PREFIX = struct.Struct( '<4sBxxxI' )
+
+
+
+def encode( header, shards, encoding = 'utf-8' ):
+	"""
+	Writes a sharded file: a fixed prefix, a json header,
+	then the json text of every top level statement, one
+	after another. header is the envelope, with the module
+	and its body left empty in place of the ast; shards are
+	( first line, last line, json text ) for every statement
+	in the body, in order. The header gets a manifest of the
+	shards, each [ first line, last line, offset, length ],
+	offsets relative to the end of the header. Byte strings
+	in the header are in encoding, that of the source.
+	"""
+	header = dict( header )
+	manifest = header[ "shards" ] = []
+	offset = 0
+
+	for first, last, text in shards:
+		manifest.append( [ first, last, offset, len( text ) ] )
+		offset += len( text )
+
+	text = json.dumps( header, encoding = encoding ).encode( 'utf-8' )
+
+	out = bytearray( PREFIX.pack( MAGIC, VERSION, len( text ) ) )
+	out.extend( text )
+
+	for first, last, shard in shards:
+		out.extend( shard )
+
+	return bytes( out )
+
+
+def header( data ):
+	"""
+	Returns the header of a sharded file and the
+	offset its shards start at.
+	"""
+	magic, version, length = PREFIX.unpack_from( data, 0 )
+
+	if magic != MAGIC:
+		raise ValueError( "not a sharded AST" )
+
+	if version != VERSION:
+		raise ValueError( "unsupported sharded AST version %d" % version )
+
+	meta = json.loads( bytes( data[ PREFIX.size : PREFIX.size + length ] ).decode( 'utf-8' ) )
+	return meta, PREFIX.size + length
+
+
+def spans( source, body ):
+	"""
+	Returns the first and last line of every statement
+	in a module body: up to the line before the next one,
+	and for the last, up to the end of the source.
+	"""
+	lines = source.split( b'\n' )
+	starts = []
+
+	for statement in body:
+		first = int( statement.lineno )
+
+		# python 2 places a statement that starts with a multiline string on its last line
+		if statement.col_offset < 0:
+			first = opening( lines, starts[ -1 ] if starts else 1, first )
+
+		starts.append( first )
+
+	ends = [ max( first, following - 1 ) for first, following in zip( starts, starts[ 1: ] ) ]
+	return zip( starts, ends + [ max( starts[ -1 ], len( lines ) ) ] ) if starts else []
+
+
+def opening( lines, begin, end ):
+	"""
+	Returns the line the strings ending on line end start
+	on, tokenizing from line begin, where a statement starts.
+	"""
+	found = None
+	readline = io.BytesIO( b'\n'.join( lines[ begin - 1 : end ] ) + b'\n' ).readline
+
+	try:
+		for kind, text, start, stop, line in tokenize.generate_tokens( readline ):
+			if kind == token.STRING:
+				found = start[ 0 ] if found is None else found
+
+				if stop[ 0 ] + begin - 1 >= end:
+					return found + begin - 1
+
+			elif kind not in ( tokenize.NL, tokenize.COMMENT ):
+				found = None
+
+	except (tokenize.TokenError, IndentationError):
+		pass
+
+	return end
+
+
+
+class ASTShards:
+	"""
+	This module reads a sharded AST (see encode()) through
+	a memory map. The header is decoded when it is opened,
+	and a statement only when it is asked for, so reading a
+	few statements of a huge module costs what they do.
+	"""
+
+
+	def __init__( self, filepath ):
+		f = open( filepath, 'rb' )
+
+		try:
+			self.data = mmap.mmap( f.fileno(), 0, access = mmap.ACCESS_READ )
+
+		finally:
+			f.close()
+
+		self.header, self.start = header( self.data )
+		self.manifest = self.header.get( "shards", [] )
+		self.lasts = [ entry[ 1 ] for entry in self.manifest ]
+
+
+	def __len__( self ):
+		return len( self.manifest )
+
+
+	def shard( self, i ):
+		"""
+		Returns the ith top level statement, decoded.
+		"""
+		first, last, offset, length = self.manifest[ i ]
+		return json.loads( self.data[ self.start + offset : self.start + offset + length ] )
+
+
+	def select( self, first, last = None ):
+		"""
+		Returns the top level statements that overlap the
+		lines first to last, or that hold line first, decoded.
+		"""
+		last = first if last is None else last
+		i = bisect.bisect_left( self.lasts, first )
+		found = []
+
+		while i < len( self.manifest ) and self.manifest[ i ][ 0 ] <= last:
+			found.append( self.shard( i ) )
+			i += 1
+
+		return found
+
+
+	def envelope( self ):
+		"""
+		Returns the whole envelope, as parse() would,
+		with every statement decoded.
+		"""
+		envelope = dict( self.header )
+		del envelope[ "shards" ]
+
+		if envelope.get( "ast" ) is not None:
+			envelope[ "ast" ][ "body" ] = [ self.shard( i ) for i in range( len( self ) ) ]
+
+		return envelope
+
+
+	def close( self ):
+		self.data.close()
+
+
+
+def load( filepath ):
+	"""
+	Returns the envelope in a sharded file, as parse()
+	would, with every statement decoded.
+	"""
+	shards = ASTShards( filepath )
+
+	try:
+		return shards.envelope()
+
+	finally:
+		shards.close()
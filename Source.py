@@ -0,0 +1,91 @@
+import re
+import mmap
+import codecs
+
+
+# Files this large or larger are memory mapped rather than read.
+THRESHOLD = 1 << 20
+
+BOM = codecs.BOM_UTF8
+
+# PEP 263: a comment on the first or second line naming the encoding.
+COOKIE = re.compile( br'^[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)' )
+BLANK = re.compile( br'^[ \t\f]*(?:[#\r\n]|$)' )
+
+
+
+def load( filepath ):
+	"""
+	Returns the contents of a file as bytes, without
+	decoding them, for ast.parse to decode as the file
+	declares. Large files are returned as a read only
+	memory map instead, which ast.parse takes as it is,
+	with no copy of the file in memory.
+
+	The parser needs the source to be followed by a NUL,
+	which the zero filled end of the last mapped page
+	provides; a file that ends exactly on a page boundary
+	has none, so it is read like a small one.
+	"""
+	f = open( filepath, 'rb' )
+
+	try:
+		f.seek( 0, 2 )
+		size = f.tell()
+
+		if size >= THRESHOLD and size % mmap.PAGESIZE:
+			return mmap.mmap( f.fileno(), 0, access = mmap.ACCESS_READ )
+
+		f.seek( 0 )
+		return f.read()
+
+	finally:
+		f.close()
+
+
+def declared( source ):
+	"""
+	Returns the encoding a source declares, with a UTF-8
+	byte order mark or a PEP 263 coding cookie, normalized
+	to its codec name, or utf-8 when it declares none, or
+	one python does not know (ast.parse rejects those). Text
+	that is already unicode is taken as utf-8.
+	"""
+	if isinstance( source, unicode ):
+		return 'utf-8'
+
+	head = source[ :1024 ]
+
+	if head.startswith( BOM ):
+		return 'utf-8'
+
+	lines = head.split( b'\n', 2 )[ :2 ]
+
+	for i, line in enumerate( lines ):
+		match = COOKIE.match( line )
+
+		if match is not None:
+			try:
+				return codecs.lookup( match.group( 1 ).decode( 'ascii' ) ).name
+
+			except LookupError:
+				return 'utf-8'
+
+		if i == 0 and not BLANK.match( line ):
+			break
+
+	return 'utf-8'
+
+
+def encode( text ):
+	"""
+	Returns unicode source text as bytes in the encoding
+	it declares, which ast.parse then decodes back to the
+	same text. ast.parse rejects unicode text with a coding
+	cookie, and sources often come with one.
+	"""
+	try:
+		return text.encode( declared( text.encode( 'utf-8' ) ) )
+
+	except UnicodeError:
+		return text.encode( 'utf-8' )
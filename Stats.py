@@ -0,0 +1,226 @@
+import json
+import time
+
+from Serializer import ASTSerializer
+from Table import build
+from Lean import reduce
+
+
+# Every counter is [ calls, time, self, bytes ]:
+#
+#	calls	the number of nodes the visitor serialized
+#	time	seconds spent in the visitor, children included
+#	self	seconds spent in the visitor, children excluded
+#	bytes	json bytes of its output, excluding the nodes nested in it
+#
+# so that self and bytes add up to the whole serialization time and to
+# the size of the ast json. Time spent on the counting itself is left out.
+
+CALLS, TIME, SELF, BYTES = range( 4 )
+
+
+
+class Reference( ASTSerializer ):
+	"""
+	Runs the visit_ methods of the ASTSerializer for the
+	node classes the table leaves to it, with their children
+	going back through the instrumented dispatch.
+	"""
+
+	def __init__( self, dispatch = None ):
+		self.dispatch = dispatch
+
+	def visit( self, node ):
+		return self.dispatch[ node.__class__ ]( node )
+
+
+
+def measure( value, encode = json.JSONEncoder().encode ):
+	"""
+	Returns the size of a scalar encoded as json. Values
+	json cannot encode count for nothing here; they fail
+	later, in json.dumps, exactly as they would uncounted.
+	"""
+	try:
+		return len( encode( value ) )
+
+	except (TypeError, ValueError):
+		return 0
+
+
+def shallow( value ):
+	"""
+	Returns the size of value encoded as json, where the
+	nodes nested in it count for nothing.
+	"""
+	size = 0
+	pending = [ value ]
+	root = value
+
+	while pending:
+		value = pending.pop()
+
+		if isinstance( value, dict ):
+			if value is not root and "expr" in value and "type" in value:
+				continue
+
+			size += 2 * len( value ) + sum( measure( key ) + 2 for key in value )
+			pending.extend( value.itervalues() )
+
+			if not value:
+				size += 2
+
+		elif isinstance( value, (list, tuple) ):
+			size += 2 * len( value ) or 2
+			pending.extend( value )
+
+		else:
+			size += measure( value )
+
+	return size
+
+
+
+class ASTStats:
+	"""
+	The ASTStats counts, for every visit_ method, how often
+	it ran, how long it took and how much json it produced
+	(see the top of this module). It does so through its own
+	instrumented copy of the serializer dispatch, so parsers
+	not given an ASTStats run exactly as they would without
+	this module. Counters from several files, or several
+	processes, are combined with merge(), and printed with
+	table() or as json with dump().
+	"""
+
+
+	def __init__( self ):
+		self.counters = {}
+		self.pending = {}
+		self.stack = []
+		self.dispatches = {}
+
+
+	def wrap( self, name, function ):
+		"""
+		Returns function counted under name; with no name,
+		under the visit_ method for the class of each node.
+		"""
+		counters = self.pending
+		stack = self.stack
+		clock = time.time
+
+		def counted( node ):
+			# children time, children scalar bytes, counting overhead below
+			frame = [ 0.0, 0, 0.0 ]
+			stack.append( frame )
+			start = clock()
+
+			try:
+				result = function( node )
+
+			finally:
+				end = clock()
+				stack.pop()
+
+			elapsed = end - start - frame[ 2 ]
+
+			if isinstance( result, dict ):
+				size = shallow( result ) - frame[ 1 ]
+			else:
+				size = measure( result )
+
+			key = name or 'visit_' + node.__class__.__name__
+			counter = counters.get( key )
+
+			if counter is None:
+				counter = counters[ key ] = [ 0, 0.0, 0.0, 0 ]
+
+			counter[ CALLS ] += 1
+			counter[ TIME ] += elapsed
+			counter[ SELF ] += elapsed - frame[ 0 ]
+			counter[ BYTES ] += size
+
+			if stack:
+				parent = stack[ -1 ]
+				parent[ 0 ] += elapsed
+				parent[ 2 ] += clock() - start - elapsed
+
+				if not isinstance( result, dict ):
+					parent[ 1 ] += size
+
+			return result
+
+		return counted
+
+
+	def visit( self, node, lean = False ):
+		"""
+		Serializes node as the ASTTableSerializer, or with
+		lean, the ASTLeanSerializer would, counting every call.
+		The counts only go in if the whole tree serializes; a
+		tree too deep to recurse through raises RuntimeError
+		and leaves the counters as they were.
+		"""
+		dispatch = self.dispatches.get( lean )
+
+		if dispatch is None:
+			reference = Reference()
+			visit = lambda node: ASTSerializer.visit( reference, node )
+			fallback = ( lambda node: reduce( visit( node ) ) ) if lean else visit
+
+			dispatch = self.dispatches[ lean ] = build( lean, self.wrap( None, fallback ), self.wrap )
+			reference.dispatch = dispatch
+
+		del self.stack[ : ]
+		self.pending.clear()
+		result = dispatch[ node.__class__ ]( node )
+
+		self.merge( self.pending )
+		return result
+
+
+	def merge( self, counters ):
+		for key, values in counters.iteritems():
+			counter = self.counters.get( key )
+
+			if counter is None:
+				counter = self.counters[ key ] = [ 0, 0.0, 0.0, 0 ]
+
+			for i, value in enumerate( values ):
+				counter[ i ] += value
+
+
+	def reset( self ):
+		"""
+		Clears the counters, and returns what they were.
+		"""
+		counters = dict( ( key, list( values ) ) for key, values in self.counters.iteritems() )
+		self.counters.clear()
+		return counters
+
+
+	def dump( self ):
+		return json.dumps( dict(
+			( key, { "calls": calls, "time": elapsed, "self": own, "bytes": size } )
+			for key, ( calls, elapsed, own, size ) in self.counters.iteritems()
+		), sort_keys = True )
+
+
+	def table( self ):
+		"""
+		Returns the counters as a text table, the visitors
+		with the most time of their own first.
+		"""
+		rows = sorted( self.counters.iteritems(), key = lambda item: ( -item[ 1 ][ SELF ], item[ 0 ] ) )
+		lines = [ "%-24s %10s %12s %12s %10s %14s" % ( 'visitor', 'calls', 'time ms', 'self ms', 'us/call', 'bytes' ) ]
+		total = [ 0, 0.0, 0 ]
+
+		for key, ( calls, elapsed, own, size ) in rows:
+			lines.append( "%-24s %10d %12.2f %12.2f %10.2f %14d" % ( key, calls, elapsed * 1000, own * 1000, own * 1e6 / calls if calls else 0.0, size ) )
+			total[ 0 ] += calls
+			total[ 1 ] += own
+			total[ 2 ] += size
+
+		lines.append( "%-24s %10d %12s %12.2f %10s %14d" % ( 'total', total[ 0 ], '', total[ 1 ] * 1000, '', total[ 2 ] ) )
+		return '\n'.join( lines )
@@ -0,0 +1,132 @@
+import json
+
+from Serializer import ASTSerializer
+from Iterative import Token, SEPARATOR, CLOSE_OBJECT, CLOSE_ARRAY
+
+
+
+class Pending:
+	"""
+	Stands in for a child node that has not been
+	serialized yet.
+	"""
+
+	__slots__ = ( 'node', )
+
+	def __init__( self, node ):
+		self.node = node
+
+
+
+class Recorder:
+	"""
+	Writes to a file-like object, and keeps a copy of
+	everything written, for the cache.
+	"""
+
+	def __init__( self, out ):
+		self.out = out
+		self.chunks = []
+
+
+	def write( self, text ):
+		self.out.write( text )
+		self.chunks.append( text )
+
+
+	def getvalue( self ):
+		return ''.join( self.chunks )
+
+
+
+class ASTStreamSerializer( ASTSerializer ):
+	"""
+	The ASTStreamSerializer writes the same JSON as
+	json.dumps( ASTSerializer().visit( tree ) ), but
+	emits it token by token while walking the tree.
+
+	Each visit_ method is reused as is: children are
+	returned as Pending placeholders instead of being
+	visited, so only one shallow dict is held per level
+	and peak memory is bounded by the depth of the tree,
+	and the pending children along it.
+	Because each shallow dict has the same keys as the
+	one the ASTSerializer would build, inserted in the
+	same order, its keys iterate in the same order too.
+	"""
+
+	def __init__( self, encoding = 'utf-8' ):
+		"""
+		encoding is that of the byte strings in the
+		tree, which is the encoding of the source.
+		"""
+		self.scalar = json.JSONEncoder( encoding = encoding ).encode
+
+
+	def visit( self, node ):
+		return Pending( node )
+
+
+	def expand( self, node ):
+		return ASTSerializer.visit( self, node )
+
+
+	def dump( self, node, out ):
+		self.write( self.expand( node ), out.write )
+
+
+	def write( self, value, write ):
+		"""
+		Writes a value with an explicit stack rather than by
+		recursion, as Iterative.dumps does, so that trees of
+		any depth can be streamed; children are expanded as
+		they come off the stack.
+		"""
+		scalar = self.scalar
+		stack = [ value ]
+		pop = stack.pop
+		push = stack.append
+
+		while stack:
+			value = pop()
+
+			if value.__class__ is Token:
+				write( value.text )
+				continue
+
+			if isinstance( value, Pending ):
+				value = self.expand( value.node )
+
+			if isinstance( value, dict ):
+				if not value:
+					write( '{}' )
+					continue
+
+				write( '{' )
+				push( CLOSE_OBJECT )
+				items = value.items()
+
+				for i in xrange( len( items ) - 1, -1, -1 ):
+					key, item = items[ i ]
+					push( item )
+					push( Token( ( ', ' if i else '' ) + scalar( key ) + ': ' ) )
+
+			elif isinstance( value, (list, tuple) ):
+				if not value:
+					write( '[]' )
+					continue
+
+				write( '[' )
+				push( CLOSE_ARRAY )
+
+				for i in xrange( len( value ) - 1, -1, -1 ):
+					push( value[ i ] )
+
+					if i:
+						push( SEPARATOR )
+
+			elif value is None or isinstance( value, (basestring, bool, int, long, float) ):
+				write( scalar( value ) )
+
+			else:
+				raise TypeError( repr( value ) + " is not JSON serializable" )
@@ -0,0 +1,351 @@
+import os
+import ast
+import json
+import errno
+import hashlib
+import tempfile
+import multiprocessing
+
+from Cache import GRAMMAR
+from Batch import collect
+import Source
+
+
+# the version of the records, which are kept by the digest of a source
+VERSION = "2"
+
+DEFINITIONS = ( 'ClassDef', 'FunctionDef', 'AsyncFunctionDef' )
+IMPORTS = ( 'Import', 'ImportFrom' )
+
+
+
+def module( filepath ):
+	"""
+	Returns the dotted name a file is imported by,
+	going up through the packages that hold it.
+	"""
+	directory, name = os.path.split( os.path.abspath( filepath ) )
+	name = os.path.splitext( name )[ 0 ]
+	parts = [] if name == '__init__' else [ name ]
+
+	while os.path.isfile( os.path.join( directory, '__init__.py' ) ):
+		directory, package = os.path.split( directory )
+		parts.insert( 0, package )
+
+	return '.'.join( parts )
+
+
+def resolve( name, level, filepath ):
+	"""
+	Returns the absolute name of the module a from
+	import in filepath names, level dots up.
+	"""
+	if not level:
+		return name
+
+	parts = module( filepath ).split( '.' )
+
+	if os.path.splitext( os.path.basename( filepath ) )[ 0 ] != '__init__':
+		parts = parts[ :-1 ]
+
+	parts = parts[ :len( parts ) - ( level - 1 ) ] if level > 1 else parts
+	return '.'.join( [ part for part in parts if part ] + ( [ name ] if name else [] ) )
+
+
+def symbols( tree, filepath ):
+	"""
+	Returns the symbols of an ast tree: a record for
+	every class and function defined at module or class
+	level, including under compound statements such as
+	if or try, with its module and the name it is
+	qualified by in it, and for every name imported, at
+	any depth, with the module it comes from, each with
+	the line it is on. The tree is walked with a stack,
+	statements only, since expressions hold none.
+	"""
+	records = []
+	name = module( filepath )
+	pending = [ ( tree, '', False ) ]
+
+	while pending:
+		node, scope, local = pending.pop()
+		kind = node.__class__.__name__
+
+		if kind in DEFINITIONS and not local:
+			records.append({
+				"type": kind,
+				"name": node.name,
+				"qualname": scope + node.name,
+				"module": name,
+				"filepath": filepath,
+				"line": node.lineno
+			})
+
+		elif kind in IMPORTS:
+			source = resolve( node.module, node.level, filepath ) if kind == 'ImportFrom' else None
+
+			for alias in node.names:
+				records.append({
+					"type": kind,
+					"name": alias.name,
+					"asname": alias.asname,
+					"module": alias.name if source is None else source,
+					"filepath": filepath,
+					"line": node.lineno
+				})
+
+		if kind == 'ClassDef':
+			scope = scope + node.name + '.'
+		elif kind in DEFINITIONS:
+			local = True
+
+		children = [ child for child in ast.iter_child_nodes( node ) if isinstance( child, (ast.stmt, ast.excepthandler) ) ]
+		pending.extend( ( child, scope, local ) for child in reversed( children ) )
+
+	records.sort( key = lambda record: record[ "line" ] )
+	return records
+
+
+def digest( source ):
+	"""
+	Identifies the symbols of a source: they only change
+	with it, the grammar or the version of the records.
+	The source is hashed as it is, bytes or memory map.
+	"""
+	hashed = hashlib.sha1()
+	hashed.update( GRAMMAR.encode( 'ascii' ) )
+	hashed.update( b'\0' )
+	hashed.update( VERSION.encode( 'ascii' ) )
+	hashed.update( b'\0' )
+	hashed.update( source )
+	return hashed.hexdigest()
+
+
+def extract( filepath ):
+	"""
+	Pool worker. Returns the file, the digest of its
+	content and its symbols, which are empty if it does
+	not parse, or a None digest if it cannot be read.
+	"""
+	try:
+		source = Source.load( filepath )
+
+	except (OSError, IOError):
+		return filepath, None, []
+
+	try:
+		tree = ast.parse( source, filepath )
+
+	except (SyntaxError, TypeError, ValueError):
+		return filepath, digest( source ), []
+
+	return filepath, digest( source ), symbols( tree, filepath )
+
+
+
+class ASTSymbols:
+	"""
+	This module keeps a persistent, project wide index of
+	symbols: the classes and functions of every file, at
+	module and class level, and its imports, wherever they
+	are. Records are stored in a directory by name and by
+	module, so that finding where a class is defined, or
+	who imports a module, reads one entry rather than
+	parsing anything. update() only parses the files whose
+	content changed since they were indexed, in parallel,
+	and replaces their records; files that went away are
+	dropped. The index has a single writer at a time.
+	"""
+
+
+	def __init__( self, directory, jobs = None ):
+		self.directory = directory
+		self.jobs = jobs or multiprocessing.cpu_count()
+		self.entries = {}
+		self.indexed = 0
+		self.unchanged = 0
+		self.removed = 0
+
+
+	def path( self, kind, key ):
+		key = hashlib.sha1( key.encode( 'utf-8' ) if isinstance( key, unicode ) else key ).hexdigest()
+		return os.path.join( self.directory, kind, key[ :2 ], key + '.json' )
+
+
+	def load( self, path ):
+		"""
+		Returns the entry at path, or an empty one. Entries
+		loaded for an update are kept until it is flushed.
+		"""
+		if path in self.entries:
+			return self.entries[ path ]
+
+		try:
+			f = open( path, 'r' )
+			entry = json.load( f )
+			f.close()
+
+		except (OSError, IOError, ValueError):
+			entry = {}
+
+		return entry
+
+
+	def hold( self, path ):
+		entry = self.entries[ path ] = self.load( path )
+		return entry
+
+
+	def update( self, patterns ):
+		"""
+		Brings the index up to date with the files the
+		patterns expand to (see Batch.collect), and drops
+		the files indexed before that no longer exist.
+		"""
+		changed = []
+
+		for filepath in collect( patterns ):
+			filepath = os.path.abspath( filepath )
+			entry = self.load( self.path( 'files', filepath ) )
+
+			try:
+				current = digest( Source.load( filepath ) )
+			except (OSError, IOError):
+				continue
+
+			if entry.get( "digest" ) == current:
+				self.unchanged += 1
+			else:
+				changed.append( filepath )
+
+		for filepath in self.recorded():
+			if not os.path.exists( filepath ):
+				self.forget( filepath )
+				self.removed += 1
+
+		if self.jobs == 1 or len( changed ) < 2:
+			results = map( extract, changed )
+		else:
+			pool = multiprocessing.Pool( self.jobs )
+
+			try:
+				results = pool.map( extract, changed, max( 1, min( 64, len( changed ) // ( self.jobs * 4 ) ) ) )
+				pool.close()
+
+			except:
+				pool.terminate()
+				raise
+
+			finally:
+				pool.join()
+
+		for filepath, current, records in results:
+			if current is not None:
+				self.record( filepath, current, records )
+				self.indexed += 1
+
+		self.flush()
+
+
+	def record( self, filepath, current, records ):
+		self.forget( filepath )
+
+		for record in records:
+			for kind in ( 'names', 'modules' ):
+				key = record[ "name" if kind == 'names' else "module" ]
+				self.hold( self.path( kind, key ) ).setdefault( filepath, [] ).append( record )
+
+		self.hold( self.path( 'files', filepath ) ).update({
+			"filepath": filepath,
+			"digest": current,
+			"symbols": records
+		})
+
+
+	def forget( self, filepath ):
+		"""
+		Removes the records of a file from the index.
+		"""
+		entry = self.hold( self.path( 'files', filepath ) )
+
+		for record in entry.get( "symbols", [] ):
+			self.hold( self.path( 'names', record[ "name" ] ) ).pop( filepath, None )
+			self.hold( self.path( 'modules', record[ "module" ] ) ).pop( filepath, None )
+
+		entry.clear()
+
+
+	def recorded( self ):
+		"""
+		Returns every file in the index.
+		"""
+		found = []
+
+		for root, dirs, files in os.walk( os.path.join( self.directory, 'files' ) ):
+			for name in files:
+				if name.endswith( '.json' ):
+					found.append( self.load( os.path.join( root, name ) ).get( "filepath" ) )
+
+		return [ filepath for filepath in found if filepath ]
+
+
+	def flush( self ):
+		"""
+		Writes the entries changed by an update; entries
+		left empty are removed.
+		"""
+		for path, entry in self.entries.items():
+			if not entry:
+				try:
+					os.remove( path )
+				except OSError:
+					pass
+
+				continue
+
+			directory = os.path.dirname( path )
+
+			try:
+				os.makedirs( directory )
+			except OSError as e:
+				if e.errno != errno.EEXIST:
+					raise
+
+			handle, temporary = tempfile.mkstemp( dir = directory, suffix = '.tmp' )
+			f = os.fdopen( handle, 'w' )
+			json.dump( entry, f )
+			f.close()
+			os.rename( temporary, path )
+
+		self.entries = {}
+
+
+	def find( self, name = None, module = None, types = None ):
+		"""
+		Returns the records of a name, or of a module, in
+		file and line order, optionally only those of the
+		given types: a definition records the module it is
+		in, and an import the module it imports from.
+		"""
+		entry = self.load( self.path( 'names', name ) if name is not None else self.path( 'modules', module ) )
+		found = []
+
+		for filepath in sorted( entry ):
+			found.extend(
+				record for record in entry[ filepath ]
+				if ( types is None or record[ "type" ] in types ) and ( module is None or record[ "module" ] == module )
+			)
+
+		return found
+
+
+	def definitions( self, name ):
+		return self.find( name = name, types = DEFINITIONS )
+
+
+	def importers( self, module ):
+		return self.find( module = module, types = IMPORTS )
+
+
+	def report( self ):
+		return "symbols: %d files indexed, %d unchanged, %d removed" % ( self.indexed, self.unchanged, self.removed )
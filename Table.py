@@ -0,0 +1,286 @@
+import ast
+
+from Serializer import ASTSerializer
+
+
+# -------- field kinds --------
+
+RAW = 'raw'				# guard( node, field )
+NODE = 'node'			# guard( node, field, f = self.visit )
+NODES = 'nodes'			# guard( node, field, f = lambda x : map( self.visit, x ) )
+ATTR = 'attr'			# node.field
+VISIT = 'visit'			# self.visit( node.field )
+MAP = 'map'				# map( self.visit, node.field )
+HAS_VISIT = 'has_visit'	# self.visit( node.field ) if hasattr( node, field ) else None
+HAS_MAP = 'has_map'		# map( self.visit, node.field ) if hasattr( node, field ) else None
+ZIP = 'zip'				# zip( NODES( first ), NODES( second ) )
+
+# -------- position and docstring kinds --------
+
+NONE = None				# key is left out
+GUARD = 'guard'			# { 'line': guard( node, "lineno" ) }
+LINE = 'line'			# { 'line': node.lineno }
+ZERO = 'zero'			# { 'line': 0 }
+FALSE = 'false'			# False
+DOCSTRING = 'docstring'	# ast.get_docstring( node )
+
+
+# Mirrors the visit_ methods of the ASTSerializer, field for field and
+# in the same key order:
+#
+#	node class: ( expr, type, ( ( key, kind, field ), ... ), position, docstring )
+#
+# Visitors whose output depends on more than their fields (visit_Slice,
+# visit_Raise, visit_withitem), and nodes without a visitor, are not in
+# the table and are handed to the ASTSerializer itself.
+
+FIELDS = {
+
+	# -------- Literals --------
+
+	'Num': ( 'Literal', 'Number', ( ( 'value', RAW, 'n' ), ), GUARD, NONE ),
+	'Str': ( 'Literal', 'String', ( ( 'value', RAW, 's' ), ), GUARD, FALSE ),
+	'Bytes': ( 'Literal', 'Bytes', ( ( 'value', RAW, 's' ), ), GUARD, FALSE ),
+	'List': ( 'Literal', 'List', ( ( 'value', NODES, 'elts' ), ), GUARD, FALSE ),
+	'Tuple': ( 'Literal', 'Tuple', ( ( 'value', NODES, 'elts' ), ), GUARD, FALSE ),
+	'Set': ( 'Literal', 'Set', ( ( 'value', NODES, 'elts' ), ), GUARD, FALSE ),
+	'Dict': ( 'Literal', 'Dict', ( ( 'value', ZIP, ( 'keys', 'values' ) ), ), GUARD, FALSE ),
+	'Ellipsis': ( 'Literal', 'Ellipsis', (), GUARD, FALSE ),
+	'NameConstant': ( 'Literal', 'NameConstant', ( ( 'value', RAW, 'value' ), ), GUARD, FALSE ),
+
+	# -------- Variables --------
+
+	'Name': ( 'Variable', 'Name', ( ( 'line', RAW, 'id' ), ), GUARD, FALSE ),
+	'Starred': ( 'Variable', 'Starred', ( ( 'value', NODE, 'value' ), ), GUARD, FALSE ),
+
+	# -------- Expressions --------
+
+	'Expr': ( 'Expression', 'Expr', ( ( 'value', NODE, 'value' ), ), LINE, FALSE ),
+	'UnaryOp': ( 'Expression', 'UnaryOp', ( ( 'operator', NODE, 'op' ), ( 'operand', NODE, 'operand' ) ), LINE, FALSE ),
+	'BinOp': ( 'Expression', 'BinOp', ( ( 'operator', NODE, 'op' ), ( 'left', NODE, 'left' ), ( 'right', NODE, 'right' ) ), LINE, FALSE ),
+	'BoolOp': ( 'Expression', 'BoolOp', ( ( 'operator', NODE, 'op' ), ( 'values', NODES, 'values' ) ), LINE, FALSE ),
+	'Compare': ( 'Expression', 'Compare', ( ( 'left', NODE, 'left' ), ( 'operators', NODES, 'ops' ), ( 'comparators', NODES, 'comparators' ) ), LINE, FALSE ),
+	'Call': ( 'Expression', 'Call', ( ( 'function', NODE, 'func' ), ( 'args', NODES, 'args' ), ( 'keywords', NODES, 'keywords' ), ( 'starargs', NODE, 'starargs' ), ( 'kwargs', NODE, 'kwargs' ) ), LINE, FALSE ),
+	'keyword': ( 'Expression', 'keyword', ( ( 'arg', RAW, 'arg' ), ( 'value', NODE, 'value' ) ), NONE, FALSE ),
+	'IfExp': ( 'Expression', 'IfExp', ( ( 'test', NODE, 'test' ), ( 'consequent', NODE, 'body' ), ( 'alternate', NODE, 'orelse' ) ), LINE, FALSE ),
+	'Attribute': ( 'Expression', 'Attribute', ( ( 'value', NODE, 'value' ), ( 'attribute', RAW, 'attr' ) ), LINE, FALSE ),
+
+	# -------- Subscripting --------
+
+	'Subscript': ( 'Subscript', 'Subscript', ( ( 'value', NODE, 'value' ), ( 'slice', NODE, 'slide' ) ), LINE, FALSE ),
+	'Index': ( 'Subscript', 'Index', ( ( 'value', VISIT, 'value' ), ), LINE, FALSE ),
+	'ExtSlice': ( 'Subscript', 'Slice', ( ( 'dims', MAP, 'dims' ), ), LINE, FALSE ),
+
+	# -------- Comprehensions --------
+
+	'ListComp': ( 'Comprehension', 'SetComp', ( ( 'element', VISIT, 'elt' ), ( 'generators', MAP, 'generators' ) ), LINE, FALSE ),
+	'GeneratorExp': ( 'Comprehension', 'GeneratorExp', ( ( 'element', VISIT, 'elt' ), ( 'generators', MAP, 'generators' ) ), LINE, FALSE ),
+	'DictComp': ( 'Comprehension', 'GeneratorExp', ( ( 'key', VISIT, 'key' ), ( 'value', VISIT, 'value' ), ( 'generators', MAP, 'generators' ) ), LINE, FALSE ),
+	'comprehension': ( 'Comprehension', 'Comprehension', ( ( 'target', NODE, 'target' ), ( 'iter', NODE, 'iter' ), ( 'ifs', NODES, 'ifs' ) ), NONE, FALSE ),
+
+	# -------- Statements --------
+
+	'Assign': ( 'Statement', 'Assign', ( ( 'targets', MAP, 'targets' ), ( 'value', VISIT, 'value' ) ), LINE, FALSE ),
+	'AugAssign': ( 'Statement', 'AugAssign', ( ( 'target', VISIT, 'target' ), ( 'operator', VISIT, 'op' ), ( 'value', VISIT, 'value' ) ), LINE, FALSE ),
+	'Print': ( 'Statement', 'Print', ( ( 'dest', NODE, 'dest' ), ( 'values', NODES, 'values' ), ( 'newline', ATTR, 'nl' ) ), LINE, FALSE ),
+	'Assert': ( 'Statement', 'Assert', ( ( 'test', VISIT, 'dest' ), ( 'msg', VISIT, 'value' ) ), LINE, FALSE ),
+	'Delete': ( 'Statement', 'Delete', ( ( 'targets', MAP, 'targets' ), ), LINE, FALSE ),
+	'Pass': ( 'Statement', 'Pass', (), LINE, FALSE ),
+
+	# -------- Imports --------
+
+	'Import': ( 'Import', 'Import', ( ( 'names', MAP, 'names' ), ), LINE, FALSE ),
+	'ImportFrom': ( 'Import', 'ImportFrom', ( ( 'module', ATTR, 'module' ), ( 'names', NODES, 'names' ), ( 'level', ATTR, 'level' ) ), LINE, FALSE ),
+	'alias': ( 'Import', 'ImportFrom', ( ( 'name', ATTR, 'name' ), ( 'asname', ATTR, 'asname' ) ), NONE, FALSE ),
+
+	# -------- ControlFlow --------
+
+	'If': ( 'ControlFlow', 'If', ( ( 'test', VISIT, 'test' ), ( 'consequent', MAP, 'body' ), ( 'alternate', MAP, 'orelse' ) ), LINE, FALSE ),
+	'For': ( 'ControlFlow', 'For', ( ( 'target', VISIT, 'target' ), ( 'iter', VISIT, 'iter' ), ( 'body', MAP, 'body' ), ( 'orelse', MAP, 'orelse' ) ), LINE, FALSE ),
+	'While': ( 'ControlFlow', 'While', ( ( 'test', VISIT, 'test' ), ( 'body', MAP, 'body' ), ( 'orelse', MAP, 'orelse' ) ), LINE, FALSE ),
+	'Break': ( 'ControlFlow', 'Break', (), LINE, FALSE ),
+	'Continue': ( 'ControlFlow', 'Continue', (), LINE, FALSE ),
+	'Try': ( 'ControlFlow', 'Try', ( ( 'body', NODES, 'body' ), ( 'handlers', NODES, 'handlers' ), ( 'orelse', NODES, 'orelse' ), ( 'finalbody', NODES, 'finalbody' ) ), LINE, FALSE ),
+	'TryFinally': ( 'ControlFlow', 'TryFinally', ( ( 'body', NODES, 'body' ), ( 'finalbody', NODES, 'finalbody' ) ), LINE, FALSE ),
+	'TryExcept': ( 'ControlFlow', 'TryExcept', ( ( 'body', NODES, 'body' ), ( 'handlers', NODES, 'handlers' ), ( 'orelse', NODES, 'orelse' ) ), LINE, FALSE ),
+	'ExceptHandler': ( 'ControlFlow', 'ExceptHandler', ( ( 'exnType', NODE, 'type' ), ( 'name', ATTR, 'name' ), ( 'body', NODES, 'body' ) ), LINE, FALSE ),
+	'With': ( 'ControlFlow', 'With', ( ( 'items', NODES, 'items' ), ( 'body', NODES, 'body' ) ), LINE, FALSE ),
+
+	# -------- Function and Module Definitions --------
+
+	'FunctionDef': ( 'Definitions', 'FunctionDef', ( ( 'name', ATTR, 'name' ), ( 'args', VISIT, 'args' ), ( 'body', MAP, 'body' ), ( 'decorators', MAP, 'decorator_list' ), ( 'returns', HAS_VISIT, 'returns' ) ), LINE, DOCSTRING ),
+	'Lambda': ( 'Definitions', 'Lambda', ( ( 'args', VISIT, 'args' ), ( 'body', VISIT, 'body' ) ), LINE, FALSE ),
+	'arguments': ( 'Definitions', 'Arguments', ( ( 'args', MAP, 'args' ), ( 'kwonlyargs', HAS_MAP, 'kwonlyargs' ), ( 'vararg', ATTR, 'vararg' ), ( 'kwarg', ATTR, 'kwarg' ), ( 'defaults', MAP, 'defaults' ), ( 'kw_defaults', HAS_MAP, 'kw_defaults' ) ), NONE, FALSE ),
+	'arg': ( 'Definitions', 'arg', ( ( 'arg', ATTR, 'arg' ), ( 'annotation', VISIT, 'annotation' ) ), NONE, FALSE ),
+	'Return': ( 'Definitions', 'Return', ( ( 'value', VISIT, 'value' ), ), LINE, FALSE ),
+	'Yield': ( 'Definitions', 'Yield', ( ( 'value', VISIT, 'value' ), ), LINE, FALSE ),
+	'YieldFrom': ( 'Definitions', 'YieldFrom', ( ( 'value', VISIT, 'value' ), ), LINE, FALSE ),
+	'Global': ( 'Definitions', 'Global', ( ( 'names', ATTR, 'names' ), ), LINE, FALSE ),
+	'Nonlocal': ( 'Definitions', 'Nonlocal', ( ( 'names', ATTR, 'names' ), ), LINE, FALSE ),
+	'ClassDef': ( 'Definitions', 'ClassDef', ( ( 'name', ATTR, 'name' ), ( 'bases', MAP, 'bases' ), ( 'keywords', HAS_MAP, 'keywords' ), ( 'starargs', HAS_VISIT, 'starargs' ), ( 'kwargs', HAS_VISIT, 'kwargs' ), ( 'body', MAP, 'body' ), ( 'decorator_list', MAP, 'decorator_list' ) ), LINE, DOCSTRING ),
+	'Module': ( 'Definitions', 'Module', ( ( 'body', MAP, 'body' ), ), ZERO, DOCSTRING ),
+}
+
+
+OPERATORS = {
+	'UAdd': "+", 'USub': "-", 'Not': "!", 'Invert': "~",
+	'Add': "+", 'Sub': "-", 'Mult': "*", 'Div': "/", 'FloorDiv': "/", 'Mod': "%", 'Pow': "**",
+	'LShift': "<<", 'RShift': ">>", 'BitOr': "|", 'BitXor': "^", 'BitAnd': "&",
+	'And': "&&", 'Or': "||",
+	'Eq': "==", 'NotEq': "!=", 'Lt': "<", 'Gt': ">", 'GtE': ">=", 'LtE': "<=",
+	'Is': "is", 'IsNot': "is not", 'In': "in", 'NotIn': "not in",
+}
+
+
+
+def generate( name, spec, lean = False ):
+	"""
+	Writes the source of the serializer function for one
+	node class. Values are computed into locals first, then
+	returned as a single dict display with the keys in the
+	order of the visit_ method, so that the dict is laid
+	out, and iterates, exactly like the one it replaces.
+
+	With lean, the function produces the lean profile
+	instead (see Lean.py): the position is the line itself,
+	and a docstring is only present when there is one.
+	"""
+	expr, kind, fields, position, docstring = spec
+	lines = [ 'def serialize_%s( node ):' % name ]
+	entries = [ '"expr": %r' % expr, '"type": %r' % kind ]
+
+	for i, ( key, how, field ) in enumerate( fields ):
+		value = 'v%d' % i
+
+		if how == RAW:
+			lines.append( '\t%s = getattr( node, %r, None )' % ( value, field ) )
+
+		elif how == NODE:
+			lines.append( '\t%s = getattr( node, %r, None )' % ( value, field ) )
+			lines.append( '\tif %s is not None: %s = dispatch[ %s.__class__ ]( %s )' % ( value, value, value, value ) )
+
+		elif how == NODES:
+			lines.append( '\t%s = getattr( node, %r, None )' % ( value, field ) )
+			lines.append( '\tif %s is not None: %s = [ dispatch[ x.__class__ ]( x ) for x in %s ]' % ( value, value, value ) )
+
+		elif how == ATTR:
+			lines.append( '\t%s = node.%s' % ( value, field ) )
+
+		elif how == VISIT:
+			lines.append( '\t%s = node.%s' % ( value, field ) )
+			lines.append( '\t%s = dispatch[ %s.__class__ ]( %s )' % ( value, value, value ) )
+
+		elif how == MAP:
+			lines.append( '\t%s = [ dispatch[ x.__class__ ]( x ) for x in node.%s ]' % ( value, field ) )
+
+		elif how == HAS_VISIT:
+			lines.append( '\tif hasattr( node, %r ): %s = node.%s; %s = dispatch[ %s.__class__ ]( %s )' % ( field, value, field, value, value, value ) )
+			lines.append( '\telse: %s = None' % value )
+
+		elif how == HAS_MAP:
+			lines.append( '\t%s = [ dispatch[ x.__class__ ]( x ) for x in node.%s ] if hasattr( node, %r ) else None' % ( value, field, field ) )
+
+		elif how == ZIP:
+			pair = []
+
+			for j, part in enumerate( field ):
+				item = '%s_%d' % ( value, j )
+				lines.append( '\t%s = getattr( node, %r, None )' % ( item, part ) )
+				lines.append( '\tif %s is not None: %s = [ dispatch[ x.__class__ ]( x ) for x in %s ]' % ( item, item, item ) )
+				pair.append( item )
+
+			lines.append( '\t%s = zip( %s )' % ( value, ', '.join( pair ) ) )
+
+		else:
+			raise ValueError( "unknown field kind %r for %s.%s" % ( how, name, key ) )
+
+		entries.append( '%r: %s' % ( key, value ) )
+
+	line = { GUARD: 'getattr( node, "lineno", None )', LINE: 'node.lineno', ZERO: '0' }.get( position )
+
+	if line is not None:
+		entries.append( ( '"position": %s' if lean else '"position": { "line": %s }' ) % line )
+
+	if docstring == FALSE and not lean:
+		entries.append( '"docstring": False' )
+
+	elif docstring == DOCSTRING and not lean:
+		entries.append( '"docstring": get_docstring( node )' )
+
+	elif docstring == DOCSTRING:
+		lines.append( '\tresult = { %s }' % ', '.join( entries ) )
+		lines.append( '\tdocstring = get_docstring( node )' )
+		lines.append( '\tif docstring is not None: result[ "docstring" ] = docstring' )
+		lines.append( '\treturn result' )
+		return '\n'.join( lines ) + '\n'
+
+	lines.append( '\treturn { %s }' % ', '.join( entries ) )
+	return '\n'.join( lines ) + '\n'
+
+
+class Dispatch( dict ):
+	"""
+	Maps node classes to their serializer functions.
+	Classes without one are handed to the fallback,
+	by default the ASTSerializer.
+	"""
+
+	def __init__( self, fallback = None ):
+		dict.__init__( self )
+		self.fallback = fallback or ASTSerializer().visit
+
+	def __missing__( self, cls ):
+		return self.fallback
+
+
+def build( lean = False, fallback = None, wrap = None ):
+	"""
+	Compiles the serializer functions for every node
+	class in the table and returns the dispatch dict,
+	keyed by node class. This runs once per profile,
+	when the module that needs it is first imported.
+
+	wrap( name, function ), if given, replaces every
+	function before it goes in the dispatch dict, and
+	so sees every call, children included (see Stats.py).
+	"""
+	dispatch = Dispatch( fallback )
+	namespace = { 'dispatch': dispatch, 'get_docstring': ast.get_docstring }
+
+	for name, spec in FIELDS.iteritems():
+		cls = getattr( ast, name, None )
+
+		if cls is None:
+			continue
+
+		exec( compile( generate( name, spec, lean ), "<Table %s>" % name, "exec" ), namespace )
+		dispatch[ cls ] = namespace[ 'serialize_' + name ]
+
+	for name, symbol in OPERATORS.iteritems():
+		cls = getattr( ast, name, None )
+
+		if cls is not None:
+			dispatch[ cls ] = lambda node, symbol = symbol: symbol
+
+	if wrap is not None:
+		for cls, function in dispatch.items():
+			dispatch[ cls ] = wrap( 'visit_' + cls.__name__, function )
+
+	return dispatch
+
+
+DISPATCH = build()
+
+
+
+class ASTTableSerializer:
+	"""
+	The ASTTableSerializer produces the same output as
+	the ASTSerializer, using serializer functions compiled
+	once from the FIELDS table: dispatch is a dict lookup
+	on the node class, and each field is fetched once,
+	without a guard call or a lambda per field.
+	"""
+
+	def visit( self, node ):
+		return DISPATCH[ node.__class__ ]( node )
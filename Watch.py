@@ -0,0 +1,457 @@
+import os
+import sys
+import json
+import time
+import stat
+import errno
+import select
+import struct
+import hashlib
+
+try:
+	import ctypes
+	import ctypes.util
+except ImportError:
+	ctypes = None
+
+
+# inotify(7) events, as linux numbers them
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# wd, mask, cookie and the length of the name that follows
+EVENT = struct.Struct( 'iIII' )
+
+
+
+def walk( directory ):
+	"""
+	Walks a directory as os.walk does, in order, leaving
+	out hidden directories, such as .git.
+	"""
+	for root, dirs, files in os.walk( directory ):
+		dirs[ : ] = sorted( name for name in dirs if not name.startswith( '.' ) )
+		yield root, dirs, files
+
+
+def digest( filepath ):
+	"""
+	Returns the sha1 of the content of a file.
+	"""
+	hashed = hashlib.sha1()
+	f = open( filepath, 'rb' )
+
+	try:
+		for chunk in iter( lambda: f.read( 1 << 20 ), b'' ):
+			hashed.update( chunk )
+
+	finally:
+		f.close()
+
+	return hashed.hexdigest()
+
+
+def libc():
+	"""
+	Returns the C library, if it has inotify, or None.
+	"""
+	if ctypes is None or not sys.platform.startswith( 'linux' ):
+		return None
+
+	try:
+		library = ctypes.CDLL( ctypes.util.find_library( 'c' ) or 'libc.so.6', use_errno = True )
+
+	except OSError:
+		return None
+
+	if not hasattr( library, 'inotify_init' ) or not hasattr( library, 'inotify_add_watch' ):
+		return None
+
+	library.inotify_add_watch.argtypes = [ ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32 ]
+	library.inotify_rm_watch.argtypes = [ ctypes.c_int, ctypes.c_int ]
+	return library
+
+
+
+class Inotify:
+	"""
+	Watches every directory under a root through inotify,
+	and tells which files and directories in them changed.
+	"""
+
+
+	def __init__( self, library ):
+		self.library = library
+		self.fd = library.inotify_init()
+		self.directories = {}
+
+		if self.fd < 0:
+			error = ctypes.get_errno()
+			raise OSError( error, os.strerror( error ) )
+
+
+	def fileno( self ):
+		return self.fd
+
+
+	def add( self, directory ):
+		"""
+		Watches a directory and every one under it. Raises
+		OSError if one cannot be watched, as when there are
+		more than the system allows.
+		"""
+		for root, dirs, files in walk( directory ):
+			wd = self.library.inotify_add_watch( self.fd, root, MASK )
+
+			if wd < 0:
+				error = ctypes.get_errno()
+
+				if error in ( errno.ENOENT, errno.ENOTDIR ):
+					continue
+
+				raise OSError( error, os.strerror( error ), root )
+
+			self.directories[ wd ] = root
+
+
+	def remove( self, directory ):
+		"""
+		Stops watching a directory that went away or was
+		moved, and every one under it.
+		"""
+		prefix = os.path.join( directory, '' )
+
+		for wd, path in self.directories.items():
+			if path == directory or path.startswith( prefix ):
+				self.library.inotify_rm_watch( self.fd, wd )
+				del self.directories[ wd ]
+
+
+	def read( self ):
+		"""
+		Reads the events pending, and returns the files and
+		the directories they name, and whether events were
+		lost, in which case anything may have changed.
+		"""
+		data = os.read( self.fd, 1 << 16 )
+		files = set()
+		directories = set()
+		lost = False
+		offset = 0
+
+		while offset + EVENT.size <= len( data ):
+			wd, mask, cookie, length = EVENT.unpack_from( data, offset )
+			name = data[ offset + EVENT.size : offset + EVENT.size + length ].rstrip( b'\0' )
+			offset += EVENT.size + length
+
+			if mask & IN_Q_OVERFLOW:
+				lost = True
+				continue
+
+			if mask & IN_IGNORED:
+				self.directories.pop( wd, None )
+				continue
+
+			directory = self.directories.get( wd )
+
+			if directory is None or not name:
+				continue
+
+			path = os.path.join( directory, name )
+
+			if not mask & IN_ISDIR:
+				files.add( path )
+				continue
+
+			if mask & ( IN_DELETE | IN_MOVED_FROM ):
+				self.remove( path )
+
+			if mask & ( IN_CREATE | IN_MOVED_TO ):
+				self.add( path )
+
+			directories.add( path )
+
+		return files, directories, lost
+
+
+	def close( self ):
+		os.close( self.fd )
+
+
+
+class ASTWatch:
+	"""
+	This module keeps the results of an ASTBatch up to date
+	with the source files under a root. It holds a snapshot
+	of the mtime, size and sha1 of every file, and on each
+	change stats the files that may have changed, hashing
+	only those whose mtime or size moved, so that a file
+	touched but not changed is not parsed again. Changes are
+	found through inotify where it is available, or else by
+	stating every file each interval seconds.
+
+	Changes come in bursts, as when a branch is checked out,
+	so after the first one, changes are gathered until none
+	has come for delay seconds, or for at most wait seconds,
+	and the files added or modified are then parsed in one
+	run of the batch, in parallel; everything is parsed on
+	the first run. Removed files get a removal record on the
+	stream, { "success", "message", "filepath", "removed" },
+	or have their result deleted from the output directory.
+	"""
+
+
+	def __init__( self, root, batch, interval = 1.0, delay = 0.2, wait = 2.0, notify = True, extension = '.py' ):
+		self.root = root
+		self.batch = batch
+		self.interval = interval
+		self.delay = delay
+		self.wait = wait
+		self.notify = notify
+		self.extension = extension
+		self.snapshot = {}
+		self.notifier = None
+		self.added = 0
+		self.modified = 0
+		self.removed = 0
+
+
+	def start( self ):
+		"""
+		Sets up inotify, if asked for and available.
+		"""
+		library = libc() if self.notify else None
+
+		if library is None:
+			return
+
+		try:
+			self.notifier = Inotify( library )
+			self.notifier.add( self.root )
+
+		except OSError:
+			self.stop()
+
+
+	def stop( self ):
+		if self.notifier is not None:
+			self.notifier.close()
+			self.notifier = None
+
+
+	def run( self, stream = sys.stdout, log = sys.stderr ):
+		self.start()
+
+		try:
+			self.update( self.scan(), stream, log )
+
+			while True:
+				self.update( self.settle( self.next() ), stream, log )
+
+		except KeyboardInterrupt:
+			pass
+
+		finally:
+			self.stop()
+
+
+	def files( self, directory ):
+		found = []
+
+		for root, dirs, files in walk( directory ):
+			found.extend( os.path.join( root, name ) for name in files if name.endswith( self.extension ) )
+
+		return found
+
+
+	def entry( self, filepath, before ):
+		"""
+		Returns the ( mtime, size, sha1 ) of a file, hashing
+		it only if its mtime or size is not those of before,
+		or None if it is not there.
+		"""
+		try:
+			status = os.stat( filepath )
+
+			if not stat.S_ISREG( status.st_mode ):
+				return None
+
+			if before is not None and before[ :2 ] == ( status.st_mtime, status.st_size ):
+				return before
+
+			return ( status.st_mtime, status.st_size, digest( filepath ) )
+
+		except (OSError, IOError):
+			return None
+
+
+	def scan( self, files = None, directories = () ):
+		"""
+		Brings the snapshot up to date with the given files
+		and the files under the given directories, or with
+		every file under the root if files is None. Returns
+		the files whose content changed, each with its entry
+		from before, or None if it was not there.
+		"""
+		if files is None:
+			candidates = set( self.files( self.root ) ) | set( self.snapshot )
+		else:
+			candidates = set( filepath for filepath in files if filepath.endswith( self.extension ) )
+
+			for directory in directories:
+				prefix = os.path.join( directory, '' )
+				candidates.update( self.files( directory ) )
+				candidates.update( filepath for filepath in self.snapshot if filepath.startswith( prefix ) )
+
+		changed = {}
+
+		for filepath in candidates:
+			before = self.snapshot.get( filepath )
+			after = self.entry( filepath, before )
+
+			if after is None:
+				self.snapshot.pop( filepath, None )
+			else:
+				self.snapshot[ filepath ] = after
+
+			if ( before and before[ 2 ] ) != ( after and after[ 2 ] ):
+				changed[ filepath ] = before
+
+		return changed
+
+
+	def changes( self, timeout ):
+		"""
+		Waits up to timeout seconds, or with inotify, for as
+		long as it takes if timeout is None, and returns whether
+		anything happened under the root, as far as can be told,
+		and the files that changed (see scan()).
+		"""
+		if self.notifier is None:
+			time.sleep( self.interval if timeout is None else timeout )
+			changed = self.scan()
+			return bool( changed ), changed
+
+		try:
+			readable, _, _ = select.select( [ self.notifier ], [], [], timeout )
+
+		except select.error as e:
+			if e.args[ 0 ] == errno.EINTR:
+				return False, {}
+
+			raise
+
+		if not readable:
+			return False, {}
+
+		try:
+			files, directories, lost = self.notifier.read()
+
+		except OSError:
+			# a directory could not be watched: fall back to polling
+			self.stop()
+			return True, self.scan()
+
+		return True, self.scan() if lost else self.scan( files, directories )
+
+
+	def next( self ):
+		"""
+		Waits for the first change of a burst.
+		"""
+		while True:
+			happened, changed = self.changes( None )
+
+			if changed:
+				return changed
+
+
+	def settle( self, changed ):
+		"""
+		Gathers the rest of a burst into changed, keeping
+		the entry each file had before the burst.
+		"""
+		deadline = time.time() + self.wait
+
+		while True:
+			timeout = min( self.delay, deadline - time.time() )
+
+			if timeout <= 0:
+				return changed
+
+			happened, more = self.changes( timeout )
+
+			for filepath, before in more.iteritems():
+				changed.setdefault( filepath, before )
+
+			if not happened:
+				return changed
+
+
+	def update( self, changed, stream, log ):
+		"""
+		Parses the files a burst added or modified, and
+		records the ones it removed.
+		"""
+		added = []
+		modified = []
+		removed = []
+
+		for filepath, before in changed.iteritems():
+			after = self.snapshot.get( filepath )
+
+			if before is None and after is not None:
+				added.append( filepath )
+			elif before is not None and after is None:
+				removed.append( filepath )
+			elif before is not None and before[ 2 ] != after[ 2 ]:
+				modified.append( filepath )
+
+		if not added and not modified and not removed:
+			return
+
+		start = time.time()
+		parsed, failed = self.batch.parsed, self.batch.failed
+
+		if added or modified:
+			# paths as they are: a name may hold glob characters
+			self.batch.run( stream, files = sorted( added + modified ) )
+
+		for filepath in sorted( removed ):
+			self.remove( filepath, stream )
+
+		stream.flush()
+
+		self.added += len( added )
+		self.modified += len( modified )
+		self.removed += len( removed )
+
+		log.write( "watch: %d added, %d modified, %d removed; parsed %d files, %d failed in %.2fs\n" % ( len( added ), len( modified ), len( removed ), self.batch.parsed - parsed, self.batch.failed - failed, time.time() - start ) )
+		log.flush()
+
+
+	def remove( self, filepath, stream ):
+		if self.batch.output is None:
+			stream.write( json.dumps({
+				"success": True,
+				"message": None,
+				"filepath": filepath,
+				"removed": True
+			}) + '\n' )
+			return
+
+		try:
+			os.remove( self.batch.target( filepath ) )
+
+		except OSError as e:
+			if e.errno != errno.ENOENT:
+				raise
@@ -0,0 +1,196 @@
+"""
+Plane geometry helpers.
+
+Points are plain ( x, y ) tuples of floats, segments are pairs of
+points and polygons are lists of points in counter clockwise order.
+None of the functions here modify their arguments; every one of them
+returns a new value.
+
+The functions are written for clarity rather than speed, and are meant
+for the small polygons found in floor plans and site outlines, where
+a few hundred vertices is a lot.
+"""
+import math
+
+
+EPSILON = 1e-9
+
+
+def distance( a, b ):
+	"""
+	Returns the euclidean distance between the points a and b.
+
+	>>> distance( ( 0.0, 0.0 ), ( 3.0, 4.0 ) )
+	5.0
+	"""
+	return math.hypot( b[ 0 ] - a[ 0 ], b[ 1 ] - a[ 1 ] )
+
+
+def cross( o, a, b ):
+	"""
+	Returns the z component of the cross product of the vectors
+	o -> a and o -> b. It is positive when o, a, b turn counter
+	clockwise, negative when they turn clockwise, and zero when
+	the three points are collinear.
+	"""
+	return ( a[ 0 ] - o[ 0 ] ) * ( b[ 1 ] - o[ 1 ] ) - ( a[ 1 ] - o[ 1 ] ) * ( b[ 0 ] - o[ 0 ] )
+
+
+def area( polygon ):
+	"""
+	Returns the signed area of a polygon with the shoelace formula.
+
+	The area is positive for counter clockwise polygons and negative
+	for clockwise ones, which makes it a cheap orientation test too.
+	Self intersecting polygons give the difference of the areas of
+	their clockwise and counter clockwise parts.
+	"""
+	total = 0.0
+	count = len( polygon )
+
+	for i in range( count ):
+		x0, y0 = polygon[ i ]
+		x1, y1 = polygon[ ( i + 1 ) % count ]
+		total += x0 * y1 - x1 * y0
+
+	return total / 2.0
+
+
+def centroid( polygon ):
+	"""
+	Returns the centroid of a simple polygon.
+
+	For a degenerate polygon, whose area is zero, the mean of its
+	vertices is returned instead, so that the result is always a
+	point somewhere near the input.
+	"""
+	surface = area( polygon )
+	count = len( polygon )
+
+	if abs( surface ) < EPSILON:
+		return ( sum( x for x, y in polygon ) / count, sum( y for x, y in polygon ) / count )
+
+	cx = cy = 0.0
+
+	for i in range( count ):
+		x0, y0 = polygon[ i ]
+		x1, y1 = polygon[ ( i + 1 ) % count ]
+		factor = x0 * y1 - x1 * y0
+		cx += ( x0 + x1 ) * factor
+		cy += ( y0 + y1 ) * factor
+
+	return ( cx / ( 6.0 * surface ), cy / ( 6.0 * surface ) )
+
+
+def hull( points ):
+	"""
+	Returns the convex hull of a set of points, counter clockwise,
+	starting from the lowest leftmost point, with Andrew's monotone
+	chain algorithm.
+
+	Collinear points on the edges of the hull are left out. Fewer
+	than three distinct points are returned as they are, sorted.
+	"""
+	points = sorted( set( points ) )
+
+	if len( points ) < 3:
+		return points
+
+	lower = []
+	for p in points:
+		while len( lower ) >= 2 and cross( lower[ -2 ], lower[ -1 ], p ) <= 0:
+			lower.pop()
+		lower.append( p )
+
+	upper = []
+	for p in reversed( points ):
+		while len( upper ) >= 2 and cross( upper[ -2 ], upper[ -1 ], p ) <= 0:
+			upper.pop()
+		upper.append( p )
+
+	lower.pop()
+	upper.pop()
+	return lower + upper
+
+
+def contains( polygon, point ):
+	"""
+	Tells whether a point lies inside a polygon, by casting a ray
+	to the right of the point and counting the edges it crosses.
+
+	Points exactly on an edge may be reported either way; callers
+	that care should test against the edges with on_segment first.
+	"""
+	x, y = point
+	inside = False
+	count = len( polygon )
+
+	for i in range( count ):
+		x0, y0 = polygon[ i ]
+		x1, y1 = polygon[ ( i + 1 ) % count ]
+
+		if ( y0 > y ) != ( y1 > y ) and x < ( x1 - x0 ) * ( y - y0 ) / ( y1 - y0 ) + x0:
+			inside = not inside
+
+	return inside
+
+
+def on_segment( segment, point ):
+	"""
+	Tells whether a point lies on a segment, within EPSILON.
+	"""
+	a, b = segment
+	return abs( cross( a, b, point ) ) < EPSILON and min( a[ 0 ], b[ 0 ] ) - EPSILON <= point[ 0 ] <= max( a[ 0 ], b[ 0 ] ) + EPSILON and min( a[ 1 ], b[ 1 ] ) - EPSILON <= point[ 1 ] <= max( a[ 1 ], b[ 1 ] ) + EPSILON
+
+
+class Box( object ):
+	"""
+	An axis aligned bounding box.
+
+	Boxes are used to reject far away geometry before running the
+	exact tests above. An empty box, made with no points, contains
+	nothing and intersects nothing.
+
+	Attributes:
+		left, bottom, right, top: the bounds of the box, floats.
+	"""
+
+	def __init__( self, points = () ):
+		"""
+		Makes the smallest box holding every point given.
+		"""
+		xs = [ p[ 0 ] for p in points ]
+		ys = [ p[ 1 ] for p in points ]
+		self.empty = not xs
+		self.left = min( xs ) if xs else 0.0
+		self.right = max( xs ) if xs else 0.0
+		self.bottom = min( ys ) if ys else 0.0
+		self.top = max( ys ) if ys else 0.0
+
+	def width( self ):
+		"""
+		Returns the horizontal extent of the box, zero when empty.
+		"""
+		return self.right - self.left
+
+	def height( self ):
+		"""
+		Returns the vertical extent of the box, zero when empty.
+		"""
+		return self.top - self.bottom
+
+	def contains( self, point ):
+		"""
+		Tells whether a point lies inside the box or on its border.
+		"""
+		return not self.empty and self.left <= point[ 0 ] <= self.right and self.bottom <= point[ 1 ] <= self.top
+
+	def intersects( self, other ):
+		"""
+		Tells whether two boxes overlap. Boxes that only share
+		part of their border do intersect.
+		"""
+		if self.empty or other.empty:
+			return False
+
+		return self.left <= other.right and other.left <= self.right and self.bottom <= other.top and other.bottom <= self.top
@@ -0,0 +1,126 @@
+# Generated by benchmarks/generate.py, do not edit.
+def blocks( value ):
+	if value > 1:
+		if value > 2:
+			if value > 3:
+				if value > 4:
+					if value > 5:
+						if value > 6:
+							if value > 7:
+								if value > 8:
+									if value > 9:
+										if value > 10:
+											if value > 11:
+												if value > 12:
+													if value > 13:
+														if value > 14:
+															if value > 15:
+																if value > 16:
+																	if value > 17:
+																		if value > 18:
+																			if value > 19:
+																				if value > 20:
+																					if value > 21:
+																						if value > 22:
+																							if value > 23:
+																								if value > 24:
+																									if value > 25:
+																										if value > 26:
+																											if value > 27:
+																												if value > 28:
+																													if value > 29:
+																														if value > 30:
+																															if value > 31:
+																																if value > 32:
+																																	if value > 33:
+																																		if value > 34:
+																																			if value > 35:
+																																				if value > 36:
+																																					if value > 37:
+																																						if value > 38:
+																																							if value > 39:
+																																								value = value - 1
+	return value
+
+nested_0 = lambda x: { 'column': [ { 'page': [ ( ( [ { 'client': { 'order': ( ( ( { 'frame': { 'order': ( [ ( { 'limit': { 'region': ( frame( ( { 'session': { 'buffer': x } } + 2 ) ) + 4 ) } } + 7 ), 8 ] + 9 ) } } + 12 ) + 13 ) + 14 ) } }, 17 ] + 18 ) + 19 ), 20 ] }, 22 ] }
+nested_1 = lambda x: key( [ header( { 'offset': [ { 'result': [ { 'channel': [ ( { 'index': ( { 'queue': { 'node': ( { 'path': shard( [ result( { 'table': { 'token': ( { 'event': { 'layer': x } } + 2 ) } } ), 6 ] ) } + 9 ) } } + 12 ) } + 14 ), 15 ] }, 17 ] }, 19 ] } ), 22 ] )
+nested_2 = lambda x: [ [ frame( job( record( batch( [ { 'handle': [ limit( [ [ item( { 'filter': ( frame( [ [ [ { 'stream': session( [ [ ( [ { 'row': [ [ ( { 'limit': { 'event': { 'limit': { 'layer': ( ( { 'node': { 'frame': [ row( [ ( { 'event': handle( [ ( ( { 'source': { 'field': ( batch( ( token( { 'task': ( { 'table': [ [ account( x ), 1 ], 2 ] } + 4 ) } ) + 7 ) ) + 9 ) } } + 12 ) + 13 ), 14 ] ) } + 17 ), 18 ] ), 20 ] } } + 23 ) + 24 ) } } } } + 29 ), 30 ], 31 ] }, 33 ] + 34 ), 35 ], 36 ] ) }, 39 ], 40 ], 41 ] ) + 43 ) } ), 46 ], 47 ] ), 49 ] }, 51 ] ) ) ) ), 56 ], 57 ]
+nested_3 = lambda x: [ { 'node': [ ( ( [ ( ( ( { 'page': buffer( [ { 'value': event( [ { 'table': { 'field': { 'source': { 'client': token( { 'account': ( node( [ filter( item( ( [ x, 0 ] + 1 ) ) ), 4 ] ) + 6 ) } ) } } } }, 13 ] ) }, 16 ] ) } + 19 ) + 20 ) + 21 ), 22 ] + 23 ) + 24 ), 25 ] }, 27 ]
+nested_4 = lambda x: { 'node': { 'channel': [ ( index( [ { 'source': { 'schema': [ ( [ [ { 'record': { 'state': ( { 'client': [ ( job( ( { 'state': [ [ [ ( batch( path( [ ( { 'layer': ( limit( schema( { 'frame': limit( [ [ record( [ schema( [ ( x + 0 ), 1 ] ), 3 ] ), 5 ], 6 ] ) } ) ) + 11 ) } + 13 ), 14 ] ) ) + 17 ), 18 ], 19 ], 20 ] } + 22 ) ) + 24 ), 25 ] } + 27 ) } }, 30 ], 31 ] + 32 ), 33 ] } }, 36 ] ) + 38 ), 39 ] } }
+nested_5 = lambda x: handle( [ region( ( config( ( { 'batch': ( [ buffer( [ ( [ message( { 'schema': ( { 'offset': ( ( offset( account( { 'index': ( [ { 'channel': entry( [ [ table( message( ( session( ( ( [ offset( ( { 'key': path( x ) } + 2 ) ), 4 ] + 5 ) + 6 ) ) + 8 ) ) ), 11 ], 12 ] ) }, 15 ] + 16 ) } ) ) + 20 ) + 21 ) } + 23 ) } ), 26 ] + 27 ), 28 ] ), 30 ] + 31 ) } + 33 ) ) + 35 ) ), 37 ] )
+nested_6 = lambda x: { 'node': { 'item': { 'schema': ( [ [ ( [ handle( batch( region( client( ( { 'limit': [ key( { 'value': value( token( { 'client': { 'cache': ( header( [ { 'offset': ( [ session( limit( ( item( channel( field( ( buffer( { 'token': { 'session': [ ( x + 0 ), 1 ] } } ) + 5 ) ) ) ) + 9 ) ) ), 12 ] + 13 ) }, 15 ] ) + 17 ) } } ) ) } ), 24 ] } + 26 ) ) ) ) ), 31 ] + 32 ), 33 ], 34 ] + 35 ) } } }
+nested_7 = lambda x: result( { 'task': ( ( field( { 'batch': { 'schema': [ ( ( entry( message( [ ( schema( { 'job': { 'limit': shard( [ { 'queue': [ ( { 'event': { 'header': ( filter( { 'frame': offset( [ ( page( limit( row( buffer( [ x, 0 ] ) ) ) ) + 5 ), 6 ] ) } ) + 10 ) } } + 13 ), 14 ] }, 16 ] ) } } ) + 21 ), 22 ] ) ) + 25 ) + 26 ), 27 ] } } ) + 31 ) + 32 ) } )
+nested_8 = lambda x: ( cursor( token( { 'region': { 'cache': [ { 'cursor': { 'handle': node( { 'stream': { 'job': ( queue( [ { 'value': [ batch( { 'handle': job( ( page( [ [ ( { 'row': { 'event': [ batch( [ item( [ { 'token': order( [ ( [ [ ( [ page( { 'state': { 'shard': ( { 'key': [ ( ( { 'event': [ { 'order': ( { 'limit': ( [ [ { 'buffer': [ [ key( ( x + 0 ) ), 2 ], 3 ] }, 5 ], 6 ] + 7 ) } + 9 ) }, 11 ] } + 13 ) + 14 ), 15 ] } + 17 ) } } ), 21 ] + 22 ), 23 ], 24 ] + 25 ), 26 ] ) }, 29 ] ), 31 ] ), 33 ] } } + 36 ), 37 ], 38 ] ) + 40 ) ) } ), 44 ] }, 46 ] ) + 48 ) } } ) } }, 54 ] } } ) ) + 59 )
+nested_9 = lambda x: ( cursor( [ { 'result': table( ( ( index( ( ( ( { 'buffer': ( channel( column( ( entry( queue( config( [ { 'item': ( { 'key': [ { 'batch': handle( frame( ( ( handle( ( ( { 'message': ( [ { 'stream': filter( ( ( ( [ ( ( x + 0 ) + 1 ), 2 ] + 3 ) + 4 ) + 5 ) ) }, 8 ] + 9 ) } + 11 ) + 12 ) ) + 14 ) + 15 ) ) ) }, 19 ] } + 21 ) }, 23 ] ) ) ) + 27 ) ) ) + 30 ) } + 32 ) + 33 ) + 34 ) ) + 36 ) + 37 ) ) }, 40 ] ) + 42 )
+nested_10 = lambda x: ( [ [ ( ( ( { 'key': ( [ [ [ batch( ( ( ( ( { 'key': column( { 'item': [ { 'filter': item( [ [ [ { 'buffer': { 'record': ( [ ( token( ( ( state( [ [ { 'job': job( key( [ { 'header': [ path( ( schema( [ ( [ ( x + 0 ), 1 ] + 2 ), 3 ] ) + 5 ) ), 7 ] }, 9 ] ) ) }, 13 ], 14 ] ) + 16 ) + 17 ) ) + 19 ), 20 ] + 21 ) } }, 24 ], 25 ], 26 ] ) }, 29 ] } ) } + 33 ) + 34 ) + 35 ) + 36 ) ), 38 ], 39 ], 40 ] + 41 ) } + 43 ) + 44 ) + 45 ), 46 ], 47 ] + 48 )
+nested_11 = lambda x: frame( [ state( { 'queue': [ session( item( schema( [ { 'account': ( ( [ ( ( ( result( { 'batch': [ region( [ { 'page': ( { 'client': channel( ( ( { 'entry': [ ( frame( batch( ( config( [ ( [ config( { 'layer': [ [ ( { 'node': shard( ( x + 0 ) ) } + 3 ), 4 ], 5 ] } ), 8 ] + 9 ), 10 ] ) + 12 ) ) ) + 15 ), 16 ] } + 18 ) + 19 ) ) } + 22 ) }, 24 ] ), 26 ] } ) + 29 ) + 30 ) + 31 ), 32 ] + 33 ) + 34 ) }, 36 ] ) ) ), 40 ] } ), 43 ] )
+nested_12 = lambda x: ( path( { 'region': [ key( ( ( [ [ entry( offset( { 'page': ( { 'layer': result( { 'filter': [ [ schema( ( { 'queue': result( ( ( { 'result': { 'result': x } } + 2 ) + 3 ) ) } + 6 ) ), 8 ], 9 ] } ) } + 13 ) } ) ), 17 ], 18 ] + 19 ) + 20 ) ), 22 ] } ) + 25 )
+nested_13 = lambda x: { 'event': ( { 'cache': ( { 'client': [ { 'node': { 'header': index( value( [ row( { 'filter': [ [ ( limit( session( ( ( { 'value': [ ( [ config( { 'node': result( ( [ [ { 'limit': { 'item': session( task( [ [ x, 0 ], 1 ] ) ) } }, 6 ], 7 ] + 8 ) ) } ), 12 ] + 13 ), 14 ] } + 16 ) + 17 ) ) ) + 20 ), 21 ], 22 ] } ), 25 ] ) ) } }, 30 ] } + 32 ) } + 34 ) }
+nested_14 = lambda x: { 'message': page( [ [ row( ( [ [ { 'source': ( { 'result': { 'cache': { 'row': ( [ value( ( [ { 'schema': [ { 'region': [ { 'queue': { 'channel': ( ( { 'entry': x } + 1 ) + 2 ) } }, 5 ] }, 7 ] }, 9 ] + 10 ) ), 12 ] + 13 ) } } } + 17 ) }, 19 ], 20 ] + 21 ) ), 23 ], 24 ] ) }
+nested_15 = lambda x: { 'key': cache( { 'event': { 'value': { 'limit': state( [ [ ( [ [ { 'client': token( [ ( ( cache( { 'column': [ row( ( ( ( x + 0 ) + 1 ) + 2 ) ), 4 ] } ) + 7 ) + 8 ), 9 ] ) }, 12 ], 13 ] + 14 ), 15 ], 16 ] ) } } } ) }
+nested_16 = lambda x: ( ( ( [ ( message( [ ( { 'task': { 'queue': ( key( ( { 'node': order( node( source( order( ( { 'account': [ ( [ ( value( [ { 'offset': state( [ client( row( record( [ { 'filter': path( entry( token( { 'limit': schema( ( limit( { 'job': ( { 'task': [ [ x, 0 ], 1 ] } + 3 ) } ) + 6 ) ) } ) ) ) }, 13 ] ) ) ), 17 ] ) }, 20 ] ) + 22 ), 23 ] + 24 ), 25 ] } + 27 ) ) ) ) ) } + 33 ) ) + 35 ) } } + 38 ), 39 ] ) + 41 ), 42 ] + 43 ) + 44 ) + 45 )
+nested_17 = lambda x: value( [ { 'batch': [ entry( handle( ( header( header( ( item( ( [ { 'value': ( ( [ { 'limit': handle( ( ( offset( row( x ) ) + 2 ) + 3 ) ) }, 6 ] + 7 ) + 8 ) }, 10 ] + 11 ) ) + 13 ) ) ) + 16 ) ) ), 19 ] }, 21 ] )
+nested_18 = lambda x: ( ( [ [ ( [ job( ( [ { 'session': { 'cache': task( client( ( { 'session': { 'order': { 'account': { 'row': [ ( ( [ { 'cache': { 'cache': order( ( { 'handle': state( header( result( ( [ ( ( ( [ value( { 'value': { 'handle': ( ( ( { 'header': ( { 'source': ( [ { 'column': { 'queue': [ stream( header( shard( ( { 'handle': ( ( { 'message': x } + 1 ) + 2 ) } + 4 ) ) ) ), 8 ] } }, 11 ] + 12 ) } + 14 ) } + 16 ) + 17 ) + 18 ) } } ), 22 ] + 23 ) + 24 ) + 25 ), 26 ] + 27 ) ) ) ) } + 32 ) ) } }, 36 ] + 37 ) + 38 ), 39 ] } } } } + 44 ) ) ) } }, 49 ] + 50 ) ), 52 ] + 53 ), 54 ], 55 ] + 56 ) + 57 )
+nested_19 = lambda x: [ ( ( [ session( value( event( { 'page': { 'event': ( [ { 'entry': ( header( cursor( [ { 'path': [ ( table( { 'account': [ { 'handle': { 'table': ( ( [ [ ( { 'schema': [ { 'stream': [ ( stream( [ [ key( { 'queue': { 'channel': { 'handle': ( session( column( page( x ) ) ) + 3 ) } } } ), 8 ], 9 ] ) + 11 ), 12 ] }, 14 ] } + 16 ), 17 ], 18 ] + 19 ) + 20 ) } }, 23 ] } ) + 26 ), 27 ] }, 29 ] ) ) + 32 ) }, 34 ] + 35 ) } } ) ) ), 41 ] + 42 ) + 43 ), 44 ]
+
+def level_0( a, b ):
+	c = a + b * 0
+	class Level1( object ):
+		c = a + b * 1
+		def level_2( a, b ):
+			c = a + b * 2
+			class Level3( object ):
+				c = a + b * 3
+				def level_4( a, b ):
+					c = a + b * 4
+					class Level5( object ):
+						c = a + b * 5
+						def level_6( a, b ):
+							c = a + b * 6
+							class Level7( object ):
+								c = a + b * 7
+								def level_8( a, b ):
+									c = a + b * 8
+									class Level9( object ):
+										c = a + b * 9
+										def level_10( a, b ):
+											c = a + b * 10
+											class Level11( object ):
+												c = a + b * 11
+												def level_12( a, b ):
+													c = a + b * 12
+													class Level13( object ):
+														c = a + b * 13
+														def level_14( a, b ):
+															c = a + b * 14
+															class Level15( object ):
+																c = a + b * 15
+																def level_16( a, b ):
+																	c = a + b * 16
+																	class Level17( object ):
+																		c = a + b * 17
+																		def level_18( a, b ):
+																			c = a + b * 18
+																			class Level19( object ):
+																				c = a + b * 19
+																				def level_20( a, b ):
+																					c = a + b * 20
+																					class Level21( object ):
+																						c = a + b * 21
+																						def level_22( a, b ):
+																							c = a + b * 22
+																							class Level23( object ):
+																								c = a + b * 23
+																								def level_24( a, b ):
+																									c = a + b * 24
+																									class Level25( object ):
+																										c = a + b * 25
+																										def level_26( a, b ):
+																											c = a + b * 26
+																											class Level27( object ):
+																												c = a + b * 27
+																												def level_28( a, b ):
+																													c = a + b * 28
+																													class Level29( object ):
+																														c = a + b * 29
+																														pass
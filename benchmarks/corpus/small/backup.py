@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+import shutil
+import getopt
+
+
+def snapshot( source, target, keep ):
+	stamp = time.strftime( '%Y%m%d-%H%M%S' )
+	destination = os.path.join( target, os.path.basename( source.rstrip( os.sep ) ) + '-' + stamp )
+
+	shutil.copytree( source, destination, symlinks = True )
+	sys.stderr.write( "copied %s to %s\n" % ( source, destination ) )
+
+	previous = sorted( name for name in os.listdir( target ) if name.startswith( os.path.basename( source ) + '-' ) )
+
+	while len( previous ) > keep:
+		name = previous.pop( 0 )
+		shutil.rmtree( os.path.join( target, name ) )
+		sys.stderr.write( "removed %s\n" % name )
+
+	return destination
+
+
+def main( argv ):
+	keep = 7
+
+	try:
+		opts, args = getopt.getopt( argv[ 1: ], "k:", [ 'keep=' ] )
+	except getopt.GetoptError:
+		sys.stderr.write( "usage: backup.py [-k <count>] <source> <target>\n" )
+		return 2
+
+	for opt, arg in opts:
+		if opt in ( '-k', '--keep' ):
+			keep = int( arg )
+
+	if len( args ) != 2:
+		sys.stderr.write( "usage: backup.py [-k <count>] <source> <target>\n" )
+		return 2
+
+	if not os.path.isdir( args[ 1 ] ):
+		os.makedirs( args[ 1 ] )
+
+	snapshot( args[ 0 ], args[ 1 ], keep )
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit( main( sys.argv ) )
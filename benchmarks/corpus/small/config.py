@@ -0,0 +1,40 @@
+import os
+import json
+
+
+DEFAULTS = {
+	"host": "127.0.0.1",
+	"port": 8000,
+	"workers": 4,
+	"timeout": 30.0,
+	"debug": False,
+	"paths": {
+		"cache": "~/.cache/decodes",
+		"logs": "/var/log/decodes"
+	}
+}
+
+
+def merge( base, override ):
+	merged = dict( base )
+
+	for key, value in override.items():
+		if isinstance( value, dict ) and isinstance( merged.get( key ), dict ):
+			merged[ key ] = merge( merged[ key ], value )
+		else:
+			merged[ key ] = value
+
+	return merged
+
+
+def load( filepath = None ):
+	settings = dict( DEFAULTS )
+	filepath = filepath or os.environ.get( 'DECODES_CONFIG' )
+
+	if filepath and os.path.exists( filepath ):
+		f = open( filepath )
+		settings = merge( settings, json.load( f ) )
+		f.close()
+
+	settings[ "paths" ] = dict( ( key, os.path.expanduser( path ) ) for key, path in settings[ "paths" ].items() )
+	return settings
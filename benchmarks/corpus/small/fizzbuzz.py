@@ -0,0 +1,21 @@
+import sys
+
+
+RULES = [ ( 3, 'Fizz' ), ( 5, 'Buzz' ), ( 7, 'Bazz' ) ]
+
+
+def say( n, rules = RULES ):
+	words = ''.join( word for divisor, word in rules if n % divisor == 0 )
+	return words or str( n )
+
+
+def table( first, last ):
+	return dict( ( n, say( n ) ) for n in range( first, last + 1 ) )
+
+
+if __name__ == "__main__":
+	last = int( sys.argv[ 1 ] ) if len( sys.argv ) > 1 else 100
+	answers = table( 1, last )
+
+	for n in sorted( answers ):
+		sys.stdout.write( answers[ n ] + '\n' )
@@ -0,0 +1,28 @@
+import sys
+import collections
+
+
+def words( stream ):
+	for line in stream:
+		for word in line.split():
+			yield word.strip( '.,;:!?"\'()' ).lower()
+
+
+def main( argv ):
+	counts = collections.Counter()
+
+	for filepath in argv[ 1: ] or [ '-' ]:
+		stream = sys.stdin if filepath == '-' else open( filepath )
+		counts.update( word for word in words( stream ) if word )
+
+		if stream is not sys.stdin:
+			stream.close()
+
+	for word, count in counts.most_common( 20 ):
+		sys.stdout.write( "%8d %s\n" % ( count, word ) )
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit( main( sys.argv ) )
@@ -0,0 +1,101 @@
+"""
+Writes the generated part of the benchmark corpus: the deeply
+nested code, deeper than real code gets, to measure the cases
+that would overflow a recursive serializer. The rest of the
+corpus is real code. The output is fixed by the seed, and
+checked in, so that every revision is measured on the same
+files; run this again only to change the corpus on purpose.
+
+	python benchmarks/generate.py
+"""
+import os
+import random
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), 'corpus' )
+
+WORDS = (
+	'account', 'batch', 'buffer', 'cache', 'channel', 'client', 'column', 'config', 'cursor', 'entry',
+	'event', 'field', 'filter', 'frame', 'handle', 'header', 'index', 'item', 'job', 'key', 'layer',
+	'limit', 'message', 'node', 'offset', 'order', 'page', 'path', 'queue', 'record', 'region', 'result',
+	'row', 'schema', 'session', 'shard', 'source', 'state', 'stream', 'table', 'task', 'token', 'value',
+)
+
+HEADER = "# Generated by benchmarks/generate.py, do not edit.\n"
+
+
+def name( rng, parts = 2 ):
+	return '_'.join( rng.choice( WORDS ) for i in range( parts ) )
+
+
+def nested( rng ):
+	lines = []
+
+	# nested blocks
+	lines.append( 'def blocks( value ):' )
+	for depth in range( 1, 40 ):
+		lines.append( '\t' * depth + 'if value > %d:' % depth )
+	lines.append( '\t' * 40 + 'value = value - 1' )
+	lines.append( '\treturn value' )
+	lines.append( '' )
+
+	# nested calls, containers and parentheses
+	for i in range( 20 ):
+		depth = rng.randint( 20, 60 )
+		expr = 'x'
+
+		for j in range( depth ):
+			kind = rng.randint( 0, 3 )
+
+			if kind == 0:
+				expr = '%s( %s )' % ( name( rng, 1 ), expr )
+			elif kind == 1:
+				expr = '[ %s, %d ]' % ( expr, j )
+			elif kind == 2:
+				expr = '( %s + %d )' % ( expr, j )
+			else:
+				expr = '{ %r: %s }' % ( name( rng, 1 ), expr )
+
+		lines.append( 'nested_%d = lambda x: %s' % ( i, expr ) )
+
+	lines.append( '' )
+
+	# nested functions and classes
+	for depth in range( 30 ):
+		indent = '\t' * depth
+		lines.append( '%sdef level_%d( a, b ):' % ( indent, depth ) if depth % 2 == 0 else '%sclass Level%d( object ):' % ( indent, depth ) )
+		lines.append( '%s\tc = a + b * %d' % ( indent, depth ) )
+
+	lines.append( '\t' * 30 + 'pass' )
+	return lines
+
+
+def chain( terms ):
+	"""
+	One long binary operator chain: a left leaning tree as deep
+	as it is long, far past the recursion limit of the reference
+	serializer.
+	"""
+	return [ 'total = ' + ' + '.join( 'x%d' % ( i % 10 ) for i in range( terms ) ) ]
+
+
+def write( relative, lines ):
+	filepath = os.path.join( CORPUS, relative )
+	directory = os.path.dirname( filepath )
+
+	if not os.path.isdir( directory ):
+		os.makedirs( directory )
+
+	f = open( filepath, 'w' )
+	f.write( HEADER + '\n'.join( lines ) + '\n' )
+	f.close()
+
+
+def main():
+	rng = random.Random( 20160301 )
+	write( os.path.join( 'nested', 'blocks.py' ), nested( rng ) )
+	write( os.path.join( 'nested', 'chain.py' ), chain( 5000 ) )
+
+
+if __name__ == "__main__":
+	main()
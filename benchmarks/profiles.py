@@ -0,0 +1,79 @@
+"""
+Compares the full and lean output profiles over a set
+of files: the number of containers (dicts and lists)
+each allocates for its output, the size of its json,
+and the time it takes to serialize and encode.
+
+	python benchmarks/profiles.py [file|directory|glob ...]
+
+Without arguments the standard library is used.
+"""
+import os
+import sys
+import ast
+import json
+import time
+
+sys.path.insert( 0, os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir ) )
+
+from Batch import collect
+from Table import ASTTableSerializer
+from Lean import ASTLeanSerializer
+
+
+def containers( value ):
+	count = 0
+	pending = [ value ]
+
+	while pending:
+		value = pending.pop()
+
+		if isinstance( value, dict ):
+			count += 1
+			pending.extend( value.itervalues() )
+
+		elif isinstance( value, (list, tuple) ):
+			count += 1
+			pending.extend( value )
+
+	return count
+
+
+def main( argv ):
+	patterns = argv[ 1: ] or [ os.path.dirname( ast.__file__ ) ]
+	profiles = ( ( 'full', ASTTableSerializer ), ( 'lean', ASTLeanSerializer ) )
+	totals = dict( ( name, [ 0, 0, 0.0 ] ) for name, serializer in profiles )
+	files = 0
+
+	for filepath in collect( patterns ):
+		try:
+			f = open( filepath, 'r' )
+			tree = ast.parse( f.read() )
+			f.close()
+			json.dumps( ASTTableSerializer().visit( tree ) )
+		except Exception:
+			continue
+
+		for name, serializer in profiles:
+			start = time.time()
+			serialized = serializer().visit( tree )
+			encoded = json.dumps( serialized )
+			elapsed = time.time() - start
+
+			total = totals[ name ]
+			total[ 0 ] += containers( serialized )
+			total[ 1 ] += len( encoded )
+			total[ 2 ] += elapsed
+
+		files += 1
+
+	print "files: %d" % files
+	print "%-8s %14s %14s %10s" % ( 'profile', 'containers', 'json bytes', 'time' )
+
+	for name, serializer in profiles:
+		count, size, elapsed = totals[ name ]
+		print "%-8s %14d %14d %9.3fs" % ( name, count, size, elapsed )
+
+
+if __name__ == "__main__":
+	main( sys.argv )
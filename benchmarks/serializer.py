@@ -0,0 +1,80 @@
+"""
+Compares the ASTSerializer with the ASTTableSerializer
+and the ASTIterativeSerializer over a set of files,
+checking that all produce the same json, and reports
+the time each takes to serialize.
+
+	python benchmarks/serializer.py [file|directory|glob ...]
+
+Without arguments the standard library is used.
+"""
+import os
+import sys
+import ast
+import json
+import time
+
+sys.path.insert( 0, os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir ) )
+
+from Batch import collect
+from Serializer import ASTSerializer
+from Table import ASTTableSerializer
+from Iterative import ASTIterativeSerializer
+
+
+def trees( patterns ):
+	for filepath in collect( patterns ):
+		try:
+			f = open( filepath, 'r' )
+			tree = ast.parse( f.read() )
+			f.close()
+		except (IOError, SyntaxError, TypeError):
+			continue
+
+		try:
+			expected = json.dumps( ASTSerializer().visit( tree ) )
+		except Exception:
+			continue
+
+		yield filepath, tree, expected
+
+
+def measure( serializer, tree, repeat ):
+	best = None
+
+	for i in xrange( repeat ):
+		start = time.time()
+		serializer().visit( tree )
+		elapsed = time.time() - start
+		best = elapsed if best is None else min( best, elapsed )
+
+	return best
+
+
+def main( argv ):
+	patterns = argv[ 1: ] or [ os.path.dirname( ast.__file__ ) ]
+	serializers = ( ASTSerializer, ASTTableSerializer, ASTIterativeSerializer )
+	totals = dict( ( serializer, 0.0 ) for serializer in serializers )
+	files = 0
+
+	for filepath, tree, expected in trees( patterns ):
+		for serializer in serializers[ 1: ]:
+			if json.dumps( serializer().visit( tree ) ) != expected:
+				sys.stderr.write( "%s output differs: %s\n" % ( serializer.__name__, filepath ) )
+				sys.exit( 1 )
+
+		for serializer in serializers:
+			totals[ serializer ] += measure( serializer, tree, 3 )
+
+		files += 1
+
+	reference = totals[ ASTSerializer ]
+	print "files:                   %d" % files
+
+	for serializer in serializers:
+		elapsed = totals[ serializer ]
+		print "%-24s %.3fs  %.2fx" % ( serializer.__name__ + ':', elapsed, reference / elapsed if elapsed else 0.0 )
+
+
+if __name__ == "__main__":
+	main( sys.argv )
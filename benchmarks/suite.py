@@ -0,0 +1,262 @@
+"""
+Measures ASTParser.parse over the checked-in corpus in
+benchmarks/corpus: small scripts, large modules, deeply nested
+code and docstring heavy files, all real code but the nested
+(see generate.py). For each file, the time to read
+it, ast.parse it, serialize the tree and json encode the result
+is measured separately, as the best of a few repeats, along with
+the end to end parse() time, the peak memory of the process that
+did it, and the throughput in files/s and MB/s. The time to find
+the source ranges of a tree and index its lines (see Ranges.py),
+which parse() only spends with ranges, is measured as well, and
+left out of the end to end time, and so is the time to gzip the
+result at the default level (see Compression.py), along with the
+ratio it is compressed by. Reading the result back is compared too:
+json.loads of the json against Binary.decode of the binary encoding
+(see Binary.py), for files json.loads can read at all.
+
+	python benchmarks/suite.py [-n <repeats>] [-o <results.json>] [-c <previous.json>] [file|directory|glob ...]
+
+Results are written as json (benchmarks/results.json unless
+-o says otherwise), with the revision they were measured on.
+-c compares this run against an earlier results file, so
+regressions between revisions show up side by side. Each file
+is measured in a fresh process, so peak memory is its own.
+"""
+import os
+import sys
+import ast
+import json
+import time
+import getopt
+import platform
+import resource
+import subprocess
+import multiprocessing
+
+ROOT = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir )
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), 'corpus' )
+
+sys.path.insert( 0, ROOT )
+
+from Batch import collect
+from Cache import GRAMMAR
+from Parser import ASTParser
+import Ranges
+import Compression
+import Binary
+
+
+PHASES = ( 'read', 'parse', 'visit', 'dumps', 'ranges', 'compress', 'loads', 'decode' )
+
+
+def best( function, repeat ):
+	"""
+	Returns the shortest of repeat timings of function,
+	and what it returned the last time.
+	"""
+	fastest = None
+
+	for i in range( repeat ):
+		start = time.time()
+		value = function()
+		elapsed = time.time() - start
+		fastest = elapsed if fastest is None else min( fastest, elapsed )
+
+	return fastest, value
+
+
+def peak():
+	"""
+	Returns the peak resident memory of this process, in
+	kilobytes; ru_maxrss is in bytes on Mac OS X only.
+	"""
+	usage = resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+	return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def measure( task ):
+	"""
+	Runs in a worker of its own. Times every phase of
+	ASTParser.parse on one file, then parse() as a whole.
+	"""
+	filepath, repeat = task
+	parser = ASTParser( filepath )
+	before = peak()
+	absolute = os.path.abspath( filepath )
+
+	entry = {
+		"path": os.path.relpath( absolute, CORPUS ) if absolute.startswith( CORPUS + os.sep ) else filepath,
+		"bytes": os.path.getsize( filepath ),
+		"success": False
+	}
+
+	try:
+		entry[ "read" ], error = best( parser.read, repeat )
+
+		if error is not None:
+			raise IOError( error[ "message" ] )
+
+		entry[ "parse" ], tree = best( lambda: ast.parse( parser.quote ), repeat )
+		entry[ "visit" ], serialized = best( lambda: parser.serialize( tree ), repeat )
+		entry[ "dumps" ], encoded = best( lambda: parser.encode( serialized ), repeat )
+
+		# ranges are set in place, so each repeat gets a tree of its own
+		trees = [ ast.parse( parser.quote ) for i in range( repeat ) ]
+		entry[ "ranges" ], located = best( lambda: ( Ranges.index( parser.quote, parser.encoding ), Ranges.locate( trees.pop(), Ranges.view( parser.quote, parser.encoding ) ) ), repeat )
+		entry[ "total" ], result = best( ASTParser( filepath ).parse, repeat )
+		entry[ "compress" ], packed = best( lambda: Compression.compress( result ), repeat )
+
+		# json.loads recurses, and cannot read the nested corpus
+		try:
+			entry[ "loads" ], loaded = best( lambda: json.loads( result ), repeat )
+			binary = Binary.encode( loaded )
+			entry[ "decode" ], decoded = best( lambda: Binary.decode( binary ), repeat )
+
+		except (RuntimeError):
+			pass
+
+	except Exception as e:
+		entry[ "error" ] = "%s: %s" % ( e.__class__.__name__, e )
+		return entry
+
+	entry[ "success" ] = True
+	entry[ "output" ] = len( result )
+	entry[ "compressed" ] = len( packed )
+	entry[ "peak" ] = peak()
+	entry[ "growth" ] = entry[ "peak" ] - before
+	return entry
+
+
+def category( entry ):
+	parts = entry[ "path" ].split( os.sep )
+	return parts[ 0 ] if len( parts ) > 1 else 'other'
+
+
+def summarize( entries ):
+	measured = [ entry for entry in entries if entry[ "success" ] ]
+	summary = {
+		"files": len( measured ),
+		"failed": len( entries ) - len( measured ),
+		"bytes": sum( entry[ "bytes" ] for entry in measured ),
+		"output": sum( entry[ "output" ] for entry in measured ),
+		"compressed": sum( entry.get( "compressed", 0 ) for entry in measured ),
+		"peak": max( [ entry[ "peak" ] for entry in measured ] or [ 0 ] )
+	}
+
+	for phase in PHASES + ( 'total', ):
+		summary[ phase ] = sum( entry.get( phase, 0.0 ) for entry in measured )
+
+	elapsed = summary[ "total" ]
+	summary[ "files/s" ] = summary[ "files" ] / elapsed if elapsed else 0.0
+	summary[ "MB/s" ] = summary[ "bytes" ] / elapsed / 1e6 if elapsed else 0.0
+	summary[ "ratio" ] = summary[ "output" ] / float( summary[ "compressed" ] ) if summary[ "compressed" ] else 0.0
+	return summary
+
+
+def revision():
+	try:
+		process = subprocess.Popen( [ 'git', 'rev-parse', 'HEAD' ], cwd = ROOT, stdout = subprocess.PIPE, stderr = subprocess.PIPE )
+		output = process.communicate()[ 0 ].strip()
+		return output if process.returncode == 0 else None
+
+	except OSError:
+		return None
+
+
+def report( results, previous = None ):
+	columns = ( 'files', 'MB' ) + PHASES + ( 'total', 'files/s', 'MB/s', 'ratio', 'peak KB' )
+	print "%-12s" % 'category' + ''.join( "%10s" % column for column in columns )
+
+	for name, summary in sorted( results[ "categories" ].items() ) + [ ( 'all', results[ "summary" ] ) ]:
+		row = [ "%10d" % summary[ "files" ], "%10.2f" % ( summary[ "bytes" ] / 1e6 ) ]
+		row.extend( "%9.1fms" % ( summary[ phase ] * 1000 ) for phase in PHASES + ( 'total', ) )
+		row.extend([ "%10.1f" % summary[ "files/s" ], "%10.2f" % summary[ "MB/s" ], "%9.1fx" % summary.get( "ratio", 0.0 ), "%10d" % summary[ "peak" ] ])
+		print "%-12s" % name + ''.join( row )
+
+	for entry in results[ "files" ]:
+		if not entry[ "success" ]:
+			print "failed: %s (%s)" % ( entry[ "path" ], entry[ "error" ] )
+
+	if previous is None:
+		return
+
+	print
+	print "against %s:" % ( previous.get( "revision" ) or 'previous run' )
+	print "%-12s" % 'category' + ''.join( "%10s" % phase for phase in PHASES + ( 'total', 'peak' ) )
+
+	summaries = dict( previous[ "categories" ], all = previous[ "summary" ] )
+
+	for name, summary in sorted( results[ "categories" ].items() ) + [ ( 'all', results[ "summary" ] ) ]:
+		before = summaries.get( name )
+
+		if before is None:
+			continue
+
+		ratios = [ summary[ key ] / float( before[ key ] ) if before.get( key ) else 0.0 for key in PHASES + ( 'total', 'peak' ) ]
+		print "%-12s" % name + ''.join( "%9.2fx" % ratio for ratio in ratios )
+
+
+def main( argv ):
+	helpstring = "suite.py [-n <repeats>] [-o <results.json>] [-c <previous.json>] [file|directory|glob ...]"
+	repeat = 5
+	output = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), 'results.json' )
+	previous = None
+
+	try:
+		opts, args = getopt.getopt( argv[ 1: ], "hn:o:c:", [ 'repeat=', 'output=', 'compare=' ] )
+	except getopt.GetoptError:
+		print helpstring
+		sys.exit( 2 )
+
+	for opt, arg in opts:
+		if opt == '-h':
+			print helpstring
+			sys.exit()
+
+		elif opt in ( '-n', '--repeat' ):
+			repeat = int( arg )
+
+		elif opt in ( '-o', '--output' ):
+			output = arg
+
+		elif opt in ( '-c', '--compare' ):
+			f = open( arg, 'r' )
+			previous = json.load( f )
+			f.close()
+
+	files = collect( args or [ CORPUS ] )
+
+	# a fresh worker per file, so that peak memory is that file's alone
+	pool = multiprocessing.Pool( 1, maxtasksperchild = 1 )
+	entries = pool.map( measure, [ ( filepath, repeat ) for filepath in files ], 1 )
+	pool.close()
+	pool.join()
+
+	categories = {}
+	for entry in entries:
+		categories.setdefault( category( entry ), [] ).append( entry )
+
+	results = {
+		"revision": revision(),
+		"date": time.strftime( '%Y-%m-%dT%H:%M:%S' ),
+		"python": platform.python_version(),
+		"grammar": GRAMMAR,
+		"platform": platform.platform(),
+		"repeat": repeat,
+		"files": entries,
+		"categories": dict( ( name, summarize( group ) ) for name, group in categories.items() ),
+		"summary": summarize( entries )
+	}
+
+	f = open( output, 'w' )
+	json.dump( results, f, indent = 1, sort_keys = True )
+	f.close()
+
+	report( results, previous )
+	print
+	print "results written to %s" % output
+
+
+if __name__ == "__main__":
+	main( sys.argv )
@@ -0,0 +1,63 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from Parser import ASTParser
+from Batch import ASTBatch, collect
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+
+
+class BatchTest( unittest.TestCase ):
+
+	def setUp( self ):
+		self.files = collect( [ os.path.join( CORPUS, 'small' ), os.path.join( CORPUS, 'docstrings' ) ] )
+
+
+	def test_collect( self ):
+		self.assertEqual( [ os.path.basename( filepath ) for filepath in self.files ], [ 'fileinput.py', 'geometry.py', 'numbers.py', 'backup.py', 'config.py', 'fizzbuzz.py', 'wordcount.py' ] )
+
+
+	def test_stream_equals_parse( self ):
+		stream = StringIO()
+		runner = ASTBatch( self.files, jobs = 2 )
+		runner.run( stream )
+
+		results = sorted( stream.getvalue().splitlines() )
+		self.assertEqual( results, sorted( ASTParser( filepath ).parse() for filepath in self.files ) )
+		self.assertEqual( ( runner.parsed, runner.failed ), ( len( self.files ), 0 ) )
+
+
+	def test_output_files( self ):
+		output = tempfile.mkdtemp()
+
+		try:
+			runner = ASTBatch( self.files[ :2 ], jobs = 1, output = output )
+			runner.run()
+
+			for filepath in self.files[ :2 ]:
+				f = open( runner.target( filepath ), 'rb' )
+				self.assertEqual( f.read(), ASTParser( filepath ).parse() )
+				f.close()
+
+		finally:
+			shutil.rmtree( output )
+
+
+	def test_failure_is_an_envelope( self ):
+		stream = StringIO()
+		runner = ASTBatch( [ os.path.join( CORPUS, 'missing.py' ) ], jobs = 1 )
+		runner.run( stream )
+
+		self.assertFalse( json.loads( stream.getvalue() )[ "success" ] )
+		self.assertEqual( runner.failed, 1 )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
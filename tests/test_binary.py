@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import math
+import unittest
+
+from Parser import ASTParser
+from Batch import collect
+import Binary
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+
+
+def equal( a, b ):
+	"""
+	Compares two values as ==, with a stack rather than
+	recursion, since the nested corpus is deeper than the
+	recursion limit.
+	"""
+	stack = [ ( a, b ) ]
+
+	while stack:
+		a, b = stack.pop()
+
+		if isinstance( a, dict ) and isinstance( b, dict ):
+			if sorted( a ) != sorted( b ):
+				return False
+
+			stack.extend( ( a[ key ], b[ key ] ) for key in a )
+
+		elif isinstance( a, (list, tuple) ) and isinstance( b, (list, tuple) ):
+			if len( a ) != len( b ):
+				return False
+
+			stack.extend( zip( a, b ) )
+
+		elif a != b or type( a ) in ( bool, float ) and type( a ) is not type( b ):
+			return False
+
+	return True
+
+
+
+class BinaryTest( unittest.TestCase ):
+
+	def roundtrip( self, value ):
+		return Binary.decode( Binary.encode( value ) )
+
+
+	def test_corpus( self ):
+		for filepath in collect( [ CORPUS ] ):
+			parser = ASTParser( filepath )
+			result = parser.result()
+			decoded = self.roundtrip( result )
+
+			self.assertTrue( equal( decoded, result ), filepath )
+
+			# json.loads recurses, and cannot read the nested corpus
+			if 'nested' not in filepath:
+				self.assertEqual( decoded, json.loads( json.dumps( result ) ), filepath )
+
+
+	def test_scalars( self ):
+		value = {
+			"null": None, "false": False, "true": True,
+			"integers": [ 0, 1, -1, 2 ** 29 - 1, 2 ** 29, 2 ** 40, -2 ** 70 ],
+			"floats": [ 0.0, -0.0, 1.5, -1e300 ],
+			"strings": [ "", "ascii", u"été", "caf\xc3\xa9" ],
+			"nested": [ [], [ [] ], {}, { "line": 3 }, { "line": -3 }, { "line": 2 ** 40 } ],
+			"node": { "expr": "Literal", "type": "Number", "value": 1, "position": { "line": 7 } },
+			"tuple": ( 1, 2 )
+		}
+
+		decoded = self.roundtrip( value )
+		self.assertEqual( decoded, json.loads( json.dumps( value ) ) )
+		self.assertEqual( math.copysign( 1.0, decoded[ "floats" ][ 1 ] ), -1.0 )
+		self.assertEqual( [ type( n ) for n in decoded[ "integers" ] ], [ type( n ) for n in json.loads( json.dumps( value[ "integers" ] ) ) ] )
+
+
+	def test_latin1_strings( self ):
+		decoded = Binary.decode( Binary.encode( { "s": "caf\xe9" }, 'latin-1' ) )
+		self.assertEqual( decoded, { u"s": u"café" } )
+
+
+	def test_builders_are_bounded( self ):
+		built = Binary.BUILT
+		Binary.BUILT = 8
+
+		try:
+			for i in range( 40 ):
+				value = { "key%d" % i: i, "node": { "expr": "Literal", "type": "T%d" % i, "value": i } }
+				self.assertEqual( self.roundtrip( value ), value )
+				self.assertLessEqual( len( Binary.BUILDERS ), 8 )
+
+		finally:
+			Binary.BUILT = built
+
+
+	def test_rejects_other_data( self ):
+		data = Binary.encode( { "a": 1 } )
+
+		self.assertRaises( ValueError, Binary.decode, b'{"a": 1}' )
+		self.assertRaises( ValueError, Binary.decode, data[ :-1 ] )
+		self.assertRaises( ValueError, Binary.decode, data[ :4 ] + b'\x01' + data[ 5: ] )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
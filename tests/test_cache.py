@@ -0,0 +1,98 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from Parser import ASTParser
+from Cache import ASTCache
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+
+
+class CacheTest( unittest.TestCase ):
+
+	def setUp( self ):
+		self.directory = tempfile.mkdtemp()
+		self.filepath = os.path.join( CORPUS, 'small', 'config.py' )
+
+
+	def tearDown( self ):
+		shutil.rmtree( self.directory )
+
+
+	def cache( self, limit = 256 * 1024 * 1024, level = None ):
+		return ASTCache( self.directory, limit, level )
+
+
+	def parsed( self, filepath ):
+		"""
+		Returns whether parse() finds filepath in the
+		cache, and its output.
+		"""
+		parser = ASTParser( filepath, cache = self.cache() )
+		output = parser.parse()
+		return parser.cached, output
+
+
+	def test_parse_puts( self ):
+		self.assertEqual( self.parsed( self.filepath ), ( False, ASTParser( self.filepath ).parse() ) )
+		self.assertEqual( self.parsed( self.filepath ), ( True, ASTParser( self.filepath ).parse() ) )
+
+
+	def test_result_puts( self ):
+		parser = ASTParser( self.filepath, cache = self.cache() )
+		self.assertEqual( json.loads( json.dumps( parser.result() ) ), json.loads( ASTParser( self.filepath ).parse() ) )
+		self.assertFalse( parser.cached )
+
+		self.assertEqual( self.parsed( self.filepath ), ( True, ASTParser( self.filepath ).parse() ) )
+
+		parser = ASTParser( self.filepath, cache = self.cache() )
+		self.assertEqual( parser.result(), json.loads( ASTParser( self.filepath ).parse() ) )
+		self.assertTrue( parser.cached )
+
+
+	def test_dump_puts( self ):
+		out = StringIO()
+		parser = ASTParser( self.filepath, cache = self.cache() )
+		parser.dump( out )
+		self.assertEqual( ( parser.cached, out.getvalue() ), ( False, ASTParser( self.filepath ).parse() ) )
+
+		self.assertEqual( self.parsed( self.filepath ), ( True, ASTParser( self.filepath ).parse() ) )
+
+
+	def test_result_of_a_deep_tree( self ):
+		filepath = os.path.join( CORPUS, 'nested', 'chain.py' )
+		expected = ASTParser( filepath ).parse()
+
+		for cached in ( False, True ):
+			parser = ASTParser( filepath, cache = self.cache() )
+			self.assertEqual( parser.result()[ "ast" ][ "body" ][ 0 ][ "type" ], 'Assign' )
+			self.assertEqual( self.parsed( filepath ), ( True, expected ) )
+
+
+	def test_compressed_entries( self ):
+		cache = self.cache( level = 6 )
+		cache.put( 'ab' + '0' * 38, b'{"x": 1}' * 1000 )
+
+		self.assertLess( os.path.getsize( cache.path( 'ab' + '0' * 38 ) ), 1000 )
+		self.assertEqual( self.cache().get( 'ab' + '0' * 38 ), b'{"x": 1}' * 1000 )
+
+
+	def test_limit_is_shared( self ):
+		# four caches on one directory, as four batch workers have,
+		# each of which writes half the limit
+		limit = 64 * 1024
+		caches = [ self.cache( limit ) for i in range( 4 ) ]
+
+		for i in range( 128 ):
+			caches[ i % 4 ].put( '%02x%s' % ( i, '0' * 38 ), b'x' * 1024 )
+
+		self.assertLessEqual( caches[ 0 ].usage(), limit + len( caches ) * limit // 16 )
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,64 @@
+import os
+import ast
+import shutil
+import tempfile
+import unittest
+
+from Parser import ASTParser
+from Batch import collect
+import Columnar
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+
+
+class ColumnarTest( unittest.TestCase ):
+
+	def setUp( self ):
+		self.directory = tempfile.mkdtemp()
+
+
+	def tearDown( self ):
+		shutil.rmtree( self.directory )
+
+
+	def load( self, filepath ):
+		target = os.path.join( self.directory, os.path.basename( filepath ) + '.cols' )
+		f = open( target, 'wb' )
+		f.write( ASTParser( filepath ).columns() )
+		f.close()
+		return Columnar.load( target )
+
+
+	def test_nodes( self ):
+		for filepath in collect( [ CORPUS ] ):
+			meta, columns = self.load( filepath )
+			tree = ast.parse( open( filepath ).read() )
+			nodes = [ node for node in ast.walk( tree ) if not isinstance( node, ast.expr_context ) ]
+
+			self.assertEqual( meta[ "count" ], len( nodes ), filepath )
+			self.assertEqual( sorted( meta[ "types" ][ kind ] for kind in columns[ 'type' ] ), sorted( node.__class__.__name__ for node in nodes ), filepath )
+
+
+	def test_structure( self ):
+		meta, columns = self.load( os.path.join( CORPUS, 'small', 'wordcount.py' ) )
+		types = [ meta[ "types" ][ kind ] for kind in columns[ 'type' ] ]
+
+		self.assertEqual( ( types[ 0 ], columns[ 'parent' ][ 0 ] ), ( 'Module', -1 ) )
+
+		for i in range( meta[ "count" ] ):
+			for child in range( columns[ 'first' ][ i ], columns[ 'first' ][ i ] + columns[ 'children' ][ i ] ):
+				self.assertEqual( columns[ 'parent' ][ child ], i )
+
+		names = set( meta[ "strings" ][ value ] for kind, value in zip( types, columns[ 'value' ] ) if kind == 'alias' )
+		self.assertEqual( names, set([ 'sys', 'collections' ]) )
+
+
+	def test_rejects_other_data( self ):
+		self.assertRaises( ValueError, Columnar.header, b'DAST' + b'\0' * 8 )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,74 @@
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from Parser import ASTParser
+from Batch import ASTBatch
+from Service import negotiate
+import Compression
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+
+
+class CompressionTest( unittest.TestCase ):
+
+	def setUp( self ):
+		self.directory = tempfile.mkdtemp()
+		self.filepath = os.path.join( CORPUS, 'large', 'calendar.py' )
+		self.result = ASTParser( self.filepath ).parse()
+
+
+	def tearDown( self ):
+		shutil.rmtree( self.directory )
+
+
+	def test_gzip_records_its_size( self ):
+		data = Compression.compress( self.result )
+
+		self.assertEqual( Compression.decompress( data ), self.result )
+		self.assertEqual( Compression.size( data ), len( self.result ) )
+		self.assertEqual( gzip.GzipFile( fileobj = StringIO( data ) ).read(), self.result )
+
+
+	def test_stream( self ):
+		out = StringIO()
+		compressor = Compression.ASTCompressor( out, level = 9 )
+
+		for i in range( 0, len( self.result ), 1000 ):
+			compressor.write( self.result[ i : i + 1000 ] )
+
+		compressor.close()
+
+		self.assertEqual( ( compressor.size, compressor.written ), ( len( self.result ), len( out.getvalue() ) ) )
+		self.assertEqual( Compression.decompress( out.getvalue() + Compression.compress( 'x' ) ), self.result + 'x' )
+
+
+	def test_stored_output_is_gzip_only( self ):
+		self.assertEqual( Compression.METHODS, ( 'gzip', ) )
+		self.assertRaises( ValueError, ASTBatch, [ self.filepath ], compression = 'zlib' )
+
+		runner = ASTBatch( [ self.filepath ], jobs = 1, output = self.directory, compression = 'gzip' )
+		runner.run()
+
+		f = open( runner.target( self.filepath ), 'rb' )
+		data = f.read()
+		f.close()
+
+		self.assertTrue( runner.target( self.filepath ).endswith( '.json.gz' ) )
+		self.assertEqual( ( Compression.size( data ), Compression.decompress( data ) ), ( len( self.result ), self.result ) )
+
+
+	def test_deflate_over_http( self ):
+		self.assertEqual( negotiate( 'deflate' ), ( 'zlib', 'deflate' ) )
+		self.assertEqual( negotiate( 'deflate, gzip' ), ( 'gzip', 'gzip' ) )
+		self.assertEqual( Compression.decompress( Compression.compress( self.result, 'zlib' ) ), self.result )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
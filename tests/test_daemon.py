@@ -0,0 +1,123 @@
+import json
+import unittest
+from StringIO import StringIO
+
+from Parser import ASTParser
+from Daemon import ASTDaemon, INVALID_PARAMS, INVALID_REQUEST, METHOD_NOT_FOUND, PARSE_ERROR
+
+
+
+class DaemonTest( unittest.TestCase ):
+
+	def setUp( self ):
+		self.daemon = ASTDaemon( jobs = 2, delay = 0 )
+		self.daemon.out = StringIO()
+
+
+	def tearDown( self ):
+		for document in self.daemon.documents.itervalues():
+			self.daemon.cancel( document )
+
+
+	def send( self, method, identifier = None, **params ):
+		self.daemon.handle( json.dumps( { "jsonrpc": "2.0", "id": identifier, "method": method, "params": params } ) )
+
+
+	def settle( self ):
+		"""
+		Runs the parses that are due until none are left,
+		as the run loop would, and returns the messages sent.
+		"""
+		while True:
+			self.daemon.schedule()
+			running = [ document for document in self.daemon.documents.values() if document.job is not None ]
+
+			if not running:
+				break
+
+			for document in running:
+				document.job[ 1 ].poll( 30 )
+				self.daemon.finish( document )
+
+		return self.messages()
+
+
+	def messages( self ):
+		messages = [ json.loads( line ) for line in self.daemon.out.getvalue().splitlines() ]
+		self.daemon.out.seek( 0 )
+		self.daemon.out.truncate()
+		return messages
+
+
+	def answers( self, messages ):
+		return dict( ( message[ "id" ], message ) for message in messages if message.get( "id" ) is not None )
+
+
+	def test_open_and_parse( self ):
+		self.send( 'open', 1, path = 'a.py', text = 'x = 1\n', version = 1 )
+		messages = self.settle()
+		self.send( 'parse', 2, path = 'a.py' )
+		answer = self.answers( self.messages() )[ 2 ]
+
+		self.assertEqual( messages[ 0 ], { "jsonrpc": "2.0", "id": 1, "result": None } )
+		self.assertEqual( messages[ 1 ][ "method" ], 'parsed' )
+		self.assertEqual( messages[ 1 ][ "params" ][ "version" ], 1 )
+		self.assertEqual( answer[ "result" ], json.loads( ASTParser( 'a.py', source = 'x = 1\n' ).parse() ) )
+
+
+	def test_parse_waits_for_the_current_version( self ):
+		self.send( 'open', 1, path = 'a.py', text = 'x = 1\n', version = 1 )
+		self.send( 'change', 2, path = 'a.py', text = 'x = 2\n', version = 2 )
+		self.send( 'parse', 3, path = 'a.py' )
+		messages = self.settle()
+		answer = self.answers( messages )[ 3 ]
+
+		self.assertEqual( [ message[ "params" ][ "version" ] for message in messages if message.get( "method" ) == 'parsed' ], [ 2 ] )
+		self.assertEqual( answer[ "result" ][ "ast" ][ "body" ][ 0 ][ "value" ][ "value" ], 2 )
+
+
+	def test_reopen_answers_waiting( self ):
+		self.send( 'open', 1, path = 'a.py', text = 'x = 1\n', version = 1 )
+		self.send( 'parse', 2, path = 'a.py' )
+		self.send( 'open', 3, path = 'a.py', text = 'x = 3\n', version = 1 )
+		answers = self.answers( self.settle() )
+
+		self.assertEqual( answers[ 2 ][ "result" ][ "ast" ][ "body" ][ 0 ][ "value" ][ "value" ], 3 )
+		self.assertEqual( answers[ 3 ][ "result" ], None )
+
+
+	def test_close_answers_waiting( self ):
+		self.send( 'open', 1, path = 'a.py', text = 'x = 1\n' )
+		self.send( 'parse', 2, path = 'a.py' )
+		self.send( 'close', 3, path = 'a.py' )
+		answers = self.answers( self.settle() )
+
+		self.assertEqual( answers[ 2 ][ "error" ][ "code" ], INVALID_PARAMS )
+		self.assertEqual( answers[ 3 ][ "result" ], None )
+		self.assertEqual( self.daemon.documents, {} )
+
+
+	def test_shutdown_answers_waiting( self ):
+		self.send( 'open', 1, path = 'a.py', text = 'x = 1\n' )
+		self.send( 'parse', 2, path = 'a.py' )
+		self.send( 'shutdown', 3 )
+		answers = self.answers( self.messages() )
+
+		self.assertFalse( self.daemon.running )
+		self.assertEqual( answers[ 2 ][ "error" ][ "code" ], INVALID_REQUEST )
+		self.assertEqual( answers[ 3 ][ "result" ], None )
+
+
+	def test_errors( self ):
+		self.daemon.handle( 'not json' )
+		self.send( 'rename', 1, path = 'a.py' )
+		self.send( 'parse', 2, path = 'a.py' )
+		self.send( 'open', 3, path = 'a.py' )
+		codes = [ message[ "error" ][ "code" ] for message in self.messages() ]
+
+		self.assertEqual( codes, [ PARSE_ERROR, METHOD_NOT_FOUND, INVALID_PARAMS, INVALID_PARAMS ] )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,79 @@
+import os
+import json
+import unittest
+
+from Parser import ASTParser
+from Diff import ASTDiffParser, apply
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+BEFORE = b'''import os
+
+
+def first( a ):
+	return a + 1
+
+
+def second( b ):
+	return b * 2
+'''
+
+
+
+class DiffTest( unittest.TestCase ):
+
+	def patch( self, before, after, **options ):
+		old = json.loads( ASTParser( 'diff.py', source = before, **options ).parse() )[ "ast" ]
+		new = json.loads( ASTParser( 'diff.py', source = after, **options ).parse() )[ "ast" ]
+		result = json.loads( ASTDiffParser( 'diff.py', source = after, **options ).diff( old ) )
+
+		self.assertTrue( result[ "success" ] )
+		self.assertEqual( apply( old, result[ "patch" ] ), new )
+		return result[ "patch" ]
+
+
+	def test_unchanged( self ):
+		self.assertEqual( self.patch( BEFORE, BEFORE ), [] )
+
+
+	def test_edit( self ):
+		patch = self.patch( BEFORE, BEFORE.replace( b'b * 2', b'b * 3' ) )
+		self.assertEqual( patch, [ { "op": "replace", "path": [ "body", 2, "body", 0, "value", "right", "value" ], "value": 3 } ] )
+
+
+	def test_moved_lines_are_shifted( self ):
+		patch = self.patch( BEFORE, BEFORE.replace( b'import os\n', b'import os\nimport sys\n' ) )
+		self.assertEqual( [ operation[ "op" ] for operation in patch ], [ "insert", "shift", "shift" ] )
+
+
+	def test_ranges_are_shifted( self ):
+		after = BEFORE.replace( b'import os\n', b'import os\nimport sys\n' )
+
+		for profile in ( 'full', 'lean' ):
+			patch = self.patch( BEFORE, after, ranges = True, profile = profile )
+			self.assertEqual( [ operation[ "op" ] for operation in patch ], [ "insert", "shift", "shift" ], profile )
+
+
+	def test_ranges_moved_across_columns( self ):
+		# the same statement on the next line, indented: not a shift
+		patch = self.patch( b'if x:\n\ty = 1\n', b'if x:\n\tpass\n\tif 1: y = 1\n', ranges = True )
+		self.assertNotIn( "shift", [ operation[ "op" ] for operation in patch ] )
+
+
+	def test_corpus( self ):
+		before = open( os.path.join( CORPUS, 'large', 'calendar.py' ), 'rb' ).read()
+		self.patch( before, before.replace( b'import sys', b'import sys, os' ).replace( b'return', b'return None or', 1 ) )
+
+
+	def test_corpus_ranges( self ):
+		before = open( os.path.join( CORPUS, 'large', 'calendar.py' ), 'rb' ).read()
+		after = before.replace( b'import sys', b'import sys\nimport os', 1 )
+		patch = self.patch( before, after, ranges = True )
+
+		self.assertLess( len( json.dumps( patch ) ), len( ASTParser( 'diff.py', source = after, ranges = True ).parse() ) / 20 )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
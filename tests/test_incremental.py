@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+from Parser import ASTParser
+from Incremental import ASTIncrementalParser
+
+
+BEFORE = '''"""module"""
+import os
+
+def first( x ):
+	return x + 1
+
+def second( y ):
+	return y * 2
+'''
+
+AFTER = '''"""module"""
+import os
+
+def first( x ):
+	z = x - 1
+	return z + 1
+
+def second( y ):
+	return y * 2
+'''
+
+FUTURE = '''"""module"""
+from __future__ import print_function
+
+def first( x ):
+	print( 'a', x )
+'''
+
+ENCODED = '''#!/usr/bin/env python
+# -*- coding: %s -*-
+"""module"""
+
+def first( x ):
+	return x
+
+def second( y ):
+	return y
+'''
+
+
+
+def full( source ):
+	return json.loads( ASTParser( 'a.py', source = source ).parse() )
+
+
+
+class IncrementalTest( unittest.TestCase ):
+
+	def test_splice_equals_full_parse( self ):
+		parser = ASTIncrementalParser( 'a.py', source = AFTER )
+		result = parser.reparse( ASTParser( 'a.py', source = BEFORE ).parse(), 5, 5, 1 )
+
+		self.assertTrue( parser.incremental )
+		self.assertEqual( result, full( AFTER ) )
+
+
+	def test_fallback_equals_full_parse( self ):
+		# the edit reaches the first statement, so the whole file is parsed again
+		source = AFTER.replace( '"""module"""', '"""edited"""' )
+		parser = ASTIncrementalParser( 'a.py', source = source )
+		result = parser.reparse( ASTParser( 'a.py', source = AFTER ).parse(), 1, 1, 0 )
+
+		self.assertFalse( parser.incremental )
+		self.assertTrue( parser.success )
+		self.assertEqual( result, full( source ) )
+
+
+	def test_fallback_with_ranges( self ):
+		parser = ASTIncrementalParser( 'a.py', source = AFTER, ranges = True )
+		result = parser.reparse( ASTParser( 'a.py', source = BEFORE, ranges = True ).parse(), 5, 5, 1 )
+
+		self.assertFalse( parser.incremental )
+		self.assertEqual( result, json.loads( ASTParser( 'a.py', source = AFTER, ranges = True ).parse() ) )
+
+
+	def test_future_flags( self ):
+		source = FUTURE.replace( "print( 'a', x )", "print( 'a', 'b' )" )
+		parser = ASTIncrementalParser( 'a.py', source = source )
+		result = parser.reparse( ASTParser( 'a.py', source = FUTURE ).parse(), 5, 5, 0 )
+
+		self.assertTrue( parser.incremental )
+		self.assertEqual( result, full( source ) )
+		self.assertEqual( result[ "ast" ][ "body" ][ 2 ][ "body" ][ 0 ][ "value" ][ "type" ], 'Call' )
+
+
+	def test_future_import_edit( self ):
+		source = FUTURE.replace( 'print_function', 'print_function, division' )
+		parser = ASTIncrementalParser( 'a.py', source = source )
+		result = parser.reparse( ASTParser( 'a.py', source = FUTURE ).parse(), 2, 2, 0 )
+
+		self.assertFalse( parser.incremental )
+		self.assertEqual( result, full( source ) )
+
+
+	def test_declared_encoding( self ):
+		for encoding, bom in ( ( 'utf-8', b'' ), ( 'latin-1', b'' ), ( 'utf-8', b'\xef\xbb\xbf' ) ):
+			before = bom + ( ENCODED % encoding ).encode( encoding )
+			after = before.replace( u'\treturn x\n'.encode( encoding ), u'\treturn x + u"été" + "été"\n'.encode( encoding ) )
+
+			parser = ASTIncrementalParser( 'a.py', source = after )
+			result = json.loads( json.dumps( parser.reparse( ASTParser( 'a.py', source = before ).parse(), 6, 6, 0 ), encoding = parser.encoding ) )
+			function = result[ "ast" ][ "body" ][ 1 ]
+
+			self.assertTrue( parser.incremental, encoding )
+			self.assertEqual( result, full( after ), encoding )
+			self.assertEqual( function[ "body" ][ 0 ][ "value" ][ "left" ][ "right" ][ "value" ], u"été" )
+			self.assertEqual( function[ "position" ][ "line" ], 5 )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import os
+import ast
+import sys
+import json
+import unittest
+
+from Batch import collect
+from Serializer import ASTSerializer
+from Iterative import ASTIterativeSerializer
+import Iterative
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+# a left-deep chain of additions, deeper than the recursion limit
+DEEP = ' + '.join( [ '1' ] * ( sys.getrecursionlimit() * 2 ) )
+
+
+
+def parse( filepath ):
+	with open( filepath, 'rb' ) as f:
+		return ast.parse( f.read() )
+
+
+
+class IterativeTest( unittest.TestCase ):
+
+	def test_corpus( self ):
+		for filepath in collect( [ os.path.join( CORPUS, name ) for name in ( 'small', 'docstrings', 'large' ) ] ):
+			try:
+				expected = json.dumps( ASTSerializer().visit( parse( filepath ) ) )
+			except Exception:
+				continue
+
+			self.assertEqual( json.dumps( ASTIterativeSerializer().visit( parse( filepath ) ) ), expected, filepath )
+
+
+	def test_nested_corpus( self ):
+		for filepath in collect( [ os.path.join( CORPUS, 'nested' ) ] ):
+			result = ASTIterativeSerializer().visit( parse( filepath ) )
+			self.assertEqual( result[ "type" ], 'Module', filepath )
+
+
+	def test_nodes_outside_the_table( self ):
+		source = 'raise A, b\ny = `1 + 2`\nexec 1 + 2 in {}, { 1: 2 }\n'
+		expected = ASTSerializer().visit( ast.parse( source ) )
+		result = ASTIterativeSerializer().visit( ast.parse( source ) )
+
+		self.assertEqual( result[ "body" ][ 0 ], expected[ "body" ][ 0 ] )
+		self.assertEqual( result[ "body" ][ 1 ][ "value" ].value, expected[ "body" ][ 1 ][ "value" ].value )
+
+		for field in ( 'body', 'globals', 'locals' ):
+			self.assertEqual( getattr( result[ "body" ][ 2 ], field ), getattr( expected[ "body" ][ 2 ], field ), field )
+
+
+	def test_deep_nodes_outside_the_table( self ):
+		source = 'raise ValueError( %s )\nx[ %s ]\nx[ 1:%s ]\ny = `%s`\n' % ( ( DEEP, ) * 4 )
+		result = ASTIterativeSerializer().visit( ast.parse( source ) )
+
+		self.assertEqual( [ statement[ "type" ] for statement in result[ "body" ] ], [ 'Raise', 'Expr', 'Expr', 'Assign' ] )
+		self.assertEqual( result[ "body" ][ 3 ][ "value" ].value[ "type" ], 'BinOp' )
+		self.assertRaises( RuntimeError, ASTSerializer().visit, ast.parse( 'y = `%s`' % DEEP ) )
+
+
+	def test_dumps( self ):
+		value = { "a": [ 1, 2.5, None, True, u"été", "caf\xc3\xa9", ( 1, 2 ), {}, [] ], "b": { "c": -1 } }
+		self.assertEqual( Iterative.dumps( value ), json.dumps( value ) )
+		self.assertEqual( Iterative.dumps( { "s": "caf\xe9" }, 'latin-1' ), json.dumps( { "s": "caf\xe9" }, encoding = 'latin-1' ) )
+		self.assertRaises( TypeError, Iterative.dumps, { "a": object() } )
+
+
+	def test_dumps_deep( self ):
+		value = []
+
+		for i in range( sys.getrecursionlimit() * 2 ):
+			value = [ value ]
+
+		text = Iterative.dumps( value )
+		self.assertEqual( text, '[' * ( sys.getrecursionlimit() * 2 + 1 ) + ']' * ( sys.getrecursionlimit() * 2 + 1 ) )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
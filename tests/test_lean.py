@@ -0,0 +1,41 @@
+import os
+import json
+import unittest
+
+from Parser import ASTParser
+from Batch import collect
+import Lean
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+
+
+class LeanTest( unittest.TestCase ):
+
+	def setUp( self ):
+		self.files = collect( [ os.path.join( CORPUS, name ) for name in ( 'small', 'docstrings', 'large' ) ] )
+
+
+	def test_expand_gives_full( self ):
+		for filepath in self.files:
+			lean = json.loads( ASTParser( filepath, profile = 'lean' ).parse() )
+			full = json.loads( ASTParser( filepath ).parse() )
+			self.assertEqual( Lean.expand( lean ), full, filepath )
+
+
+	def test_reduce_gives_lean( self ):
+		for filepath in self.files:
+			lean = json.loads( ASTParser( filepath, profile = 'lean' ).parse() )
+			full = json.loads( ASTParser( filepath ).parse() )
+			self.assertEqual( Lean.reduce( full ), lean, filepath )
+
+
+	def test_lean_is_smaller( self ):
+		filepath = os.path.join( CORPUS, 'large', 'decimal.py' )
+		self.assertLess( len( ASTParser( filepath, profile = 'lean' ).parse() ), len( ASTParser( filepath ).parse() ) * 0.8 )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
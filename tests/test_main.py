@@ -0,0 +1,73 @@
+import os
+import sys
+import unittest
+from StringIO import StringIO
+
+import Main
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+
+
+class MainTest( unittest.TestCase ):
+
+	def run_main( self, *args ):
+		"""
+		Returns the exit status of Main with args, and what
+		it wrote to stderr.
+		"""
+		stdout, stderr = sys.stdout, sys.stderr
+		sys.stdout, sys.stderr = StringIO(), StringIO()
+
+		try:
+			Main.main( [ 'Main.py' ] + list( args ) )
+
+		except SystemExit as e:
+			return e.code or 0, sys.stderr.getvalue()
+
+		finally:
+			sys.stdout, sys.stderr = stdout, stderr
+
+
+	def test_unsupported_options( self ):
+		for args, message in (
+			( [ '--pipe', '--check' ], "--check: not supported with --pipe" ),
+			( [ '--pipe', '--ranges', '-f', 'binary' ], "--format, --ranges: not supported with --pipe" ),
+			( [ '--daemon', '--query', 'Call' ], "--query: not supported with --daemon" ),
+			( [ '--daemon', '--memo', 'memo' ], "--memo: not supported with --daemon" ),
+			( [ '--serve', '8000', '--compress', 'gzip' ], "--compress: not supported with --serve" ),
+			( [ '--serve', '8000', '-c', 'cache' ], "--cache: not supported with --serve" ),
+			( [ '--watch', CORPUS, '--stream' ], "--stream: not supported with --watch" ),
+			( [ '--index', 'symbols', '-b', CORPUS, '--outline' ], "--outline: not supported with --index" ),
+			( [ '-b', CORPUS, '--diff', 'a.py' ], "--diff: not supported with --batch" ),
+			( [ '--symbol', 'ASTParser' ], "--symbol: not supported with --parse" ),
+		):
+			self.assertEqual( self.run_main( *args ), ( 2, message + "\n" ), args )
+
+
+	def test_modes_cannot_be_combined( self ):
+		self.assertEqual( self.run_main( '--pipe', '--daemon' ), ( 2, "--daemon and --pipe cannot be combined\n" ) )
+		self.assertEqual( self.run_main( '-b', CORPUS, '-s', '8000' ), ( 2, "--batch and --serve cannot be combined\n" ) )
+
+
+	def test_invalid_values( self ):
+		self.assertEqual( self.run_main( '-p', 'a.py', '--profile', 'short' ), ( 2, "--profile is full or lean\n" ) )
+		self.assertEqual( self.run_main( '-b', CORPUS, '-f', 'binary' ), ( 2, "-f binary with --batch needs -o\n" ) )
+		self.assertEqual( self.run_main( '-p', 'a.py', '--check', '--stream' ), ( 2, "--check cannot be combined with -f or --stream\n" ) )
+		self.assertEqual( self.run_main( '--watch', os.path.join( CORPUS, 'missing' ) ), ( 2, os.path.join( CORPUS, 'missing' ) + " is not a directory\n" ) )
+		self.assertEqual( self.run_main( '-p', 'a.py', '--level', '6' ), ( 2, "--level needs --compress\n" ) )
+		self.assertEqual( self.run_main( '-b', CORPUS, '-o', 'out', '--level', '6' ), ( 2, "--level needs --compress\n" ) )
+
+
+	def test_supported_options( self ):
+		status, log = self.run_main( '-p', os.path.join( CORPUS, 'small', 'config.py' ), '--check', '--outline' )
+		self.assertEqual( status, 0 )
+
+		status, log = self.run_main( '-p', os.path.join( CORPUS, 'small', 'config.py' ), '--compress', 'gzip', '--level', '1' )
+		self.assertEqual( status, 0 )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from Parser import ASTParser
+from Memo import ASTMemo
+from Batch import collect
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+SOURCE = b'''import os
+
+
+def first( a ):
+	return a + 1
+
+
+class Second( object ):
+	def method( self ):
+		return 2
+'''
+
+
+
+class MemoTest( unittest.TestCase ):
+
+	def setUp( self ):
+		self.directory = tempfile.mkdtemp()
+
+
+	def tearDown( self ):
+		shutil.rmtree( self.directory )
+
+
+	def test_output_is_unchanged( self ):
+		memo = ASTMemo()
+
+		for profile in ( 'full', 'lean' ):
+			for filepath in collect( [ os.path.join( CORPUS, name ) for name in ( 'small', 'docstrings', 'large' ) ] ):
+				for attempt in range( 2 ):
+					self.assertEqual( ASTParser( filepath, profile = profile, memo = memo ).parse(), ASTParser( filepath, profile = profile ).parse(), filepath )
+
+		self.assertTrue( memo.hits > 0 )
+
+
+	def test_moved_definitions( self ):
+		memo = ASTMemo()
+		ASTParser( 'a.py', source = SOURCE, memo = memo ).parse()
+		hits = memo.hits
+
+		moved = SOURCE.replace( b'import os\n', b'import os\nimport sys\n\n' )
+		self.assertEqual( ASTParser( 'b.py', source = moved, memo = memo ).parse(), ASTParser( 'b.py', source = moved ).parse() )
+		self.assertEqual( memo.hits - hits, 2 )
+
+
+	def test_shared_directory( self ):
+		ASTParser( 'a.py', source = SOURCE, memo = ASTMemo( self.directory ) ).parse()
+
+		memo = ASTMemo( self.directory )
+		self.assertEqual( ASTParser( 'a.py', source = SOURCE, memo = memo ).parse(), ASTParser( 'a.py', source = SOURCE ).parse() )
+		self.assertEqual( ( memo.hits, memo.misses ), ( 2, 0 ) )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
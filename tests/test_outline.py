@@ -0,0 +1,97 @@
+import os
+import ast
+import json
+import unittest
+
+from Parser import ASTParser
+from Outline import prune
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+SOURCE = '''"""module"""
+import os
+from sys import path
+
+LIMIT = 10
+print LIMIT
+
+class Shape( object ):
+	"""shape"""
+	sides = 0
+
+	def area( self ):
+		"""area"""
+		return 0
+
+	@property
+	def name( self ):
+		return 'shape'
+
+def main( argv, verbose = False ):
+	"""entry point"""
+	for arg in argv:
+		print arg
+
+if __name__ == '__main__':
+	main( [] )
+'''
+
+
+
+def types( body ):
+	return [ statement.__class__.__name__ for statement in body ]
+
+
+
+class OutlineTest( unittest.TestCase ):
+
+	def test_prune( self ):
+		tree = prune( ast.parse( SOURCE ) )
+		shape, main = tree.body[ 3 ], tree.body[ 4 ]
+
+		self.assertEqual( types( tree.body ), [ 'Expr', 'Import', 'ImportFrom', 'ClassDef', 'FunctionDef' ] )
+		self.assertEqual( types( shape.body ), [ 'Expr', 'FunctionDef', 'FunctionDef' ] )
+		self.assertEqual( types( shape.body[ 1 ].body ), [ 'Expr' ] )
+		self.assertEqual( shape.body[ 2 ].body, [] )
+		self.assertEqual( len( shape.body[ 2 ].decorator_list ), 1 )
+		self.assertEqual( types( main.body ), [ 'Expr' ] )
+		self.assertEqual( [ arg.id for arg in main.args.args ], [ 'argv', 'verbose' ] )
+
+
+	def test_tree_is_not_modified( self ):
+		tree = ast.parse( SOURCE )
+		before = ast.dump( tree, include_attributes = True )
+		prune( tree )
+
+		self.assertEqual( ast.dump( tree, include_attributes = True ), before )
+
+
+	def test_without_docstrings( self ):
+		tree = prune( ast.parse( 'x = 1\ndef f():\n\treturn 1\n' ) )
+
+		self.assertEqual( types( tree.body ), [ 'FunctionDef' ] )
+		self.assertEqual( tree.body[ 0 ].body, [] )
+
+
+	def test_parse( self ):
+		result = json.loads( ASTParser( 'a.py', source = SOURCE, outline = True ).parse() )
+		module = result[ "ast" ]
+
+		self.assertEqual( module[ "docstring" ], 'module' )
+		self.assertEqual( [ statement[ "type" ] for statement in module[ "body" ] ], [ 'Expr', 'Import', 'ImportFrom', 'ClassDef', 'FunctionDef' ] )
+		self.assertEqual( module[ "body" ][ 4 ][ "docstring" ], 'entry point' )
+
+
+	def test_outline_is_smaller( self ):
+		filepath = os.path.join( CORPUS, 'large', 'decimal.py' )
+		outline = ASTParser( filepath, outline = True )
+		full = ASTParser( filepath )
+
+		self.assertLess( len( outline.parse() ), len( full.parse() ) / 2 )
+		self.assertNotEqual( outline.variant(), full.variant() )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
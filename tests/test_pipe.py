@@ -0,0 +1,49 @@
+import os
+import json
+import unittest
+from StringIO import StringIO
+
+from Parser import ASTParser
+from Pipe import ASTPipe
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+
+
+class PipeTest( unittest.TestCase ):
+
+	def run_pipe( self, records, jobs ):
+		instream = StringIO( ''.join( ( record if isinstance( record, str ) else json.dumps( record ) ) + '\n' for record in records ) )
+		outstream = StringIO()
+		runner = ASTPipe( jobs = jobs )
+		runner.run( instream, outstream )
+		return [ json.loads( line ) for line in outstream.getvalue().splitlines() ], runner
+
+
+	def test_records_in_order( self ):
+		path = os.path.join( CORPUS, 'small', 'config.py' )
+		records = [ { "id": i, "path": 'r%d.py' % i, "source": 'x = %d\n' % i } for i in range( 20 ) ] + [ { "id": "file", "path": path } ]
+
+		for jobs in ( 1, 3 ):
+			results, runner = self.run_pipe( records, jobs )
+
+			self.assertEqual( [ result[ "id" ] for result in results ], range( 20 ) + [ "file" ] )
+			self.assertEqual( [ result[ "ast" ][ "body" ][ 0 ][ "value" ][ "value" ] for result in results[ :20 ] ], range( 20 ) )
+
+			expected = json.loads( ASTParser( path ).parse() )
+			expected[ "id" ] = "file"
+			self.assertEqual( results[ -1 ], expected )
+			self.assertEqual( ( runner.parsed, runner.failed ), ( 21, 0 ) )
+
+
+	def test_failures_are_envelopes( self ):
+		results, runner = self.run_pipe( [ 'not json', { "id": 1 }, { "id": 2, "source": 'def (' } ], 1 )
+
+		self.assertEqual( [ ( result[ "id" ], result[ "success" ] ) for result in results ], [ ( None, False ), ( 1, False ), ( 2, False ) ] )
+		self.assertEqual( runner.failed, 3 )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,64 @@
+import json
+import unittest
+
+from Query import ASTQuery, ASTQueryParser
+
+
+SOURCE = b'''import os
+from os import path
+
+class TestThing( object ):
+	def test_one( self ):
+		check( os.path.exists( "a" ) )
+
+	def helper( self ):
+		cursor.execute( "select 1" )
+
+def test_free():
+	check( True )
+'''
+
+
+
+class QueryTest( unittest.TestCase ):
+
+	def query( self, expression ):
+		result = json.loads( ASTQueryParser( 'query.py', source = SOURCE ).query( expression ) )
+		self.assertTrue( result[ "success" ] )
+		return result[ "matches" ]
+
+
+	def test_type( self ):
+		self.assertEqual( [ match[ "position" ][ "line" ] for match in self.query( 'FunctionDef' ) ], [ 5, 8, 11 ] )
+
+
+	def test_predicates( self ):
+		self.assertEqual( [ match[ "name" ] for match in self.query( 'FunctionDef[name ~= "^test"]' ) ], [ 'test_one', 'test_free' ] )
+		self.assertEqual( [ match[ "position" ][ "line" ] for match in self.query( 'Call[function.attribute == "execute"]' ) ], [ 9 ] )
+
+
+	def test_axes( self ):
+		self.assertEqual( [ match[ "position" ][ "line" ] for match in self.query( 'ClassDef > FunctionDef[name ~= "^test"] Call[function.line == "check"]' ) ], [ 6 ] )
+		self.assertEqual( [ match[ "position" ][ "line" ] for match in self.query( 'Module > FunctionDef Call' ) ], [ 12 ] )
+
+
+	def test_alternatives( self ):
+		self.assertEqual( [ match[ "type" ] for match in self.query( 'ImportFrom[module == "os"], Import' ) ], [ 'Import', 'ImportFrom' ] )
+
+
+	def test_only_serialized_fields( self ):
+		# python 2 keeps the context of a with statement in fields the serializer leaves out
+		source = b'with open( "a" ) as f:\n\tread( f )\n'
+		result = json.loads( ASTQueryParser( 'query.py', source = source ).query( 'With Call' ) )
+
+		self.assertEqual( [ match[ "function" ][ "line" ] for match in result[ "matches" ] ], [ 'read' ] )
+
+
+	def test_invalid( self ):
+		self.assertRaises( ValueError, ASTQuery, 'Call[' )
+		self.assertRaises( ValueError, ASTQuery, 'Call[name === "x"]' )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
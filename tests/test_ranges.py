@@ -0,0 +1,94 @@
+import os
+import re
+import ast
+import sys
+import unittest
+
+import Ranges
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+LIBRARY = os.path.dirname( os.__file__ )
+
+CONTEXT = re.compile( r'ctx=(Store|Del|Param|AugLoad|AugStore)\(\)' )
+
+
+
+def text( source, offsets, position ):
+	return source[ offsets[ position - 1 ] + position.column : offsets[ position.end_line - 1 ] + position.end_column ]
+
+
+def dump( node ):
+	return CONTEXT.sub( 'ctx=Load()', ast.dump( node ) )
+
+
+
+class RangesTest( unittest.TestCase ):
+
+	def spans( self, source ):
+		tree = ast.parse( source )
+		self.assertTrue( Ranges.locate( tree, Ranges.view( source ) ) )
+		offsets = Ranges.index( source )
+		return tree, dict( ( id( node ), text( source, offsets, node.lineno ) ) for node in ast.walk( tree ) if isinstance( getattr( node, 'lineno', None ), Ranges.Position ) )
+
+
+	def check( self, source, name ):
+		"""
+		Every expression reparses, on its own, to the
+		node it is the range of.
+		"""
+		tree, spans = self.spans( source )
+
+		for node in ast.walk( tree ):
+			if isinstance( node, ast.expr ) and id( node ) in spans:
+				snippet = spans[ id( node ) ]
+
+				try:
+					parsed = ast.parse( '(' + snippet + '\n)', mode = 'eval' ).body
+				except SyntaxError:
+					self.fail( "%s:%d: %s %r does not parse" % ( name, node.lineno, node.__class__.__name__, snippet ) )
+
+				self.assertEqual( dump( parsed ), dump( node ), "%s:%d: %s %r" % ( name, node.lineno, node.__class__.__name__, snippet ) )
+
+
+	def test_corpus( self ):
+		for category in ( 'small', 'docstrings', 'large' ):
+			directory = os.path.join( CORPUS, category )
+
+			for name in sorted( os.listdir( directory ) ):
+				if name.endswith( '.py' ):
+					with open( os.path.join( directory, name ), 'rb' ) as f:
+						self.check( f.read(), name )
+
+
+	def test_library( self ):
+		# multiline strings formatted with a string on their last line
+		for name in ( 'cgitb.py', 'Cookie.py', 'pydoc.py' ):
+			with open( os.path.join( LIBRARY, name ), 'rb' ) as f:
+				self.check( f.read(), name )
+
+
+	def test_multiline_string_operand( self ):
+		tree, spans = self.spans( "x = '''a\nb''' % ''.join( y )\n" )
+		operation = tree.body[ 0 ].value
+
+		self.assertEqual( spans[ id( operation ) ], "'''a\nb''' % ''.join( y )" )
+		self.assertEqual( spans[ id( operation.left ) ], "'''a\nb'''" )
+
+
+	def test_tuples( self ):
+		for source, expected in ( ( "t = ( x, )\n", "( x, )" ), ( "t = x,\n", "x," ), ( "t = ( a, b )\n", "( a, b )" ), ( "f( ( a, b ), c )\n", "( a, b )" ), ( "t = ()\n", "()" ) ):
+			tree, spans = self.spans( source )
+			found = [ node for node in ast.walk( tree ) if isinstance( node, ast.Tuple ) ]
+			self.assertEqual( spans[ id( found[ 0 ] ) ], expected )
+
+
+	def test_positions( self ):
+		tree, spans = self.spans( "def f( a ):\n\treturn a + 1\n" )
+		value = tree.body[ 0 ].body[ 0 ].value
+		self.assertEqual( ( value.lineno, value.lineno.column, value.lineno.end_line, value.lineno.end_column ), ( 2, 8, 2, 13 ) )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,99 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from Parser import ASTParser
+from Service import ASTService
+import Compression
+
+
+
+class ServiceTest( unittest.TestCase ):
+
+	def setUp( self ):
+		self.directory = tempfile.mkdtemp()
+		self.root = os.path.join( self.directory, 'root' )
+		os.mkdir( self.root )
+
+		for filepath in ( os.path.join( self.root, 'inside.py' ), os.path.join( self.directory, 'outside.py' ) ):
+			f = open( filepath, 'w' )
+			f.write( 'x = 1\n' )
+			f.close()
+
+		os.symlink( os.path.join( self.directory, 'outside.py' ), os.path.join( self.root, 'link.py' ) )
+
+
+	def tearDown( self ):
+		shutil.rmtree( self.directory )
+
+
+	def request( self, service, query, body = b'', headers = None ):
+		"""
+		Returns the status, headers and body of a request.
+		"""
+		environ = {
+			'REQUEST_METHOD': 'POST' if body else 'GET',
+			'QUERY_STRING': query,
+			'CONTENT_LENGTH': str( len( body ) ),
+			'wsgi.input': StringIO( body )
+		}
+		environ.update( headers or {} )
+		response = []
+
+		def start_response( status, headers ):
+			response.extend( [ status, dict( headers ) ] )
+
+		body = b''.join( service( environ, start_response ) )
+		return response[ 0 ], response[ 1 ], body
+
+
+	def serve( self, root = None ):
+		service = ASTService( jobs = 1, root = root )
+		service.start()
+		self.addCleanup( service.stop )
+		return service
+
+
+	def test_body( self ):
+		status, headers, body = self.request( self.serve(), 'path=a.py', b'y = 2\n' )
+		self.assertEqual( ( status, body ), ( '200 OK', ASTParser( 'a.py', source = b'y = 2\n' ).parse() ) )
+
+
+	def test_no_files_without_root( self ):
+		status, headers, body = self.request( self.serve(), 'path=' + os.path.join( self.root, 'inside.py' ) )
+		self.assertEqual( status, '403 Forbidden' )
+		self.assertFalse( json.loads( body )[ "success" ] )
+
+
+	def test_files_under_root( self ):
+		service = self.serve( self.root )
+		filepath = os.path.realpath( os.path.join( self.root, 'inside.py' ) )
+
+		for path in ( 'inside.py', '/inside.py', 'sub/../inside.py' ):
+			status, headers, body = self.request( service, 'path=' + path )
+			self.assertEqual( ( status, body ), ( '200 OK', ASTParser( filepath ).parse() ), path )
+
+
+	def test_files_outside_root( self ):
+		service = self.serve( self.root )
+
+		for path in ( '../outside.py', 'link.py', os.path.join( os.pardir, os.path.basename( self.root ) + '2', 'x.py' ) ):
+			status, headers, body = self.request( service, 'path=' + path )
+			self.assertEqual( ( status, json.loads( body )[ "filepath" ] ), ( '403 Forbidden', path ), path )
+
+
+	def test_compressed( self ):
+		for coding in ( 'gzip', 'deflate' ):
+			status, headers, body = self.request( self.serve(), 'path=a.py', b'y = 2\n', { 'HTTP_ACCEPT_ENCODING': coding } )
+			expected = ASTParser( 'a.py', source = b'y = 2\n' ).parse()
+
+			self.assertEqual( ( headers[ 'Content-Encoding' ], headers[ 'X-Decompressed-Length' ] ), ( coding, str( len( expected ) ) ) )
+			self.assertEqual( Compression.decompress( body ), expected )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
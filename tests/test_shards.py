@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from Parser import ASTParser
+from Batch import collect
+import Shards
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+
+
+class ShardsTest( unittest.TestCase ):
+
+	def setUp( self ):
+		self.directory = tempfile.mkdtemp()
+
+
+	def tearDown( self ):
+		shutil.rmtree( self.directory )
+
+
+	def write( self, filepath ):
+		target = os.path.join( self.directory, os.path.basename( filepath ) + '.shards' )
+		f = open( target, 'wb' )
+		f.write( ASTParser( filepath ).shards() )
+		f.close()
+		return target
+
+
+	def test_load_equals_parse( self ):
+		for filepath in collect( [ os.path.join( CORPUS, name ) for name in ( 'small', 'docstrings', 'large' ) ] ):
+			self.assertEqual( Shards.load( self.write( filepath ) ), json.loads( ASTParser( filepath ).parse() ), filepath )
+
+
+	def test_select( self ):
+		filepath = os.path.join( CORPUS, 'large', 'calendar.py' )
+		body = json.loads( ASTParser( filepath ).parse() )[ "ast" ][ "body" ]
+		shards = Shards.ASTShards( self.write( filepath ) )
+
+		try:
+			self.assertEqual( len( shards ), len( body ) )
+			self.assertEqual( shards.select( body[ 5 ][ "position" ][ "line" ] ), [ body[ 5 ] ] )
+			self.assertEqual( shards.select( body[ 3 ][ "position" ][ "line" ], body[ 6 ][ "position" ][ "line" ] ), body[ 3:7 ] )
+
+		finally:
+			shards.close()
+
+
+	def test_failure_is_a_header( self ):
+		source = os.path.join( self.directory, 'broken.py' )
+		f = open( source, 'w' )
+		f.write( 'def (\n' )
+		f.close()
+
+		envelope = Shards.load( self.write( source ) )
+		self.assertEqual( ( envelope[ "success" ], envelope[ "position" ][ "line" ] ), ( False, 1 ) )
+
+
+	def test_declared_encoding( self ):
+		source = os.path.join( self.directory, 'latin.py' )
+		f = open( source, 'wb' )
+		f.write( u'# -*- coding: latin-1 -*-\n"""Café crème."""\nx = "été"\n'.encode( 'latin-1' ) )
+		f.close()
+
+		loaded = Shards.load( self.write( source ) )
+
+		self.assertEqual( loaded, json.loads( ASTParser( source ).parse() ) )
+		self.assertEqual( loaded[ "ast" ][ "docstring" ], u'Café crème.' )
+		self.assertEqual( loaded[ "ast" ][ "body" ][ 1 ][ "value" ][ "value" ], u'été' )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
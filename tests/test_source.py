@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import os
+import mmap
+import json
+import shutil
+import tempfile
+import unittest
+
+from Parser import ASTParser
+import Source
+
+
+
+class SourceTest( unittest.TestCase ):
+
+	def setUp( self ):
+		self.directory = tempfile.mkdtemp()
+
+
+	def tearDown( self ):
+		shutil.rmtree( self.directory )
+
+
+	def write( self, name, data ):
+		filepath = os.path.join( self.directory, name )
+
+		with open( filepath, 'wb' ) as f:
+			f.write( data )
+
+		return filepath
+
+
+	def load( self, data ):
+		return Source.load( self.write( 'a.py', data ) )
+
+
+	def large( self, name, head, size ):
+		"""
+		Writes head followed by comment lines, padded
+		to exactly size bytes.
+		"""
+		line = b'# ' + b'x' * 77 + b'\n'
+		body = head + line * ( ( size - len( head ) ) // len( line ) )
+		return self.write( name, body + b'#' * ( size - len( body ) - 1 ) + b'\n' )
+
+
+	def test_load_small( self ):
+		source = self.load( b'x = 1\n' )
+
+		self.assertIsInstance( source, bytes )
+		self.assertEqual( source, b'x = 1\n' )
+
+
+	def test_load_large( self ):
+		filepath = self.large( 'large.py', b'x = 1\n', Source.THRESHOLD + 100 )
+		source = Source.load( filepath )
+
+		try:
+			self.assertIsInstance( source, mmap.mmap )
+			self.assertEqual( len( source ), Source.THRESHOLD + 100 )
+			self.assertEqual( source[ :6 ], b'x = 1\n' )
+
+		finally:
+			source.close()
+
+
+	def test_load_page_boundary( self ):
+		# no zero filled page end to follow the source, so it is read
+		filepath = self.large( 'aligned.py', b'x = 1\n', Source.THRESHOLD + mmap.PAGESIZE )
+		self.assertIsInstance( Source.load( filepath ), bytes )
+
+
+	def test_declared( self ):
+		self.assertEqual( Source.declared( b'x = 1\n' ), 'utf-8' )
+		self.assertEqual( Source.declared( b'# -*- coding: latin-1 -*-\nx = 1\n' ), 'iso8859-1' )
+		self.assertEqual( Source.declared( b'#!/usr/bin/env python\n# vim: set fileencoding=cp1252 :\n' ), 'cp1252' )
+		self.assertEqual( Source.declared( b'\n# coding=latin-1\n' ), 'iso8859-1' )
+		self.assertEqual( Source.declared( Source.BOM + b'x = 1\n' ), 'utf-8' )
+		self.assertEqual( Source.declared( b'# coding: klingon\n' ), 'utf-8' )
+		self.assertEqual( Source.declared( u'# coding: latin-1\n' ), 'utf-8' )
+
+
+	def test_cookie_after_code( self ):
+		# PEP 263 only looks at the second line if the first is blank or a comment
+		self.assertEqual( Source.declared( b'x = 1\n# coding: latin-1\n' ), 'utf-8' )
+		self.assertEqual( Source.declared( b'x = 1\ny = 2\n# coding: latin-1\n' ), 'utf-8' )
+
+
+	def test_encode( self ):
+		self.assertEqual( Source.encode( u'# coding: latin-1\nx = "é"\n' ), b'# coding: latin-1\nx = "\xe9"\n' )
+		self.assertEqual( Source.encode( u'x = "é"\n' ), b'x = "\xc3\xa9"\n' )
+		self.assertEqual( Source.encode( u'# coding: ascii\nx = "é"\n' ), b'# coding: ascii\nx = "\xc3\xa9"\n' )
+
+
+	def test_parse_large( self ):
+		head = u'# -*- coding: latin-1 -*-\n"""été"""\nx = u"café"\n'.encode( 'latin-1' )
+		filepath = self.large( 'large.py', head, Source.THRESHOLD + 100 )
+		parser = ASTParser( filepath )
+		result = json.loads( parser.parse() )
+
+		self.assertTrue( parser.success )
+		self.assertEqual( parser.encoding, 'iso8859-1' )
+		self.assertEqual( result[ "ast" ][ "docstring" ], u'été' )
+		self.assertEqual( result[ "ast" ][ "body" ][ 1 ][ "value" ][ "value" ], u'café' )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
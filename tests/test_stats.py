@@ -0,0 +1,93 @@
+import os
+import ast
+import json
+import unittest
+
+from Parser import ASTParser
+from Table import ASTTableSerializer
+from Lean import ASTLeanSerializer
+from Stats import ASTStats, CALLS, BYTES
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+
+
+def parse( filepath ):
+	with open( filepath, 'rb' ) as f:
+		return ast.parse( f.read() )
+
+
+
+class StatsTest( unittest.TestCase ):
+
+	def test_same_output( self ):
+		tree = parse( os.path.join( CORPUS, 'large', 'decimal.py' ) )
+
+		self.assertEqual( json.dumps( ASTStats().visit( tree ) ), json.dumps( ASTTableSerializer().visit( tree ) ) )
+		self.assertEqual( json.dumps( ASTStats().visit( tree, lean = True ) ), json.dumps( ASTLeanSerializer().visit( tree ) ) )
+
+
+	def test_calls( self ):
+		stats = ASTStats()
+		stats.visit( ast.parse( 'x = 1\ny = 2\nraise' ) )
+
+		self.assertEqual( dict( ( key, counter[ CALLS ] ) for key, counter in stats.counters.iteritems() ),
+			{ 'visit_Module': 1, 'visit_Assign': 2, 'visit_Name': 2, 'visit_Num': 2, 'visit_Raise': 1 } )
+
+
+	def test_bytes_add_up( self ):
+		for lean in ( False, True ):
+			stats = ASTStats()
+			result = stats.visit( parse( os.path.join( CORPUS, 'small', 'wordcount.py' ) ), lean = lean )
+
+			self.assertEqual( sum( counter[ BYTES ] for counter in stats.counters.itervalues() ), len( json.dumps( result ) ) )
+
+
+	def test_too_deep( self ):
+		stats = ASTStats()
+		stats.visit( ast.parse( 'x = 1' ) )
+		before = stats.reset()
+		stats.merge( before )
+
+		self.assertRaises( RuntimeError, stats.visit, parse( os.path.join( CORPUS, 'nested', 'chain.py' ) ) )
+		self.assertEqual( stats.counters, before )
+
+
+	def test_merge_and_reset( self ):
+		stats = ASTStats()
+		stats.visit( ast.parse( 'x = 1' ) )
+		first = stats.reset()
+
+		self.assertEqual( stats.counters, {} )
+
+		stats.merge( first )
+		stats.merge( first )
+		self.assertEqual( stats.counters[ 'visit_Name' ][ CALLS ], 2 )
+		self.assertEqual( stats.counters[ 'visit_Name' ][ BYTES ], 2 * first[ 'visit_Name' ][ BYTES ] )
+
+
+	def test_dump_and_table( self ):
+		stats = ASTStats()
+		stats.visit( ast.parse( 'x = 1' ) )
+		dumped = json.loads( stats.dump() )
+		lines = stats.table().splitlines()
+
+		self.assertEqual( sorted( dumped ), [ 'visit_Assign', 'visit_Module', 'visit_Name', 'visit_Num' ] )
+		self.assertEqual( dumped[ 'visit_Num' ][ "calls" ], 1 )
+		self.assertEqual( len( lines ), 6 )
+		self.assertTrue( lines[ -1 ].startswith( 'total' ) )
+		self.assertEqual( int( lines[ -1 ].split()[ 1 ] ), 4 )
+
+
+	def test_parser( self ):
+		stats = ASTStats()
+		filepath = os.path.join( CORPUS, 'small', 'fizzbuzz.py' )
+
+		self.assertEqual( ASTParser( filepath, stats = stats ).parse(), ASTParser( filepath ).parse() )
+		self.assertEqual( stats.counters[ 'visit_Module' ][ CALLS ], 1 )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,34 @@
+import os
+import unittest
+from StringIO import StringIO
+
+from Parser import ASTParser
+from Batch import collect
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+
+
+class StreamTest( unittest.TestCase ):
+
+	def dump( self, parser ):
+		out = StringIO()
+		parser.dump( out )
+		return out.getvalue()
+
+
+	def test_corpus( self ):
+		# the nested corpus is too deep for the recursion limit
+		for filepath in collect( [ CORPUS ] ):
+			self.assertEqual( self.dump( ASTParser( filepath ) ), ASTParser( filepath ).parse(), filepath )
+
+
+	def test_syntax_error( self ):
+		source = 'def f(:\n'
+		self.assertEqual( self.dump( ASTParser( 'a.py', source = source ) ), ASTParser( 'a.py', source = source ).parse() )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
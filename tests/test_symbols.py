@@ -0,0 +1,93 @@
+import os
+import mmap
+import shutil
+import tempfile
+import unittest
+
+from Symbols import ASTSymbols
+import Source
+
+
+SOURCE = b'''"""A module."""
+import os
+
+try:
+	import json
+except ImportError:
+	import simplejson as json
+
+if os.name == 'nt':
+	def home():
+		return os.environ[ 'USERPROFILE' ]
+else:
+	def home():
+		from pwd import getpwuid
+		return getpwuid( os.getuid() ).pw_dir
+
+class Config( object ):
+	if True:
+		def load( self ):
+			from . import defaults
+
+			def nested():
+				pass
+
+			return defaults
+'''
+
+
+
+class SymbolsTest( unittest.TestCase ):
+
+	def setUp( self ):
+		self.directory = tempfile.mkdtemp()
+		self.package = os.path.join( self.directory, 'app' )
+		os.mkdir( self.package )
+		open( os.path.join( self.package, '__init__.py' ), 'w' ).close()
+
+		f = open( os.path.join( self.package, 'config.py' ), 'wb' )
+		f.write( SOURCE )
+		f.close()
+
+		self.index = ASTSymbols( os.path.join( self.directory, 'index' ), jobs = 1 )
+		self.index.update( [ self.package ] )
+
+
+	def tearDown( self ):
+		shutil.rmtree( self.directory )
+
+
+	def test_guarded_imports( self ):
+		self.assertEqual( [ record[ "line" ] for record in self.index.importers( 'json' ) ], [ 5 ] )
+		self.assertEqual( [ ( record[ "asname" ], record[ "line" ] ) for record in self.index.importers( 'simplejson' ) ], [ ( 'json', 7 ) ] )
+
+
+	def test_local_imports( self ):
+		self.assertEqual( [ ( record[ "name" ], record[ "line" ] ) for record in self.index.importers( 'pwd' ) ], [ ( 'getpwuid', 14 ) ] )
+		self.assertEqual( [ ( record[ "name" ], record[ "line" ] ) for record in self.index.importers( 'app' ) ], [ ( 'defaults', 20 ) ] )
+
+
+	def test_definitions_under_compound_statements( self ):
+		self.assertEqual( [ record[ "line" ] for record in self.index.definitions( 'home' ) ], [ 10, 13 ] )
+		self.assertEqual( [ record[ "qualname" ] for record in self.index.definitions( 'load' ) ], [ 'Config.load' ] )
+		self.assertEqual( self.index.definitions( 'nested' ), [] )
+		self.assertEqual( [ record[ "module" ] for record in self.index.definitions( 'Config' ) ], [ 'app.config' ] )
+
+
+	def test_large_file( self ):
+		# memory mapped, rather than read (see Source.load)
+		filepath = os.path.join( self.package, 'large.py' )
+		f = open( filepath, 'wb' )
+		f.write( b'import large_dependency\n' + b'# ' + b'x' * Source.THRESHOLD + b'\ndef last():\n\tpass\n' )
+		f.close()
+
+		self.assertTrue( os.path.getsize( filepath ) % mmap.PAGESIZE )
+		self.index.update( [ self.package ] )
+
+		self.assertEqual( [ record[ "filepath" ] for record in self.index.importers( 'large_dependency' ) ], [ filepath ] )
+		self.assertEqual( [ record[ "line" ] for record in self.index.definitions( 'last' ) ], [ 3 ] )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import os
+import ast
+import json
+import unittest
+
+from Batch import collect
+from Serializer import ASTSerializer
+from Table import ASTTableSerializer, FIELDS, build
+import Table
+
+
+CORPUS = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), os.pardir, 'benchmarks', 'corpus' )
+
+SOURCE = '''# -*- coding: utf-8 -*-
+"""A module with most of the grammar."""
+from __future__ import division
+import os, sys as system
+from collections import OrderedDict as od
+
+
+@decorator( 1 )
+class Thing( Base, object ):
+	"""Docstring."""
+	attribute = [ 1, 2.5, -3, 'a', u'\xc3\xa9', ( 1, ), { 1: 2 }, { 3 }, None, True ]
+
+	def method( self, a, b = 2, *args, **kwargs ):
+		global counter
+		x = lambda y, z = 1: y + z
+		x += 1
+		del args[ 0 ]
+		print 'x', a
+		for i in range( 10 ):
+			if i % 2 and not i or i is None:
+				continue
+			elif i in ( 1, 2 ) or i not in [ 3 ]:
+				break
+		else:
+			pass
+		while a < b <= 3 != 4:
+			a = b if a else ~b
+		try:
+			raise ValueError( 'v' )
+		except ( ValueError, TypeError ):
+			pass
+		except Exception:
+			raise
+		finally:
+			a = None
+		with open( 'f' ) as f, open( 'g' ):
+			data = f.read()[ 1:2 ], f.read()[ ::2 ], f.read()[ 1, ... ]
+		yield [ i for i in a if i ], { i: j for i, j in b }, ( i for i in a )
+		return a.b.c( *args, **kwargs ) << 2 >> 1 & 3 | 4 ^ 5 // 6 ** 7
+'''
+
+
+
+def reference( tree ):
+	return json.dumps( ASTSerializer().visit( tree ) )
+
+
+
+class TableTest( unittest.TestCase ):
+
+	def test_corpus( self ):
+		compared = 0
+
+		for filepath in collect( [ os.path.join( CORPUS, name ) for name in ( 'small', 'docstrings', 'large' ) ] ):
+			with open( filepath, 'rb' ) as f:
+				tree = ast.parse( f.read() )
+
+			# the ASTSerializer cannot serialize every file, and there is nothing to match
+			try:
+				expected = reference( tree )
+			except Exception:
+				continue
+
+			self.assertEqual( json.dumps( ASTTableSerializer().visit( tree ) ), expected, filepath )
+			compared += 1
+
+		self.assertGreater( compared, 0 )
+
+
+	def test_grammar( self ):
+		tree = ast.parse( SOURCE )
+		self.assertEqual( json.dumps( ASTTableSerializer().visit( tree ) ), reference( tree ) )
+
+
+	def test_fallback( self ):
+		# Slice, Raise and withitem are left to the ASTSerializer
+		self.assertNotIn( 'Slice', FIELDS )
+		self.assertIs( Table.DISPATCH[ ast.Slice ].__self__.__class__, ASTSerializer )
+
+		seen = []
+		dispatch = build( fallback = lambda node : seen.append( node ) or 'fallback' )
+		node = ast.parse( 'raise' ).body[ 0 ]
+
+		self.assertEqual( dispatch[ ast.Raise ]( node ), 'fallback' )
+		self.assertEqual( seen, [ node ] )
+
+
+	def test_wrap_sees_children( self ):
+		calls = []
+
+		def wrap( name, function ):
+			def wrapped( node ):
+				calls.append( name )
+				return function( node )
+
+			return wrapped
+
+		dispatch = build( wrap = wrap )
+		dispatch[ ast.Module ]( ast.parse( 'x = 1' ) )
+
+		self.assertEqual( calls, [ 'visit_Module', 'visit_Assign', 'visit_Name', 'visit_Num' ] )
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,67 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from Batch import ASTBatch
+from Watch import ASTWatch
+
+
+
+class WatchTest( unittest.TestCase ):
+
+	def setUp( self ):
+		self.directory = tempfile.mkdtemp()
+		self.watch = ASTWatch( self.directory, ASTBatch( [], jobs = 1 ), notify = False )
+
+
+	def tearDown( self ):
+		shutil.rmtree( self.directory )
+
+
+	def write( self, name, source ):
+		f = open( os.path.join( self.directory, name ), 'w' )
+		f.write( source )
+		f.close()
+
+
+	def update( self ):
+		stream = StringIO()
+		log = StringIO()
+		self.watch.update( self.watch.scan(), stream, log )
+		return [ json.loads( line ) for line in stream.getvalue().splitlines() ], log.getvalue()
+
+
+	def test_glob_characters_in_names( self ):
+		self.write( 't1.py', 'x = 1\n' )
+		self.update()
+
+		# as a glob, t[1].py would match t1.py, and *.py every file
+		self.write( 't[1].py', 'y = 2\n' )
+		self.write( '*.py', 'z = 3\n' )
+		results, log = self.update()
+
+		self.assertEqual( sorted( result[ "filepath" ] for result in results ), [ os.path.join( self.directory, name ) for name in ( '*.py', 't[1].py' ) ] )
+		self.assertTrue( all( result[ "success" ] for result in results ) )
+		self.assertIn( "2 added, 0 modified, 0 removed; parsed 2 files", log )
+
+
+	def test_modified_and_removed( self ):
+		self.write( 'a.py', 'x = 1\n' )
+		self.update()
+
+		self.write( 'a.py', 'x = 22\n' )
+		results, log = self.update()
+		self.assertEqual( [ result[ "ast" ][ "body" ][ 0 ][ "value" ][ "value" ] for result in results ], [ 22 ] )
+		self.assertIn( "0 added, 1 modified", log )
+
+		os.remove( os.path.join( self.directory, 'a.py' ) )
+		results, log = self.update()
+		self.assertEqual( results, [ { "success": True, "message": None, "filepath": os.path.join( self.directory, 'a.py' ), "removed": True } ] )
+
+
+
+if __name__ == "__main__":
+	unittest.main()